@@ -0,0 +1,328 @@
+import argparse
+import io
+import json
+import os
+import shutil
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from P020_Backend.P021_Code.CloudConversion import RESULTS_SUFFIX, read_points, write_points
+from P020_Backend.P021_Code.CloudFiles import create_tmp_file
+
+
+ARCHIVE_EXTENSION = ".cpack"
+ARCHIVE_MAGIC = b"CUTPACK1"
+# the point data starts at a multiple of the alignment (memory mapping)
+ARCHIVE_ALIGNMENT = 64
+# size of the blocks in which the point data is copied into the archive
+COPY_BUFFER_SIZE = 16 * 1024 * 1024
+
+
+class CutoutArchive:
+    """
+    A class that reads a packed cutout archive: a single file containing all cutouts of a dataset and its results file.
+    The file starts with a magic number, the length of the header and the header (json with the results file and the
+    offset index of the cutouts), followed by the points of all cutouts in one memory mapped array. A single cutout is
+    read randomly without opening any other file.
+
+    ...
+
+    Attributes
+    ----------
+    archive_path : str
+        Memory path of the archive
+    results_file : str
+        The filename of the packed results file
+    results : pd.DataFrame
+        The labeling results of the packed cutouts
+    filenames : list
+        The filenames of the packed cutouts
+    offsets : np.ndarray
+        The index of the first point of every cutout
+    counts : np.ndarray
+        The number of points of every cutout
+    index : dict
+        The position of every cutout in the index (filename as key)
+    points : np.ndarray
+        The points of all cutouts (memory mapped)
+
+    Methods
+    -------
+    get_points(filename)
+        Returns the points of a cutout
+    get_label(filename)
+        Returns the labels of a cutout
+
+    """
+
+    def __init__(self, archive_path: str):
+        """
+        Parameter
+        ---------
+        archive_path : str
+            Memory path of the archive
+
+        """
+        with open(archive_path, "rb") as archive_file:
+            if archive_file.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+                raise ValueError(f"Kein Ausschnitt-Archiv: {archive_path}")
+            header_size = int(np.frombuffer(archive_file.read(8), dtype="<u8")[0])
+            header = json.loads(archive_file.read(header_size).decode("utf-8"))
+
+        self.archive_path = archive_path
+        self.results_file = header["results_file"]
+        self.results = pd.read_csv(io.StringIO(header["results"]), sep=";")
+        self.filenames = header["filenames"]
+        self.offsets = np.asarray(header["offsets"], dtype=np.int64)
+        self.counts = np.asarray(header["counts"], dtype=np.int64)
+        self.index = {filename: ind for ind, filename in enumerate(self.filenames)}
+
+        n_points = int(self.counts.sum())
+        if n_points:
+            self.points = np.memmap(archive_path, dtype=np.dtype(header["dtype"]), mode="r",
+                                    offset=header["data_offset"], shape=(n_points, 3))
+        else:
+            self.points = np.empty((0, 3), dtype=np.dtype(header["dtype"]))
+
+    def get_points(self, filename: str):
+        """
+        Returns the points of a cutout (memory mapped)
+
+        Parameter
+        ---------
+        filename : str
+            The filename of the cutout
+
+        """
+        ind = self.index[filename]
+        return self.points[self.offsets[ind]:self.offsets[ind] + self.counts[ind]]
+
+    def get_label(self, filename: str):
+        """
+        Returns the labels of a cutout (one hot encoded grasp directions) or None if it is not labeled
+
+        Parameter
+        ---------
+        filename : str
+            The filename of the cutout
+
+        """
+        label = self.results.loc[self.results["filename"] == filename]
+        if not len(label):
+            return None
+        return label.values.tolist()[0][2:10]
+
+
+def is_archive(path: str):
+    """
+    Returns whether the path is a packed cutout archive
+
+    Parameter
+    ---------
+    path : str
+        The path to be checked
+
+    """
+    return path.endswith(ARCHIVE_EXTENSION) and os.path.isfile(path)
+
+
+def split_archive_path(path: str):
+    """
+    Splits the path of a cutout in an archive (archive path joined with the filename of the cutout) into the archive
+    path and the filename. Returns None and the path for all other paths.
+
+    Parameter
+    ---------
+    path : str
+        The path of the cutout
+
+    """
+    archive_path, filename = os.path.split(path)
+    if is_archive(archive_path):
+        return archive_path, filename
+    return None, path
+
+
+@lru_cache(maxsize=4)
+def load_archive(archive_path: str, size: int, mtime: int):
+    """
+    Returns the archive (cached, size and modification time of the file are part of the key)
+
+    """
+    return CutoutArchive(archive_path)
+
+
+def open_archive(archive_path: str):
+    """
+    Returns the archive, which is only read again if the file changed (size and modification time)
+
+    Parameter
+    ---------
+    archive_path : str
+        Memory path of the archive
+
+    """
+    stat = os.stat(archive_path)
+    return load_archive(os.path.abspath(archive_path), stat.st_size, stat.st_mtime_ns)
+
+
+def get_archive_header(results_file: str, results_df: pd.DataFrame, counts: list, dtype: type):
+    """
+    Returns the encoded header of an archive and the offset of the point data in the file
+
+    Parameter
+    ---------
+    results_file : str
+        The filename of the results file
+    results_df : pd.DataFrame
+        The labeling results of the packed cutouts
+    counts : list
+        The number of points of every packed cutout
+    dtype : type
+        The data type in which the points are stored
+
+    """
+    header = {"results_file": results_file, "results": results_df.to_csv(sep=";", index=False),
+              "filenames": results_df["filename"].tolist(), "offsets": np.cumsum([0] + counts)[:-1].tolist(),
+              "counts": counts, "dtype": np.dtype(dtype).str,
+              # the data offset is part of the header, its maximum number of digits is reserved before it is known
+              "data_offset": 10 ** 15}
+    header_size = len(json.dumps(header).encode("utf-8"))
+    data_offset = -(-(len(ARCHIVE_MAGIC) + 8 + header_size) // ARCHIVE_ALIGNMENT) * ARCHIVE_ALIGNMENT
+    header["data_offset"] = data_offset
+    return json.dumps(header).encode("utf-8"), data_offset
+
+
+def pack_cutouts(cutout_path: str, archive_path: str = None, results_file: str = None, dtype: type = np.float32):
+    """
+    Packs the cutouts of a dataset folder (e.g. Cutout_3x3) that are listed in its results file into an archive. The
+    archive is written atomically (temporary file and rename). Only one cutout is held in memory at a time: the points
+    are streamed into a temporary data file, which is copied behind the header once all point counts are known.
+
+    Parameter
+    ---------
+    cutout_path : str
+        The path of the dataset
+    archive_path : str
+        Memory path of the archive (default: next to the dataset folder, named like the folder)
+    results_file : str
+        The filename of the results file (default: the only results file of the dataset)
+    dtype : type
+        The data type in which the points are stored
+
+    Returns
+    -------
+    archive_path : str
+        Memory path of the archive
+    failed_files : list
+        The filename and error message of every cutout that could not be packed (left out with its label row)
+
+    """
+    if archive_path is None:
+        archive_path = os.path.normpath(cutout_path) + ARCHIVE_EXTENSION
+    if results_file is None:
+        results_files = [filename for filename in os.listdir(cutout_path) if filename.endswith(RESULTS_SUFFIX)]
+        if len(results_files) != 1:
+            raise ValueError(f"{len(results_files)} Ergebnisdateien in {cutout_path}, bitte eine angeben")
+        results_file = results_files[0]
+
+    results_df = pd.read_csv(os.path.join(cutout_path, results_file), sep=";")
+    counts, failed_files = [], []
+    packed = np.zeros(len(results_df), dtype=bool)
+    data_path = create_tmp_file(archive_path, ".data.tmp")
+    tmp_path = None
+    try:
+        with open(data_path, "wb") as data_file:
+            for ind, filename in enumerate(results_df["filename"]):
+                try:
+                    cutout = np.asarray(read_points(os.path.join(cutout_path, filename)), dtype=dtype)
+                except (OSError, ValueError) as read_exception:
+                    failed_files.append((filename, f"{type(read_exception).__name__}: {read_exception}"))
+                    continue
+                data_file.write(np.ascontiguousarray(cutout, dtype=np.dtype(dtype).newbyteorder("<")).tobytes())
+                counts.append(len(cutout))
+                packed[ind] = True
+        results_df = results_df.loc[packed]
+
+        header_bytes, data_offset = get_archive_header(results_file, results_df, counts, dtype)
+        tmp_path = create_tmp_file(archive_path)
+        with open(tmp_path, "wb") as tmp_file, open(data_path, "rb") as data_file:
+            tmp_file.write(ARCHIVE_MAGIC)
+            tmp_file.write(np.array([len(header_bytes)], dtype="<u8").tobytes())
+            tmp_file.write(header_bytes)
+            tmp_file.write(b"\0" * (data_offset - tmp_file.tell()))
+            shutil.copyfileobj(data_file, tmp_file, COPY_BUFFER_SIZE)
+        os.replace(tmp_path, archive_path)
+    except BaseException:
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        os.remove(data_path)
+
+    return archive_path, failed_files
+
+
+def unpack_cutouts(archive_path: str, cutout_path: str, cutout_format: str = None):
+    """
+    Unpacks the cutouts and the results file of an archive into a dataset folder. Every file is written atomically.
+
+    Parameter
+    ---------
+    archive_path : str
+        Memory path of the archive
+    cutout_path : str
+        The path of the dataset
+    cutout_format : str
+        The extension of the unpacked cutouts (".csv", ".npy", ".ply" or ".npz", default: extension of the packed
+        filename). The filenames in the results file are changed accordingly.
+
+    """
+    archive = CutoutArchive(archive_path)
+    os.makedirs(cutout_path, exist_ok=True)
+    results_df = archive.results.copy()
+    filenames = []
+    for filename in archive.filenames:
+        if cutout_format:
+            filename_out = os.path.splitext(filename)[0] + cutout_format
+        else:
+            filename_out = filename
+        write_points(os.path.join(cutout_path, filename_out), np.asarray(archive.get_points(filename)))
+        filenames.append(filename_out)
+    results_df["filename"] = filenames
+
+    results_path = os.path.join(cutout_path, archive.results_file)
+    tmp_path = create_tmp_file(results_path)
+    try:
+        results_df.to_csv(tmp_path, sep=";", index=False)
+        os.replace(tmp_path, results_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Packs a cutout dataset into an archive or unpacks an archive")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    pack_parser = subparsers.add_parser("pack", help="Packs the labeled cutouts of a dataset folder")
+    pack_parser.add_argument("cutout_path", help="Dataset folder (e.g. Cutout_3x3)")
+    pack_parser.add_argument("--archive", help=f"Archive file (default: <folder>{ARCHIVE_EXTENSION})")
+    pack_parser.add_argument("--results", help="Results file of the dataset folder")
+    pack_parser.add_argument("--float64", action="store_true", help="Store the points as float64")
+    unpack_parser = subparsers.add_parser("unpack", help="Unpacks an archive into a dataset folder")
+    unpack_parser.add_argument("archive", help="Archive file")
+    unpack_parser.add_argument("cutout_path", help="Dataset folder")
+    unpack_parser.add_argument("--format", choices=(".csv", ".npy", ".ply", ".npz"),
+                               help="Format of the cutouts (default: unchanged)")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        path, failures = pack_cutouts(args.cutout_path, args.archive, args.results,
+                                      np.float64 if args.float64 else np.float32)
+        for name, message in failures:
+            print(f"Fehler bei {name}: {message}")
+        print(f"{len(CutoutArchive(path).filenames)} Ausschnitte gepackt in {path}")
+    else:
+        unpack_cutouts(args.archive, args.cutout_path, args.format)
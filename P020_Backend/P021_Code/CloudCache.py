@@ -0,0 +1,237 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from P020_Backend.P021_Code.CloudArchive import split_archive_path
+from P020_Backend.P021_Code.CloudProcessing import Cloud
+
+
+# memory budget of the cached points and plot data in bytes
+CACHE_BUDGET = 512 * 2 ** 20
+
+
+def get_cache_key(path: str, dtype: type = np.float64):
+    """
+    Returns the cache key of a point cloud file (path, size and modification time of the file and data type of the
+    points) or None if the file does not exist. Cutouts in an archive use the size and modification time of the
+    archive.
+
+    Parameter
+    ---------
+    path : str
+        Memory path of the point cloud
+    dtype : type
+        The data type of the points
+
+    """
+    archive_path, _ = split_archive_path(path)
+    try:
+        stat = os.stat(archive_path or path)
+    except OSError:
+        return None
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns, np.dtype(dtype).name
+
+
+def get_nbytes(data):
+    """
+    Returns the memory of an array or of the arrays in a tuple in bytes
+
+    """
+    if isinstance(data, tuple):
+        return sum(get_nbytes(item) for item in data)
+    return getattr(data, "nbytes", 0)
+
+
+class CloudCache:
+    """
+    A class that caches loaded point clouds (their points after the height filter and their spatial index) together
+    with the data of their plots. The least recently used clouds are removed when the memory budget is exceeded. All
+    methods can be called from several threads (e.g. loading and prefetch thread).
+
+    ...
+
+    Attributes
+    ----------
+    budget : int
+        The memory budget of the cached points and plot data in bytes
+    entries : OrderedDict
+        The cached clouds (cache key as key, dict with points, index, pcd_path, plot_data and nbytes as value), least
+        recently used first
+    memory : int
+        The memory of all cached clouds in bytes
+    hits : int
+        The number of requested clouds that were cached
+    misses : int
+        The number of requested clouds that were not cached
+    evictions : int
+        The number of clouds removed because the memory budget was exceeded
+    lock : threading.Lock
+        The lock of the entries and counters
+
+    Methods
+    -------
+    get(path, dtype)
+        Returns a new cloud of the cached points and the cached plot data or None
+    contains(path, dtype)
+        Returns whether the cloud is cached (without counting a hit or miss)
+    put(cloud, plot_data)
+        Adds the points of a loaded cloud and the data of its plots to the cache
+    add_plot_data(path, dtype, settings, data)
+        Adds the data of a plot to a cached cloud
+    clear()
+        Removes all clouds from the cache
+    get_stats()
+        Returns the counters and the memory of the cache
+
+    """
+
+    def __init__(self, budget: int = CACHE_BUDGET):
+        """
+        Parameter
+        ---------
+        budget : int
+            The memory budget of the cached points and plot data in bytes
+
+        """
+        self.budget = budget
+        self.entries = OrderedDict()
+        self.memory = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, path: str, dtype: type = np.float64):
+        """
+        Returns a new cloud of the cached points and spatial index (it can be filtered without changing the cache) and
+        a copy of the dict of the cached plot data (plot settings as key) or None if the cloud is not cached
+
+        Parameter
+        ---------
+        path : str
+            Memory path of the point cloud
+        dtype : type
+            The data type of the points
+
+        """
+        key = get_cache_key(path, dtype)
+        with self.lock:
+            entry = self.entries.get(key) if key else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            plot_data = dict(entry["plot_data"])
+
+        cloud = Cloud(dtype=dtype)
+        cloud.set_points(entry["points"])
+        cloud.pcd_path = entry["pcd_path"]
+        if entry["index"] is not None:
+            cloud.index = entry["index"]
+            cloud.index_points = cloud.get_points()
+        return cloud, plot_data
+
+    def contains(self, path: str, dtype: type = np.float64):
+        """
+        Returns whether the cloud is cached (without counting a hit or miss)
+
+        Parameter
+        ---------
+        path : str
+            Memory path of the point cloud
+        dtype : type
+            The data type of the points
+
+        """
+        key = get_cache_key(path, dtype)
+        with self.lock:
+            return key is not None and key in self.entries
+
+    def put(self, cloud: Cloud, plot_data: dict):
+        """
+        Adds the points of a loaded cloud (not filtered since loading), its spatial index (if it was built) and the data
+        of its plots to the cache. Clouds larger than the memory budget are not cached.
+
+        Parameter
+        ---------
+        cloud : Cloud
+            The loaded cloud
+        plot_data : dict
+            The data of the plots (plot settings as key)
+
+        """
+        key = get_cache_key(cloud.pcd_path, cloud.dtype)
+        if key is None:
+            return
+        points = cloud.get_points()
+        # the cached points are shared by all clouds returned by get
+        points.flags.writeable = False
+        index = cloud.index if cloud.index_points is points else None
+        nbytes = points.nbytes + sum(get_nbytes(data) for data in plot_data.values())
+        if index is not None:
+            nbytes += index.order.nbytes + index.starts.nbytes
+        if nbytes > self.budget:
+            return
+
+        with self.lock:
+            if key in self.entries:
+                self.memory -= self.entries.pop(key)["nbytes"]
+            self.entries[key] = {"points": points, "index": index, "pcd_path": cloud.pcd_path,
+                                 "plot_data": dict(plot_data), "nbytes": nbytes}
+            self.memory += nbytes
+            while self.memory > self.budget:
+                _, entry = self.entries.popitem(last=False)
+                self.memory -= entry["nbytes"]
+                self.evictions += 1
+
+    def add_plot_data(self, path: str, dtype: type, settings: tuple, data):
+        """
+        Adds the data of a plot to a cached cloud (ignored if the cloud is not cached)
+
+        Parameter
+        ---------
+        path : str
+            Memory path of the point cloud
+        dtype : type
+            The data type of the points
+        settings : tuple
+            The plot type, sample rate and voxel size of the plot
+        data : Any
+            The data of the plot
+
+        """
+        key = get_cache_key(path, dtype)
+        with self.lock:
+            entry = self.entries.get(key) if key else None
+            if entry is None or settings in entry["plot_data"]:
+                return
+            self.entries.move_to_end(key)
+            entry["plot_data"][settings] = data
+            entry["nbytes"] += get_nbytes(data)
+            self.memory += get_nbytes(data)
+            while self.memory > self.budget and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.memory -= evicted["nbytes"]
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Removes all clouds from the cache (the counters are kept)
+
+        """
+        with self.lock:
+            self.entries.clear()
+            self.memory = 0
+
+    def get_stats(self):
+        """
+        Returns the counters (hits, misses, hit rate, evictions) and the memory of the cache
+
+        """
+        with self.lock:
+            requests = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / requests if requests else 0.0,
+                    "evictions": self.evictions, "entries": len(self.entries), "memory": self.memory,
+                    "budget": self.budget}
@@ -0,0 +1,546 @@
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from P020_Backend.P021_Code.CloudFiles import CUTOUT_EXTENSION, create_tmp_file, is_tmp_file, read_csv_points, \
+    read_cutout_points, write_cutout_points
+from P020_Backend.P021_Code.CloudFilters import ThresholdFilter
+from P020_Backend.P021_Code.LazyImport import LazyModule
+
+# imported on first use, open3d takes more than a second to import
+open3d = LazyModule("open3d")
+
+
+FORMATS = (".csv", ".npy", ".ply", CUTOUT_EXTENSION)
+MANIFEST_FILE = ".conversion_manifest.csv"
+MANIFEST_COLUMNS = ["filename", "target", "source_size", "source_mtime", "target_size", "target_mtime", "threshold",
+                    "scale", "points", "quantize", "compress"]
+RESULTS_SUFFIX = "_Results_Labeled.csv"
+
+
+def read_points(path: str):
+    """
+    Reads the points of a point cloud file (csv, npy, ply or binary cutout npz). Npy files are memory mapped, csv files
+    are parsed without writing a binary cache file.
+
+    Parameter
+    ---------
+    path : str
+        Memory path of the point cloud
+
+    """
+    if path.endswith(".csv"):
+        points = read_csv_points(path, use_cache=False)
+    elif path.endswith(".npy"):
+        points = np.load(path, mmap_mode="r")
+    elif path.endswith(".ply"):
+        points = np.asarray(open3d.io.read_point_cloud(path).points)
+    elif path.endswith(CUTOUT_EXTENSION):
+        points = read_cutout_points(path)
+    else:
+        raise ValueError(f"Unbekanntes Dateiformat: {path}")
+
+    if points.ndim != 2 or points.shape[1] != 3:
+        raise ValueError(f"Keine Punktwolke (Form {points.shape}): {path}")
+    return points
+
+
+def write_points(path: str, points: np.ndarray, quantize: bool = False, compress: bool = True):
+    """
+    Writes the points to a point cloud file (csv, npy, ply or binary cutout npz) atomically. The points are written to
+    a temporary file in the target folder, which replaces the target file only after it is complete.
+
+    Parameter
+    ---------
+    path : str
+        Memory path of the point cloud
+    points : np.ndarray
+        The points (x-, y- and z-coordinates)
+    quantize : bool
+        Information on whether the points of a binary cutout are quantized to int16 or stored as float32
+    compress : bool
+        Information on whether a binary cutout is zlib compressed or not
+
+    """
+    extension = os.path.splitext(path)[1]
+    if extension not in FORMATS:
+        raise ValueError(f"Unbekanntes Dateiformat: {path}")
+    if extension == CUTOUT_EXTENSION:
+        write_cutout_points(path, points, quantize, compress)
+        return
+
+    # the temporary file keeps the extension, open3D selects the writer by it
+    tmp_path = create_tmp_file(path, f".tmp{extension}")
+    try:
+        if extension == ".csv":
+            np.savetxt(tmp_path, points, delimiter=";")
+        elif extension == ".npy":
+            np.save(tmp_path, points)
+        else:
+            pcd = open3d.geometry.PointCloud()
+            pcd.points = open3d.utility.Vector3dVector(np.require(points, dtype=np.float64, requirements=["C", "W"]))
+            if not open3d.io.write_point_cloud(tmp_path, pcd):
+                raise OSError(f"Die Datei {tmp_path} konnte nicht geschrieben werden")
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def convert_cloud(source: str, target: str, threshold: float = None, scale: float = 1, quantize: bool = False,
+                  compress: bool = True):
+    """
+    Converts a point cloud file: the points at or below the height threshold are removed, the remaining points are
+    scaled and written atomically to the target file (which may be the source file itself)
+
+    Parameter
+    ---------
+    source : str
+        Memory path of the source point cloud
+    target : str
+        Memory path of the converted point cloud
+    threshold : float
+        The height threshold (None: no points are removed)
+    scale : float
+        The factor by which the points are scaled
+    quantize : bool
+        Information on whether the points of a binary cutout are quantized to int16 or stored as float32
+    compress : bool
+        Information on whether a binary cutout is zlib compressed or not
+
+    Returns
+    -------
+    n_points : int
+        The number of points of the converted point cloud
+    n_bytes : int
+        The size of the source file in bytes
+
+    """
+    n_bytes = os.path.getsize(source)
+    mapped = read_points(source)
+    points = mapped
+    if threshold is not None:
+        points = points[ThresholdFilter("Z", threshold, ">").get_mask(points)]
+    if scale != 1:
+        points = points * scale
+    # the memory map of the source is released before the file is replaced (in place conversion)
+    if points is mapped:
+        points = np.array(mapped)
+    del mapped
+    write_points(target, points, quantize, compress)
+    return len(points), n_bytes
+
+
+def try_convert_cloud(source: str, target: str, threshold: float = None, scale: float = 1, quantize: bool = False,
+                      compress: bool = True):
+    """
+    Returns the number of points and the source file size of the converted point cloud and None, or None, None and the
+    error message if the point cloud can not be converted
+
+    Parameter
+    ---------
+    source : str
+        Memory path of the source point cloud
+    target : str
+        Memory path of the converted point cloud
+    threshold : float
+        The height threshold (None: no points are removed)
+    scale : float
+        The factor by which the points are scaled
+    quantize : bool
+        Information on whether the points of a binary cutout are quantized to int16 or stored as float32
+    compress : bool
+        Information on whether a binary cutout is zlib compressed or not
+
+    """
+    try:
+        return *convert_cloud(source, target, threshold, scale, quantize, compress), None
+    except Exception as conversion_exception:
+        return None, None, f"{type(conversion_exception).__name__}: {conversion_exception}"
+
+
+class CloudConverter:
+    """
+    A class that converts all point clouds of a folder in parallel processes. Every file is written atomically and
+    recorded in a manifest in the target folder (one line per converted file, appended as soon as the file is done), so
+    that an interrupted conversion can be resumed: files whose entry matches the current source and target file and the
+    conversion parameters are skipped. Files that can not be converted are reported and left untouched.
+
+    A file that is converted in place is written to a temporary file first. Its manifest entry (with the size and
+    modification time of the temporary file, which the file keeps when it is renamed) is appended before it replaces
+    the source file. If the run is interrupted in between, the entry does not match the unchanged source file and the
+    file is converted again on restart; if the file was replaced, the entry matches and it is skipped. So the
+    transformation (e.g. scaling) is never applied twice to the same file.
+
+    ...
+
+    Attributes
+    ----------
+    source_path : str
+        The folder of the point clouds to be converted
+    target_path : str
+        The folder of the converted point clouds
+    target_format : str
+        The extension of the converted point clouds (None: format of the source file)
+    source_formats : tuple
+        The extensions of the point clouds that are converted
+    threshold : float
+        The height threshold below which points are removed (None: no points are removed)
+    scale : float
+        The factor by which the points are scaled
+    quantize : bool
+        Information on whether the points of binary cutouts are quantized to int16 or stored as float32
+    compress : bool
+        Information on whether binary cutouts are zlib compressed or not
+    manifest : pd.DataFrame
+        The last manifest entry of every converted file
+    failed_files : list
+        The filename and error message of every file that could not be converted in the last run
+    stats : dict
+        The throughput of the last run
+
+    Methods
+    -------
+    get_target(filename)
+        Returns the memory path of the converted point cloud
+    read_manifest()
+        Reads the manifest of the target folder
+    is_in_place(filename)
+        Returns whether the converted point cloud replaces the source point cloud
+    is_done(filename)
+        Returns whether the file is already converted with the current parameters
+    append_manifest(row)
+        Appends the entry of a converted file to the manifest
+    run(workers, filenames)
+        Converts all (or the given) point clouds of the source folder that are not converted yet
+
+    """
+
+    def __init__(self, source_path: str, target_path: str = None, target_format: str = None,
+                 threshold: float = None, scale: float = 1, source_formats: tuple = FORMATS, quantize: bool = False,
+                 compress: bool = True):
+        """
+        Parameter
+        ---------
+        source_path : str
+            The folder of the point clouds to be converted
+        target_path : str
+            The folder of the converted point clouds (default: source folder)
+        target_format : str
+            The extension of the converted point clouds (".csv", ".npy" or ".ply", default: format of the source file)
+        threshold : float
+            The height threshold below which points are removed (None: no points are removed)
+        scale : float
+            The factor by which the points are scaled
+        source_formats : tuple
+            The extensions of the point clouds that are converted
+        quantize : bool
+            Information on whether the points of binary cutouts are quantized to int16 or stored as float32
+        compress : bool
+            Information on whether binary cutouts are zlib compressed or not
+
+        """
+        if target_format is not None and target_format not in FORMATS:
+            raise ValueError(f"Unbekanntes Dateiformat: {target_format}")
+        self.source_path = source_path
+        self.target_path = target_path if target_path else source_path
+        self.target_format = target_format
+        self.source_formats = tuple(source_formats)
+        self.threshold = threshold
+        self.scale = scale
+        self.quantize = quantize
+        self.compress = compress
+        self.manifest = None
+        self.failed_files = []
+        self.stats = {}
+
+    def get_target(self, filename: str):
+        """
+        Returns the memory path of the converted point cloud
+
+        Parameter
+        ---------
+        filename : str
+            The filename of the source point cloud
+
+        """
+        name, extension = os.path.splitext(filename)
+        return os.path.join(self.target_path, name + (self.target_format if self.target_format else extension))
+
+    def read_manifest(self):
+        """
+        Reads the manifest of the target folder. Incomplete lines (interrupted run) are ignored and only the last entry
+        of every file is kept.
+
+        """
+        manifest_path = os.path.join(self.target_path, MANIFEST_FILE)
+        try:
+            manifest = pd.read_csv(manifest_path, sep=";", on_bad_lines="skip")
+        except (OSError, ValueError):
+            manifest = pd.DataFrame(columns=MANIFEST_COLUMNS)
+        manifest = manifest.dropna(subset=["filename", "target", "target_mtime"])
+        self.manifest = manifest.drop_duplicates(subset="filename", keep="last").set_index("filename")
+        return self.manifest
+
+    def is_in_place(self, filename: str):
+        """
+        Returns whether the converted point cloud replaces the source point cloud
+
+        Parameter
+        ---------
+        filename : str
+            The filename of the source point cloud
+
+        """
+        source = os.path.join(self.source_path, filename)
+        target = self.get_target(filename)
+        if os.path.exists(target):
+            return os.path.samefile(source, target)
+        return os.path.abspath(source) == os.path.abspath(target)
+
+    def is_done(self, filename: str):
+        """
+        Returns whether the file is already converted with the current parameters and neither the source nor the
+        converted file changed since then. If the file is converted in place, only the converted file is compared.
+
+        Parameter
+        ---------
+        filename : str
+            The filename of the source point cloud
+
+        """
+        if filename not in self.manifest.index:
+            return False
+        entry = self.manifest.loc[filename]
+        source = os.path.join(self.source_path, filename)
+        target = self.get_target(filename)
+        threshold = None if pd.isna(entry["threshold"]) else entry["threshold"]
+        if entry["target"] != os.path.basename(target) or threshold != self.threshold or entry["scale"] != self.scale:
+            return False
+        # the cutout options only matter for binary cutouts
+        if target.endswith(CUTOUT_EXTENSION) and (entry.get("quantize") != self.quantize or
+                                                  entry.get("compress") != self.compress):
+            return False
+
+        try:
+            target_stat = os.stat(target)
+            source_stat = os.stat(source)
+        except OSError:
+            return False
+        if target_stat.st_size != entry["target_size"] or target_stat.st_mtime_ns != entry["target_mtime"]:
+            return False
+        return os.path.samefile(source, target) or \
+            (source_stat.st_size == entry["source_size"] and source_stat.st_mtime_ns == entry["source_mtime"])
+
+    def append_manifest(self, row: dict):
+        """
+        Appends the entry of a converted file to the manifest and writes it to disk immediately
+
+        Parameter
+        ---------
+        row : dict
+            The manifest entry (see MANIFEST_COLUMNS)
+
+        """
+        manifest_path = os.path.join(self.target_path, MANIFEST_FILE)
+        write_header = not os.path.exists(manifest_path) or os.path.getsize(manifest_path) == 0
+        with open(manifest_path, "a") as manifest_file:
+            if write_header:
+                manifest_file.write(";".join(MANIFEST_COLUMNS) + "\n")
+            manifest_file.write(";".join("" if row[column] is None else str(row[column])
+                                         for column in MANIFEST_COLUMNS) + "\n")
+            manifest_file.flush()
+            os.fsync(manifest_file.fileno())
+
+    def run(self, workers: int = 1, filenames: list = None):
+        """
+        Converts all point clouds of the source folder that are not converted yet, in parallel processes if more than
+        one worker is used
+
+        Parameter
+        ---------
+        workers : int
+            The number of processes (None: number of CPU cores)
+        filenames : list
+            The filenames of the point clouds to be converted (default: all point clouds of the source folder)
+
+        Returns
+        -------
+        stats : dict
+            The number of converted, skipped and failed files, the number of points, the read megabytes, the runtime
+            and the throughput (files, points and megabytes per second)
+
+        """
+        start = time.perf_counter()
+        os.makedirs(self.target_path, exist_ok=True)
+        self.read_manifest()
+        if filenames is None:
+            filenames = sorted(filename for filename in os.listdir(self.source_path) if
+                               filename.endswith(self.source_formats) and not filename.startswith(".") and
+                               not is_tmp_file(filename) and os.path.isfile(os.path.join(self.source_path, filename)))
+        self.failed_files = []
+        jobs, sources, skipped = [], {}, 0
+        for filename in filenames:
+            if self.is_done(filename):
+                skipped += 1
+                continue
+            try:
+                sources[filename] = os.stat(os.path.join(self.source_path, filename))
+            except OSError as stat_exception:
+                self.failed_files.append((filename, str(stat_exception)))
+                continue
+            jobs.append(filename)
+        n_points, n_bytes = 0, 0
+
+        def finish(filename, result):
+            nonlocal n_points, n_bytes
+            points, size, message = result
+            target = self.get_target(filename)
+            if message:
+                self.failed_files.append((filename, message))
+                if filename in staged:
+                    os.remove(staged.pop(filename))
+                return
+            target_stat = os.stat(staged.get(filename, target))
+            self.append_manifest({"filename": filename, "target": os.path.basename(target),
+                                  "source_size": sources[filename].st_size,
+                                  "source_mtime": sources[filename].st_mtime_ns,
+                                  "target_size": target_stat.st_size, "target_mtime": target_stat.st_mtime_ns,
+                                  "threshold": self.threshold, "scale": self.scale, "points": points,
+                                  "quantize": self.quantize, "compress": self.compress})
+            # the source is replaced only after its manifest entry is written (see class description)
+            if filename in staged:
+                os.replace(staged[filename], target)
+                del staged[filename]
+            n_points += points
+            n_bytes += size
+
+        if workers is None:
+            workers = os.cpu_count()
+        workers = min(workers, len(jobs))
+        # files converted in place are written to a temporary file next to the target (with the same extension)
+        staged = {filename: create_tmp_file(self.get_target(filename), f".tmp{os.path.splitext(filename)[1]}")
+                  for filename in jobs if self.is_in_place(filename)}
+        args = [(os.path.join(self.source_path, filename), staged.get(filename, self.get_target(filename)),
+                 self.threshold, self.scale, self.quantize, self.compress) for filename in jobs]
+        try:
+            if workers > 1:
+                # spawned like the feature workers, the converter may be called from a thread of the GUI process
+                with ProcessPoolExecutor(max_workers=workers,
+                                         mp_context=multiprocessing.get_context("spawn")) as executor:
+                    futures = {executor.submit(try_convert_cloud, *arg): filename for filename, arg in zip(jobs, args)}
+                    for future in as_completed(futures):
+                        finish(futures[future], future.result())
+            else:
+                for filename, arg in zip(jobs, args):
+                    finish(filename, try_convert_cloud(*arg))
+        finally:
+            for tmp_path in staged.values():
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        runtime = time.perf_counter() - start
+        converted = len(filenames) - skipped - len(self.failed_files)
+        self.stats = {"converted": converted, "skipped": skipped,
+                      "failed": len(self.failed_files), "points": n_points, "megabytes": n_bytes / 1e6,
+                      "runtime": runtime, "files_per_second": converted / runtime if runtime else 0.0,
+                      "points_per_second": n_points / runtime if runtime else 0.0,
+                      "megabytes_per_second": n_bytes / 1e6 / runtime if runtime else 0.0}
+        return self.stats
+
+
+def migrate_cutouts(cutout_path: str, quantize: bool = False, compress: bool = True, workers: int = 1,
+                    remove_sources: bool = False):
+    """
+    Converts the cutouts of a dataset folder (e.g. Cutout_3x3) that are listed in its results files to the binary
+    cutout format and renames them in the results files (written atomically). Cutouts that can not be converted keep
+    their entry.
+
+    Parameter
+    ---------
+    cutout_path : str
+        The path of the dataset
+    quantize : bool
+        Information on whether the points are quantized to int16 or stored as float32
+    compress : bool
+        Information on whether the cutouts are zlib compressed or not
+    workers : int
+        The number of processes (None: number of CPU cores)
+    remove_sources : bool
+        Information on whether the converted source files are removed or not
+
+    Returns
+    -------
+    failed_files : list
+        The filename and error message of every cutout that could not be converted
+
+    """
+    converter = CloudConverter(cutout_path, target_format=CUTOUT_EXTENSION, quantize=quantize, compress=compress)
+    failed_files = []
+    for results_file in sorted(os.listdir(cutout_path)):
+        if not results_file.endswith(RESULTS_SUFFIX):
+            continue
+        results_path = os.path.join(cutout_path, results_file)
+        results_df = pd.read_csv(results_path, sep=";")
+        filenames = [filename for filename in results_df["filename"] if not filename.endswith(CUTOUT_EXTENSION)]
+        converter.run(workers, filenames)
+        failed_files += converter.failed_files
+
+        failed = {filename for filename, _ in converter.failed_files}
+        migrated = {filename: os.path.basename(converter.get_target(filename)) for filename in filenames
+                    if filename not in failed}
+        results_df["filename"] = results_df["filename"].replace(migrated)
+        tmp_path = create_tmp_file(results_path)
+        try:
+            results_df.to_csv(tmp_path, sep=";", index=False)
+            os.replace(tmp_path, results_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        if remove_sources:
+            for filename in migrated:
+                os.remove(os.path.join(cutout_path, filename))
+
+    return failed_files
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Converts all point clouds of a folder (csv, npy, ply, npz)")
+    parser.add_argument("source_path", help="Folder of the point clouds")
+    parser.add_argument("--target-path", help="Folder of the converted point clouds (default: in place)")
+    parser.add_argument("--format", choices=FORMATS, help="Format of the converted point clouds (default: unchanged)")
+    parser.add_argument("--source-formats", choices=FORMATS, nargs="+", default=FORMATS,
+                        help="Formats of the point clouds that are converted")
+    parser.add_argument("--threshold", type=float, help="Height threshold below which points are removed")
+    parser.add_argument("--scale", type=float, default=1, help="Factor by which the points are scaled")
+    parser.add_argument("--quantize", action="store_true", help="Quantize binary cutouts to int16")
+    parser.add_argument("--no-compress", action="store_true", help="Do not compress binary cutouts")
+    parser.add_argument("--migrate-cutouts", action="store_true",
+                        help="Convert the labeled cutouts of a dataset folder to npz and rename them in the results")
+    parser.add_argument("--remove-sources", action="store_true", help="Remove the migrated cutouts")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    if args.migrate_cutouts:
+        failures = migrate_cutouts(args.source_path, args.quantize, not args.no_compress, args.workers,
+                                   args.remove_sources)
+        for filename, message in failures:
+            print(f"Fehler bei {filename}: {message}")
+        print(f"Migration abgeschlossen, {len(failures)} fehlgeschlagen")
+    else:
+        converter = CloudConverter(args.source_path, args.target_path, args.format, args.threshold, args.scale,
+                                   args.source_formats, args.quantize, not args.no_compress)
+        stats = converter.run(args.workers)
+        for filename, message in converter.failed_files:
+            print(f"Fehler bei {filename}: {message}")
+        print(f"{stats['converted']} konvertiert, {stats['skipped']} übersprungen, {stats['failed']} fehlgeschlagen")
+        print(f"{stats['points']} Punkte, {stats['megabytes']:.1f} MB in {stats['runtime']:.2f} s "
+              f"({stats['files_per_second']:.1f} Dateien/s, {stats['points_per_second'] / 1e6:.2f} Mio. Punkte/s, "
+              f"{stats['megabytes_per_second']:.1f} MB/s)")
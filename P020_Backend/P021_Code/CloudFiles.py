@@ -0,0 +1,221 @@
+import os
+import re
+import tempfile
+
+import numpy as np
+
+
+CACHE_FOLDER = ".cloud_cache"
+CUTOUT_EXTENSION = ".npz"
+# number of steps of the int16 range used for quantized cutouts
+QUANTIZATION_STEPS = 65535
+
+
+def get_umask():
+    """
+    Returns the file mode creation mask of the process
+
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# permissions of new files (temporary files of mkstemp are only accessible by their owner)
+FILE_MODE = 0o666 & ~get_umask()
+
+
+def create_tmp_file(path: str, suffix: str = ".tmp"):
+    """
+    Creates a temporary file with a unique name next to the target file and returns its path. The file gets the
+    permissions of a new file, so that the target keeps them after it is replaced by the temporary file. Several
+    processes can write the same target at the same time without overwriting each other's temporary file.
+
+    Parameter
+    ---------
+    path : str
+        Memory path of the target file
+    suffix : str
+        The end of the name of the temporary file
+
+    """
+    directory, basename = os.path.split(os.path.abspath(path))
+    handle, tmp_path = tempfile.mkstemp(suffix=suffix, prefix=f"{basename}.", dir=directory)
+    os.close(handle)
+    os.chmod(tmp_path, FILE_MODE)
+    return tmp_path
+
+
+def is_tmp_file(filename: str):
+    """
+    Returns whether the file is a temporary file of create_tmp_file (suffix ".tmp", optionally followed by the
+    extension of the target file)
+
+    Parameter
+    ---------
+    filename : str
+        The filename
+
+    """
+    return filename.endswith(".tmp") or os.path.splitext(filename)[0].endswith(".tmp")
+
+
+def get_cache_path(csv_path: str):
+    """
+    Returns the path of the binary cache file of a csv point cloud. The cache file is stored in the cache folder next to
+    the csv file and its name contains the size and the modification time of the csv file, so that a changed csv file
+    never matches an old cache file.
+
+    Parameter
+    ---------
+    csv_path : str
+        Memory path of the csv point cloud
+
+    """
+    stat = os.stat(csv_path)
+    dirname, basename = os.path.split(os.path.abspath(csv_path))
+    return os.path.join(dirname, CACHE_FOLDER, f"{basename}.{stat.st_size}_{stat.st_mtime_ns}.npy")
+
+
+def write_cache(cache_path: str, data: np.ndarray):
+    """
+    Writes the binary cache file atomically (temporary file and rename) and removes outdated cache files of the same
+    csv file. If the cache folder is not writable, nothing is cached.
+
+    Parameter
+    ---------
+    cache_path : str
+        Memory path of the cache file
+    data : np.ndarray
+        The parsed points of the csv file
+
+    """
+    cache_dir, cache_name = os.path.split(cache_path)
+    csv_name = cache_name[:cache_name.rindex(".", 0, -len(".npy"))]
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = create_tmp_file(cache_path)
+        try:
+            with open(tmp_path, "wb") as tmp_file:
+                np.save(tmp_file, data)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        # only the cache files of this csv file (name, size and modification time), not those of e.g. scan.csv.bak.csv
+        outdated = re.compile(rf"{re.escape(csv_name)}\.\d+_\d+\.npy")
+        for filename in os.listdir(cache_dir):
+            if outdated.fullmatch(filename) and filename != cache_name:
+                os.remove(os.path.join(cache_dir, filename))
+    except OSError:
+        pass
+
+
+def read_csv_points(csv_path: str, use_cache: bool = True):
+    """
+    Reads the points of a csv point cloud (delimiter ";"). If a valid binary cache file exists, it is memory mapped
+    instead of parsing the text file. Otherwise, the csv file is parsed and the cache file is written for the next call.
+
+    Parameter
+    ---------
+    csv_path : str
+        Memory path of the csv point cloud
+    use_cache : bool
+        Information on whether the binary cache is used or not
+
+    """
+    if not use_cache:
+        return np.genfromtxt(csv_path, delimiter=";")
+
+    cache_path = get_cache_path(csv_path)
+    if os.path.exists(cache_path):
+        try:
+            return np.load(cache_path, mmap_mode="c")
+        except (OSError, ValueError):
+            pass
+
+    data = np.genfromtxt(csv_path, delimiter=";")
+    write_cache(cache_path, data)
+    return data
+
+
+def write_csv_points(csv_path: str, points: np.ndarray, use_cache: bool = True):
+    """
+    Writes the points to a csv point cloud (delimiter ";") and directly stores the binary cache file of the new csv
+    file, so that the next read does not have to parse it.
+
+    Parameter
+    ---------
+    csv_path : str
+        Memory path of the csv point cloud
+    points : np.ndarray
+        The points to be written
+    use_cache : bool
+        Information on whether the binary cache is written or not
+
+    """
+    np.savetxt(csv_path, points, delimiter=";")
+    if use_cache:
+        write_cache(get_cache_path(csv_path), points)
+
+
+def write_cutout_points(cutout_path: str, points: np.ndarray, quantize: bool = False, compress: bool = True,
+                        dtype: type = np.float32):
+    """
+    Writes the points to a binary cutout file (npz) atomically (temporary file and rename). The points are stored as
+    float32 (float64 for lossless cutouts) or quantized to int16 with a scale and an offset per axis (the error is at
+    most half a quantization step, i.e. 1/131070 of the extent of the cutout), optionally zlib compressed.
+
+    Parameter
+    ---------
+    cutout_path : str
+        Memory path of the cutout file
+    points : np.ndarray
+        The points to be written
+    quantize : bool
+        Information on whether the points are quantized to int16 or stored as float32
+    compress : bool
+        Information on whether the file is zlib compressed or not
+    dtype : type
+        The data type of the stored points if they are not quantized
+
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if quantize:
+        min_bound = points.min(axis=0) if len(points) else np.zeros(3)
+        extent = points.max(axis=0) - min_bound if len(points) else np.zeros(3)
+        scale = np.where(extent > 0, extent / QUANTIZATION_STEPS, 1.0)
+        offset = min_bound + (QUANTIZATION_STEPS + 1) // 2 * scale
+        quantized = np.round((points - offset) / scale).astype(np.int16)
+        arrays = {"quantized": quantized, "scale": scale, "offset": offset}
+    else:
+        arrays = {"points": points.astype(dtype)}
+
+    save = np.savez_compressed if compress else np.savez
+    tmp_path = create_tmp_file(cutout_path)
+    try:
+        with open(tmp_path, "wb") as tmp_file:
+            save(tmp_file, **arrays)
+        os.replace(tmp_path, cutout_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_cutout_points(cutout_path: str):
+    """
+    Reads the points of a binary cutout file (npz), float32 or dequantized from int16
+
+    Parameter
+    ---------
+    cutout_path : str
+        Memory path of the cutout file
+
+    """
+    with np.load(cutout_path) as data:
+        if "quantized" in data:
+            return data["quantized"] * data["scale"] + data["offset"]
+        return data["points"]
@@ -0,0 +1,171 @@
+import numpy as np
+from P020_Backend.P021_Code.LazyImport import LazyModule
+
+# imported on first use, open3d takes more than a second to import
+open3d = LazyModule("open3d")
+
+
+AXES = {"X": 0, "Y": 1, "Z": 2}
+COMPARISONS = {"=": np.equal,
+               ">=": np.greater_equal,
+               "<=": np.less_equal,
+               "<": np.less,
+               "!=": np.not_equal,
+               ">": np.greater}
+
+
+class PointFilter:
+    """
+    A class that defines the interface of a point filter. A filter returns the mask of the points that are kept.
+    Filters that only compare the coordinates of every single point are fused, i.e. their masks are combined with the
+    masks of the neighbouring filters before any point is selected.
+
+    ...
+
+    Attributes
+    ----------
+    fused : bool
+        Information on whether the mask of a point only depends on the point itself or not
+
+    Methods
+    -------
+    get_mask(points)
+        Returns the mask of the points that are kept
+
+    """
+    fused = True
+
+    def get_mask(self, points: np.ndarray):
+        """
+        Returns the mask of the points that are kept
+
+        Parameter
+        ---------
+        points : np.ndarray
+            The points (x-, y- and z-coordinates)
+
+        """
+        return np.ones(len(points), dtype=bool)
+
+
+class ThresholdFilter(PointFilter):
+    """
+    A filter that keeps the points that exceed/fall below the threshold value on one axis. Unknown axes are treated as
+    Z-axis and unknown directions as ">" (like the former threshold removal).
+
+    """
+
+    def __init__(self, axis: str = "Z", threshold: float = -6.8, direction: str = ">"):
+        """
+        Parameter
+        ---------
+        axis : str
+            The axis on which the points are compared
+        threshold : float
+            The threshold value that the points have to exceed/fall below
+        direction : str
+            The direction in which the points are maintained ("=", ">=", "<=", "<", "!=" or ">")
+
+        """
+        self.axis = AXES.get(axis, 2)
+        self.threshold = threshold
+        self.comparison = COMPARISONS.get(direction, np.greater)
+
+    def get_mask(self, points: np.ndarray):
+        return self.comparison(points[:, self.axis], self.threshold)
+
+
+class BoxFilter(PointFilter):
+    """
+    A filter that keeps the points inside an axis-aligned box (bounds included). Without a z-range, the box is unbounded
+    in z-direction.
+
+    """
+
+    def __init__(self, x1: float, y1: float, x2: float, y2: float, z_min: float = None, z_max: float = None):
+        self.bounds = (x1, y1, x2, y2)
+        self.z_min = z_min
+        self.z_max = z_max
+
+    def get_mask(self, points: np.ndarray):
+        x1, y1, x2, y2 = self.bounds
+        x = points[:, 0]
+        y = points[:, 1]
+        mask = x >= x1
+        mask &= x <= x2
+        mask &= y >= y1
+        mask &= y <= y2
+        if self.z_min is not None:
+            mask &= points[:, 2] >= self.z_min
+        if self.z_max is not None:
+            mask &= points[:, 2] <= self.z_max
+
+        return mask
+
+
+class ZBandFilter(PointFilter):
+    """
+    A filter that keeps the points whose height lies inside the z-band (bounds included)
+
+    """
+
+    def __init__(self, z_min: float = None, z_max: float = None):
+        self.z_min = z_min
+        self.z_max = z_max
+
+    def get_mask(self, points: np.ndarray):
+        z = points[:, 2]
+        mask = np.ones(len(points), dtype=bool)
+        if self.z_min is not None:
+            mask &= z >= self.z_min
+        if self.z_max is not None:
+            mask &= z <= self.z_max
+
+        return mask
+
+
+class OutlierFilter(PointFilter):
+    """
+    A filter that removes statistical outliers (points whose mean distance to their neighbours is larger than the
+    average by more than std_ratio standard deviations). As the result depends on the neighbours, it is computed on
+    the points that are kept by the filters before it.
+
+    """
+    fused = False
+
+    def __init__(self, nb_neighbors: int = 20, std_ratio: float = 2.0):
+        self.nb_neighbors = nb_neighbors
+        self.std_ratio = std_ratio
+
+    def get_mask(self, points: np.ndarray):
+        pcd = open3d.geometry.PointCloud()
+        pcd.points = open3d.utility.Vector3dVector(np.require(points, dtype=np.float64, requirements=["C", "W"]))
+        _, ind = pcd.remove_statistical_outlier(nb_neighbors=self.nb_neighbors, std_ratio=self.std_ratio)
+        mask = np.zeros(len(points), dtype=bool)
+        mask[ind] = True
+
+        return mask
+
+
+def get_filter_mask(points: np.ndarray, filters: list):
+    """
+    Returns the mask of the points that are kept by all filters. The masks of consecutive fused filters are combined
+    in place; filters that are not fused are only evaluated on the points kept so far.
+
+    Parameter
+    ---------
+    points : np.ndarray
+        The points (x-, y- and z-coordinates)
+    filters : list
+        The filters in the order in which they are applied
+
+    """
+    mask = np.ones(len(points), dtype=bool)
+    for point_filter in filters:
+        if point_filter.fused:
+            mask &= point_filter.get_mask(points)
+        else:
+            kept = np.flatnonzero(mask)
+            mask[kept] = point_filter.get_mask(points[kept])
+
+    return mask
@@ -0,0 +1,311 @@
+import queue
+import threading
+
+import numpy as np
+from P020_Backend.P021_Code.CloudCache import CloudCache
+from P020_Backend.P021_Code.CloudProcessing import Cloud
+
+
+PLOT_TYPES = ("pcd", "lod", "voxel", "heatmap", "raster")
+
+
+def get_plot_data(cloud: Cloud, plot_type: str, sample_rate: int = 60, voxel_size: int = 10, cancelled=None):
+    """
+    Returns the data of a plot of the point cloud: the sampled points (pcd), the points of the level of detail plot
+    (lod), the voxels (voxel), the heatmap arrays (heatmap) or the top view raster (raster)
+
+    Parameter
+    ---------
+    cloud : Cloud
+        The point cloud
+    plot_type : str
+        The type of the plot ("pcd", "lod", "voxel", "heatmap" or "raster")
+    sample_rate : int
+        The sampling rate k of the point cloud plot (every k-th point of the point cloud is accepted) or the point
+        budget of the level of detail plot
+    voxel_size : int
+        The size of the voxels of the voxel and heatmap plot
+    cancelled : Any
+        Returns whether the job was cancelled (unused, the data is computed in one step)
+
+    """
+    if plot_type == "pcd":
+        return cloud.get_sampled_points(sample_rate)
+    elif plot_type == "lod":
+        return cloud.get_lod_points(sample_rate)
+    elif plot_type == "voxel":
+        return cloud.get_voxels(voxel_size)
+    elif plot_type == "heatmap":
+        return cloud.get_heatmap_array(voxel_size)
+    elif plot_type == "raster":
+        return cloud.get_raster_image()
+    raise ValueError(f"Unbekannter Plot: {plot_type}")
+
+
+def load_cloud(path: str, plot_type: str, sample_rate: int = 60, voxel_size: int = 10, cache: CloudCache = None,
+               dtype: type = np.float64, cancelled=None):
+    """
+    Reads and filters a point cloud, builds its spatial index (used for picking, so that it is not built on the GUI
+    thread) and computes the data of its plot. Returns the cloud and the plot data or None if the job was cancelled
+    after reading. Cached clouds, indices and plot data are taken from the cache, loaded clouds are added to it.
+
+    Parameter
+    ---------
+    path : str
+        Memory path of the point cloud (see Cloud.set)
+    plot_type : str
+        The type of the plot ("pcd", "lod", "voxel", "heatmap" or "raster")
+    sample_rate : int
+        The sampling rate of the point cloud plot or the point budget of the level of detail plot
+    voxel_size : int
+        The size of the voxels of the voxel and heatmap plot
+    cache : CloudCache
+        The cache of the loaded clouds (None: no cache)
+    dtype : type
+        The data type of the points
+    cancelled : Any
+        Returns whether the job was cancelled (checked between reading and computing the plot data)
+
+    """
+    settings = (plot_type, sample_rate, voxel_size)
+    cached = cache.get(path, dtype) if cache is not None else None
+    if cached is not None:
+        cloud, plot_data = cached
+        if settings in plot_data:
+            cloud.get_index()
+            return cloud, plot_data[settings]
+    else:
+        cloud = Cloud(dtype=dtype)
+        cloud.set(path)
+        plot_data = None
+    if cancelled is not None and cancelled():
+        return None
+
+    cloud.get_index()
+    data = get_plot_data(cloud, *settings)
+    if cache is not None and plot_data is None:
+        cache.put(cloud, {settings: data})
+    elif cache is not None:
+        cache.add_plot_data(path, dtype, settings, data)
+    return cloud, data
+
+
+def prefetch_clouds(paths: list, plot_settings: list, cache: CloudCache, dtype: type = np.float64, cancelled=None):
+    """
+    Loads the point clouds that are not cached yet and adds them with their spatial index and the data of their plots
+    to the cache (e.g. the next files of a dataset while the current one is labeled). Clouds that cannot be read are
+    skipped. Returns the number of loaded clouds.
+
+    Parameter
+    ---------
+    paths : list
+        The memory paths of the point clouds
+    plot_settings : list
+        The plot type, sample rate and voxel size of every plot whose data is computed
+    cache : CloudCache
+        The cache of the loaded clouds
+    dtype : type
+        The data type of the points
+    cancelled : Any
+        Returns whether the job was cancelled (checked before every cloud and plot)
+
+    """
+    n_loaded = 0
+    for path in paths:
+        if (cancelled is not None and cancelled()) or cache.contains(path, dtype):
+            continue
+        cloud = Cloud(dtype=dtype)
+        try:
+            cloud.set(path)
+        except (AttributeError, OSError, ValueError):
+            continue
+        cloud.get_index()
+        plot_data = {}
+        for settings in plot_settings:
+            if cancelled is not None and cancelled():
+                break
+            plot_data[tuple(settings)] = get_plot_data(cloud, *settings)
+        cache.put(cloud, plot_data)
+        n_loaded += 1
+    return n_loaded
+
+
+def crop_cloud(cloud: Cloud, bounds: tuple, plot_type: str, sample_rate: int = 60, voxel_size: int = 10,
+               cancelled=None):
+    """
+    Crops the point cloud to the box, builds the spatial index of the cropped cloud and returns the data of its plot
+
+    Parameter
+    ---------
+    cloud : Cloud
+        The point cloud
+    bounds : tuple
+        The box (x1, y1, x2, y2)
+    plot_type : str
+        The type of the plot ("pcd", "lod", "voxel", "heatmap" or "raster")
+    sample_rate : int
+        The sampling rate of the point cloud plot or the point budget of the level of detail plot
+    voxel_size : int
+        The size of the voxels of the voxel and heatmap plot
+    cancelled : Any
+        Returns whether the job was cancelled (unused, a started crop is always finished)
+
+    """
+    cloud.crop(*bounds)
+    cloud.get_index()
+    return get_plot_data(cloud, plot_type, sample_rate, voxel_size)
+
+
+def refine_cloud(cloud: Cloud, bounds: tuple, point_budget: int, cancelled=None):
+    """
+    Returns the points of the level of detail plot sampled from a region of the point cloud (zoomed view)
+
+    Parameter
+    ---------
+    cloud : Cloud
+        The point cloud
+    bounds : tuple
+        The region (x1, y1, x2, y2)
+    point_budget : int
+        The maximum number of points sampled from the region
+    cancelled : Any
+        Returns whether the job was cancelled (unused, the points are sampled in one step)
+
+    """
+    return cloud.get_lod_points(point_budget, bounds)
+
+
+class CloudLoader:
+    """
+    A class that runs the jobs of a frontend (reading and filtering point clouds, computing voxels and heatmaps) one
+    after another in a worker thread. The results are collected in a queue and passed to their callbacks by calling
+    process_results() from the thread that owns the frontend (e.g. periodically via tkinter after()). Every submitted
+    job cancels the jobs submitted before it: they are skipped if they have not started yet, and their results are
+    discarded otherwise.
+
+    ...
+
+    Attributes
+    ----------
+    jobs : queue.Queue
+        The submitted jobs (generation, function, arguments and callback)
+    results : queue.Queue
+        The finished jobs (generation, callback, result and exception)
+    generation : int
+        The number of the latest submitted job, all jobs with a lower number are cancelled
+    delivered : int
+        The number of the latest job whose result was passed to its callback (or that was cancelled)
+    lock : threading.Lock
+        The lock of the generation counter
+    thread : threading.Thread
+        The worker thread
+
+    Methods
+    -------
+    submit(function, args, callback)
+        Adds a job and cancels all jobs submitted before it
+    cancel()
+        Cancels all submitted jobs
+    is_cancelled(generation)
+        Returns whether the job was cancelled
+    is_busy()
+        Returns whether the result of the latest job is pending
+    process_results()
+        Passes the results of the finished jobs to their callbacks, results of cancelled jobs are discarded
+    run()
+        Runs the jobs (worker thread)
+
+    """
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.generation = 0
+        self.delivered = 0
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, function, args: tuple, callback):
+        """
+        Adds a job and cancels all jobs submitted before it. Returns the number of the job.
+
+        Parameter
+        ---------
+        function : Any
+            The function of the job, it is called with the arguments and the keyword cancelled (a function returning
+            whether the job was cancelled in the meantime)
+        args : tuple
+            The arguments of the function
+        callback : Any
+            The function that is called with the result and the exception (None if the job succeeded) of the job
+            (None: the result is discarded, e.g. for jobs that fill a cache)
+
+        """
+        with self.lock:
+            self.generation += 1
+            generation = self.generation
+        self.jobs.put((generation, function, args, callback))
+        return generation
+
+    def cancel(self):
+        """
+        Cancels all submitted jobs
+
+        """
+        with self.lock:
+            self.generation += 1
+            self.delivered = self.generation
+
+    def is_cancelled(self, generation: int):
+        """
+        Returns whether the job was cancelled (by a job submitted after it or by cancel)
+
+        Parameter
+        ---------
+        generation : int
+            The number of the job
+
+        """
+        return generation != self.generation
+
+    def is_busy(self):
+        """
+        Returns whether the result of the latest job is pending
+
+        """
+        return self.delivered != self.generation
+
+    def process_results(self):
+        """
+        Passes the results of the finished jobs to their callbacks, results of cancelled jobs are discarded. Has to be
+        called from the thread that owns the frontend.
+
+        """
+        while True:
+            try:
+                generation, callback, result, exception = self.results.get_nowait()
+            except queue.Empty:
+                return
+            if self.is_cancelled(generation):
+                continue
+            self.delivered = generation
+            callback(result, exception)
+
+    def run(self):
+        """
+        Runs the jobs (worker thread)
+
+        """
+        while True:
+            generation, function, args, callback = self.jobs.get()
+            if self.is_cancelled(generation):
+                continue
+            try:
+                result = function(*args, cancelled=lambda: self.is_cancelled(generation))
+                exception = None
+            except Exception as job_exception:
+                result = None
+                exception = job_exception
+            if callback is not None:
+                self.results.put((generation, callback, result, exception))
@@ -1,10 +1,100 @@
 import matplotlib.pyplot as plt
-import open3d
 import numpy as np
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 import pandas as pd
 import matplotlib
+from P020_Backend.P021_Code.CloudProcessing import POINT_BUDGET, get_box_mask
 from P020_Backend.P021_Code.DraggableRect import DraggableRectangle, CustomRectangle
+from P020_Backend.P021_Code.LazyImport import LazyModule
+
+# imported on first use, open3d takes more than a second to import
+open3d = LazyModule("open3d")
+
+# marker size of the points of the level of detail plot (size of the former default sample rate 60)
+LOD_MARKER_SIZE = 12
+
+
+def get_figure(fig=None, **kwargs):
+    """
+    Returns the figure of a plot: a new figure or the passed figure of a persistent canvas, whose previous plot is
+    removed (its canvas and toolbar are reused)
+
+    Parameter
+    ---------
+    fig : Any
+        The figure to be reused (None: a new figure is created)
+
+    """
+    if fig is None:
+        return plt.figure(**kwargs)
+    fig.clear()
+    return fig
+
+
+def place_reference(ax, reference: tuple = None):
+    """
+    Places the reference mark (upper left corner) of a 3D plot with respect to its current limits. Returns the text
+    and the marker of the reference.
+
+    Parameter
+    ---------
+    ax : Any
+        The axis object of the plot
+    reference : tuple
+        The text and the marker of the reference that are moved (None: they are created)
+
+    """
+    y_min, y_max = ax.get_ylim()
+    x_min, x_max = ax.get_xlim()
+    width = x_max - x_min
+    height = y_max - y_min
+
+    if width < height:
+        text_position, marker_position = (x_min - 100, y_max - 20), (x_min, y_max)
+    else:
+        text_position, marker_position = (x_min - 200, y_min - 20), (x_min, y_min)
+
+    if reference is None:
+        text = ax.text3D(*text_position, 0, "Ref. UL", color="red", zdir="x")
+        marker, = ax.plot([marker_position[0]], [marker_position[1]], "2", color="red", markersize=20)
+        return text, marker
+    text, marker = reference
+    text.set_position_3d((*text_position, 0), zdir="x")
+    marker.set_data_3d([marker_position[0]], [marker_position[1]], [0])
+    return text, marker
+
+
+def update_scatter(ax, scatter, points: np.ndarray, size: float, reference: tuple):
+    """
+    Replaces the points of a 3D scatter plot (positions, colors, limits and reference) without creating a new plot.
+    Returns the moved reference.
+
+    Parameter
+    ---------
+    ax : Any
+        The axis object of the plot
+    scatter : Any
+        The scatter plot
+    points : np.ndarray
+        The new points
+    size : float
+        The marker size of the points
+    reference : tuple
+        The text and the marker of the reference
+
+    """
+    scatter.set_offsets(points[:, :2])
+    scatter.set_3d_properties(points[:, 2], "z")
+    scatter.set_array(points[:, 2])
+    scatter.autoscale()
+    scatter.set_sizes([size])
+    # same limits as a new plot: the reference is placed at the limits of the points, then it is part of the limits
+    ax.auto_scale_xyz(points[:, 0], points[:, 1], points[:, 2], had_data=False)
+    reference = place_reference(ax, reference)
+    marker_x, marker_y, marker_z = reference[1].get_data_3d()
+    ax.auto_scale_xyz(np.append(points[:, 0], marker_x), np.append(points[:, 1], marker_y),
+                      np.append(points[:, 2], marker_z), had_data=False)
+    return reference
 
 
 class VoxelPlot:
@@ -23,6 +113,10 @@ class VoxelPlot:
         The matplotlib figure
     ax : Any
         The axis object of the figure (3D Scatter Plot)
+    scatter : Any
+        The scatter plot of the voxels
+    reference : tuple
+        The text and the marker of the reference
     c_pick : CustomPick
         An object of the class that defines the pick event
 
@@ -30,14 +124,18 @@ class VoxelPlot:
     -------
     get_plot()
         Returns the figure and the axis object
+    set_voxels(voxels, voxel_size)
+        Replaces the displayed voxels
     get_plot_data()
         Returns the plot data
     pick_event_handler()
         Processes the data of the pick event
+    disconnect()
+        Disconnects the events of the plot from the figure
 
     """
 
-    def __init__(self, master, voxels, voxel_size: int = 10):
+    def __init__(self, master, voxels, voxel_size: int = 10, fig=None):
         """
         Parameter
         ---------
@@ -47,29 +145,22 @@ class VoxelPlot:
             The voxels that will be displayed in the plot
         voxel_size : int
             The size of the voxels
+        fig : Any
+            The figure of a persistent canvas on which the plot is drawn (None: a new figure is created)
 
         """
         self.master = master
 
         self.plot_data = voxels
 
-        self.fig = plt.figure()
+        self.fig = get_figure(fig)
         self.ax = self.fig.add_subplot(111, projection="3d")
-        self.ax.scatter(self.plot_data[:, 0], self.plot_data[:, 1], self.plot_data[:, 2], s=voxel_size / 5,
-                        c=self.plot_data[:, 2], cmap="jet",
-                        picker=True, pickradius=1)
-
-        y_min, y_max = self.ax.get_ylim()
-        x_min, x_max = self.ax.get_xlim()
-        width = x_max - x_min
-        height = y_max - y_min
-
-        if width < height:
-            self.ax.text3D(x_min - 100, y_max - 20, 0, "Ref. UL", color="red", zdir="x")
-            self.ax.plot([x_min], [y_max], "2", color="red", markersize=20)
-        else:
-            self.ax.text3D(x_min - 200, y_min - 20, 0, "Ref. UL", color="red", zdir="x")
-            self.ax.plot([x_min], [y_min], "2", color="red", markersize=20)
+        self.scatter = self.ax.scatter(self.plot_data[:, 0], self.plot_data[:, 1], self.plot_data[:, 2],
+                                       s=voxel_size / 5,
+                                       c=self.plot_data[:, 2], cmap="jet",
+                                       picker=True, pickradius=1)
+
+        self.reference = place_reference(self.ax)
 
         self.c_pick = CustomPick(self, self.fig)
 
@@ -87,6 +178,23 @@ class VoxelPlot:
         """
         return self.fig, self.ax
 
+    def set_voxels(self, voxels, voxel_size: int = 10):
+        """
+        Replaces the displayed voxels (the scatter plot is updated, the view is reset)
+
+        Parameter
+        ---------
+        voxels : Any
+            The voxels that will be displayed in the plot
+        voxel_size : int
+            The size of the voxels
+
+        """
+        self.plot_data = voxels
+        self.reference = update_scatter(self.ax, self.scatter, voxels, voxel_size / 5, self.reference)
+        self.ax.set_aspect("equal", adjustable="box")
+        self.ax.view_init(elev=90, azim=-90, roll=0)
+
     def get_plot_data(self):
         """
         Returns the plot data as open3D Vector
@@ -103,12 +211,19 @@ class VoxelPlot:
 
         """
         ind = event_data
-        data_as_array = np.asarray(self.get_plot_data().points)
+        data_as_array = self.plot_data
         argmax = np.argmax(data_as_array[ind, 2])
         pick_x = int(data_as_array[ind[argmax], 0])
         pick_y = int(data_as_array[ind[argmax], 1])
         self.master.event_handler("pick_event", (pick_x, pick_y))
 
+    def disconnect(self):
+        """
+        Disconnects the events of the plot from the figure (before another plot is drawn on it)
+
+        """
+        self.c_pick.disconnect()
+
 
 class SampledCloudPlot:
     """
@@ -122,10 +237,16 @@ class SampledCloudPlot:
         The frame on which the plot is displayed
     plot_data : Any
         The data that will be displayed in the plot
+    plot_points : np.ndarray
+        The points of the plot data (used for picking)
     fig : Any
         The matplotlib figure
     ax : Any
         The axis object of the figure (3D Scatter Plot)
+    scatter : Any
+        The scatter plot of the sampled points
+    reference : tuple
+        The text and the marker of the reference
     c_pick : CustomPick
         An object of the class that defines the pick event
 
@@ -133,45 +254,44 @@ class SampledCloudPlot:
     -------
     get_plot()
         Returns the figure and the axis object
+    set_plot_data(pcd, sample_rate)
+        Sets the plot data and the plotted points
+    set_points(pcd, sample_rate)
+        Replaces the displayed points
     get_plot_data()
         Returns the plot data
     pick_event_handler()
         Processes the data of the pick event
+    disconnect()
+        Disconnects the events of the plot from the figure
 
     """
 
-    def __init__(self, master, pcd: open3d.geometry.PointCloud, sample_rate: int = 60):
+    def __init__(self, master, pcd: "open3d.geometry.PointCloud | np.ndarray", sample_rate: int = 60, fig=None):
         """
         Parameter
         ---------
         master : Any
             The frame on which the plot is displayed
-        pcd : open3d.geometry.PointCloud
-            The point cloud that will be displayed in the plot
+        pcd : open3d.geometry.PointCloud | np.ndarray
+            The point cloud that will be displayed in the plot or its points that were already sampled (e.g. in a
+            loading thread)
         sample_rate : int
             The sampling rate k. Every k-th point of the point cloud is accepted.
+        fig : Any
+            The figure of a persistent canvas on which the plot is drawn (None: a new figure is created)
 
         """
         self.master = master
 
-        self.plot_data = pcd.uniform_down_sample(sample_rate)
-        pcd_as_ar = np.asarray(self.plot_data.points)
-        self.fig = plt.figure()
+        self.set_plot_data(pcd, sample_rate)
+        pcd_as_ar = self.plot_points
+        self.fig = get_figure(fig)
         self.ax = self.fig.add_subplot(111, projection="3d")
-        self.ax.scatter(pcd_as_ar[:, 0], pcd_as_ar[:, 1], pcd_as_ar[:, 2], s=sample_rate / 5, c=pcd_as_ar[:, 2], cmap="jet",
-                        picker=True, pickradius=1)
-
-        y_min, y_max = self.ax.get_ylim()
-        x_min, x_max = self.ax.get_xlim()
-        width = x_max - x_min
-        height = y_max - y_min
+        self.scatter = self.ax.scatter(pcd_as_ar[:, 0], pcd_as_ar[:, 1], pcd_as_ar[:, 2], s=sample_rate / 5,
+                                       c=pcd_as_ar[:, 2], cmap="jet", picker=True, pickradius=1)
 
-        if width < height:
-            self.ax.text3D(x_min - 100, y_max - 20, 0, "Ref. UL", color="red", zdir="x")
-            self.ax.plot([x_min], [y_max], "2", color="red", markersize=20)
-        else:
-            self.ax.text3D(x_min - 200, y_min - 20, 0, "Ref. UL", color="red", zdir="x")
-            self.ax.plot([x_min], [y_min], "2", color="red", markersize=20)
+        self.reference = place_reference(self.ax)
 
         self.c_pick = CustomPick(self, self.fig)
 
@@ -189,11 +309,45 @@ class SampledCloudPlot:
         """
         return self.fig, self.ax
 
+    def set_plot_data(self, pcd: "open3d.geometry.PointCloud | np.ndarray", sample_rate: int = 60):
+        """
+        Sets the plot data and the plotted points (sampled from the point cloud if it is not sampled yet)
+
+        """
+        if isinstance(pcd, np.ndarray):
+            self.plot_data = pcd
+            self.plot_points = pcd
+        else:
+            self.plot_data = pcd.uniform_down_sample(sample_rate)
+            self.plot_points = np.asarray(self.plot_data.points)
+
+    def set_points(self, pcd: "open3d.geometry.PointCloud | np.ndarray", sample_rate: int = 60):
+        """
+        Replaces the displayed points (the scatter plot is updated, the view is reset)
+
+        Parameter
+        ---------
+        pcd : open3d.geometry.PointCloud | np.ndarray
+            The point cloud that will be displayed in the plot or its points that were already sampled
+        sample_rate : int
+            The sampling rate k. Every k-th point of the point cloud is accepted.
+
+        """
+        self.set_plot_data(pcd, sample_rate)
+        self.reference = update_scatter(self.ax, self.scatter, self.plot_points, sample_rate / 5, self.reference)
+        self.ax.set_aspect("equal", adjustable="box")
+        self.ax.view_init(elev=90, azim=-90, roll=0)
+
     def get_plot_data(self):
         """
         Returns the plot data (Pointcloud data)
 
         """
+        if isinstance(self.plot_data, np.ndarray):
+            pcd = open3d.geometry.PointCloud()
+            pcd.points = open3d.utility.Vector3dVector(np.require(self.plot_data, dtype=np.float64,
+                                                                  requirements=["C", "W"]))
+            return pcd
         return self.plot_data
 
     def pick_event_handler(self, event_data):
@@ -203,12 +357,246 @@ class SampledCloudPlot:
 
         """
         ind = event_data
-        data_as_array = np.asarray(self.plot_data.points)
+        data_as_array = self.plot_points
         argmax = np.argmax(data_as_array[ind, 2])
         pick_x = int(data_as_array[ind[argmax], 0])
         pick_y = int(data_as_array[ind[argmax], 1])
         self.master.event_handler("pick_event", (pick_x, pick_y))
 
+    def disconnect(self):
+        """
+        Disconnects the events of the plot from the figure (before another plot is drawn on it)
+
+        """
+        self.c_pick.disconnect()
+
+
+class LodCloudPlot:
+    """
+    A class that defines a level of detail plot of a point cloud (figure and axis). The plot draws at most point_budget
+    points (the highest point of every cell of a grid over the cloud, see CloudProcessing.get_lod_points), so that its
+    render time does not depend on the size of the cloud. When the user has zoomed into a region (toolbar or mouse),
+    the master is asked for the points of the visible region with a zoom event, they are shown with set_detail.
+
+    ...
+
+    Attributes
+    ----------
+    master : tk.Frame
+        The frame on which the plot is displayed
+    plot_data : np.ndarray
+        The points sampled from the whole point cloud
+    plot_points : np.ndarray
+        The displayed points (the sampled points outside the zoomed region and the points sampled from it)
+    point_budget : int
+        The maximum number of points sampled from the cloud or from a zoomed region
+    fig : Any
+        The matplotlib figure
+    ax : Any
+        The axis object of the figure (3D Scatter Plot)
+    scatter : Any
+        The scatter plot of the displayed points
+    reference : tuple
+        The text and the marker of the reference
+    c_pick : CustomPick
+        An object of the class that defines the pick event
+    view_bounds : tuple
+        The x-y-bounds of the view for which the displayed points were sampled (None until the plot is drawn)
+    pressed : bool
+        Information on whether a mouse button is pressed (the view is changed by the mouse)
+    cids : list
+        The connection ids of the events that check the view
+
+    Methods
+    -------
+    get_plot()
+        Returns the figure and the axis object
+    set_points(points, point_budget)
+        Replaces the displayed points
+    set_detail(points, bounds)
+        Displays the points sampled from a zoomed region
+    get_view_bounds()
+        Returns the x-y-bounds of the current view
+    check_view(event)
+        Requests the points of the visible region if the view was zoomed
+    on_press(event)
+        Notes that a mouse button is pressed
+    get_plot_data()
+        Returns the plot data
+    pick_event_handler()
+        Processes the data of the pick event
+    disconnect()
+        Disconnects the events of the plot from the figure
+
+    """
+
+    def __init__(self, master, points: np.ndarray, point_budget: int = POINT_BUDGET, fig=None):
+        """
+        Parameter
+        ---------
+        master : Any
+            The frame on which the plot is displayed
+        points : np.ndarray
+            The points sampled from the point cloud (e.g. in a loading thread)
+        point_budget : int
+            The maximum number of points sampled from the cloud or from a zoomed region
+        fig : Any
+            The figure of a persistent canvas on which the plot is drawn (None: a new figure is created)
+
+        """
+        self.master = master
+
+        self.plot_data = points
+        self.plot_points = points
+        self.point_budget = point_budget
+        self.fig = get_figure(fig)
+        self.ax = self.fig.add_subplot(111, projection="3d")
+        self.scatter = self.ax.scatter(points[:, 0], points[:, 1], points[:, 2], s=LOD_MARKER_SIZE,
+                                       c=points[:, 2], cmap="jet", picker=True, pickradius=1)
+
+        self.reference = place_reference(self.ax)
+
+        self.c_pick = CustomPick(self, self.fig)
+        self.view_bounds = None
+        self.pressed = False
+        self.cids = [self.fig.canvas.mpl_connect("button_press_event", self.on_press),
+                     self.fig.canvas.mpl_connect("button_release_event", self.check_view),
+                     self.fig.canvas.mpl_connect("draw_event", self.check_view)]
+
+        self.ax.set_title("Pointcloud", fontsize=15)
+        self.ax.set_xlabel("x [cm]", fontsize=10)
+        self.ax.set_ylabel("y [cm]", fontsize=10)
+        self.ax.set_zlabel("z [cm]", fontsize=10)
+        self.ax.set_aspect("equal", adjustable="box")
+        self.ax.view_init(elev=90, azim=-90, roll=0)
+
+    def get_plot(self):
+        """
+        Returns the figure and the axis object
+
+        """
+        return self.fig, self.ax
+
+    def set_points(self, points: np.ndarray, point_budget: int = POINT_BUDGET):
+        """
+        Replaces the displayed points (the scatter plot is updated, the view is reset)
+
+        Parameter
+        ---------
+        points : np.ndarray
+            The points sampled from the point cloud
+        point_budget : int
+            The maximum number of points sampled from the cloud or from a zoomed region
+
+        """
+        self.plot_data = points
+        self.plot_points = points
+        self.point_budget = point_budget
+        self.view_bounds = None
+        self.reference = update_scatter(self.ax, self.scatter, points, LOD_MARKER_SIZE, self.reference)
+        self.ax.set_aspect("equal", adjustable="box")
+        self.ax.view_init(elev=90, azim=-90, roll=0)
+
+    def set_detail(self, points: np.ndarray, bounds: tuple):
+        """
+        Displays the points sampled from a zoomed region together with the points of the whole cloud outside the
+        region. The view and the colors of the z-values are kept.
+
+        Parameter
+        ---------
+        points : np.ndarray
+            The points sampled from the region (None: the region contains the whole cloud)
+        bounds : tuple
+            The x-y-bounds (x1, y1, x2, y2) of the region
+
+        """
+        if points is None:
+            self.plot_points = self.plot_data
+        else:
+            outside = ~get_box_mask(self.plot_data, *bounds)
+            self.plot_points = np.concatenate((self.plot_data[outside], points))
+        self.scatter.set_offsets(self.plot_points[:, :2])
+        self.scatter.set_3d_properties(self.plot_points[:, 2], "z")
+        self.scatter.set_array(self.plot_points[:, 2])
+        self.view_bounds = bounds
+
+    def get_view_bounds(self):
+        """
+        Returns the x-y-bounds (x1, y1, x2, y2) of the current view
+
+        """
+        x_min, x_max = sorted(self.ax.get_xlim())
+        y_min, y_max = sorted(self.ax.get_ylim())
+        return float(x_min), float(y_min), float(x_max), float(y_max)
+
+    def check_view(self, event):
+        """
+        Requests the points of the visible region from the master (zoom event) if the view was zoomed or moved since
+        the displayed points were sampled. Views that contain the whole cloud show its sampled points directly. The
+        view is not checked while a mouse button is pressed.
+
+        """
+        if event.name == "button_release_event":
+            self.pressed = False
+        if self.pressed:
+            return
+        bounds = self.get_view_bounds()
+        if self.view_bounds is None:
+            self.view_bounds = bounds
+            return
+        if np.allclose(bounds, self.view_bounds):
+            return
+
+        x1, y1, x2, y2 = bounds
+        points = self.plot_data
+        if (x1 <= points[:, 0].min() and points[:, 0].max() <= x2 and y1 <= points[:, 1].min()
+                and points[:, 1].max() <= y2):
+            if self.plot_points is not self.plot_data:
+                self.set_detail(None, bounds)
+                self.fig.canvas.draw_idle()
+            self.view_bounds = bounds
+        else:
+            self.master.event_handler("zoom_event", bounds)
+
+    def on_press(self, event):
+        """
+        Notes that a mouse button is pressed (the view is checked when it is released)
+
+        """
+        self.pressed = True
+
+    def get_plot_data(self):
+        """
+        Returns the plot data as open3D Vector
+
+        """
+        pcd = open3d.geometry.PointCloud()
+        pcd.points = open3d.utility.Vector3dVector(np.require(self.plot_data, dtype=np.float64,
+                                                              requirements=["C", "W"]))
+        return pcd
+
+    def pick_event_handler(self, event_data):
+        """
+        Processes the data of the pick event. Accepts the highest point among the selected points and returns its
+        x- y-coordinates.
+
+        """
+        ind = event_data
+        data_as_array = self.plot_points
+        argmax = np.argmax(data_as_array[ind, 2])
+        pick_x = int(data_as_array[ind[argmax], 0])
+        pick_y = int(data_as_array[ind[argmax], 1])
+        self.master.event_handler("pick_event", (pick_x, pick_y))
+
+    def disconnect(self):
+        """
+        Disconnects the events of the plot from the figure (before another plot is drawn on it)
+
+        """
+        self.c_pick.disconnect()
+        for cid in self.cids:
+            self.fig.canvas.mpl_disconnect(cid)
+
 
 class VoxelHeatmapPlot:
     """
@@ -226,15 +614,29 @@ class VoxelHeatmapPlot:
         The matplotlib figure
     ax : Any
         The axis object of the figure (3D Scatter Plot)
+    image : Any
+        The image of the heatmap
+    colorbar : Any
+        The colorbar of the heatmap
+    d_rect_event : DraggableRectangle
+        The events of the draggable rectangle (None if no rectangle was added)
 
     Methods
     -------
+    get_image_data(heatmap)
+        Returns the z-values, the x- and y-values and the axis labels of the displayed heatmap
     add_draggable_rect(cx, cy, col_width, row_height, kernel_size, rotated)
         Adds a draggable rectangle to the plot
+    remove_draggable_rect()
+        Removes the draggable rectangle from the plot
     get_plot()
         Returns the figure and the axis object
+    set_heatmap(heatmap)
+        Replaces the displayed heatmap
     get_plot_data()
         Returns the plotted data
+    disconnect()
+        Disconnects the events of the plot from the figure
     cut_event_handler(event_data, rotated)
         Processes the data of the cut event
     calc_zero_offset(x1, y1, x2, y2, rotated_rect)
@@ -242,23 +644,57 @@ class VoxelHeatmapPlot:
 
     """
 
-    def __init__(self, master, heatmap: pd.DataFrame):
+    def __init__(self, master, heatmap: tuple[np.ndarray, np.ndarray, np.ndarray] | pd.DataFrame, fig=None):
         """
         Parameter
         ---------
         master : Any
             The frame on which the plot is displayed
-        heatmap : pd.DataFrame
-            The heatmap array that will be displayed in the plot
+        heatmap : tuple[np.ndarray, np.ndarray, np.ndarray] | pd.DataFrame
+            The heatmap that will be displayed in the plot, either as (z_values, x_values, y_values) arrays or as
+            DataFrame (index: y-values, columns: x-values)
+        fig : Any
+            The figure of a persistent canvas on which the plot is drawn (None: a new figure is created)
 
         """
         self.master = master
 
         self.plot_data = heatmap
+        self.d_rect_event = None
+
+        z_values, x_values, y_values, x_axis, y_axis = self.get_image_data(heatmap)
+
+        self.fig = get_figure(fig)
+        self.ax = self.fig.add_subplot(1, 1, 1)
+        self.image = self.ax.imshow(z_values, cmap='jet', interpolation='bessel', origin='lower', aspect='equal',
+                                    extent=[min(x_values), max(x_values), min(y_values), max(y_values)])
+        self.ax.set_aspect("equal", adjustable="box")
+
+        self.ax.set_title("Voxel Heatmap", fontsize=15)
+        self.ax.set_xlabel(x_axis, fontsize=10)
+        self.ax.set_ylabel(y_axis, fontsize=10)
+        divider = make_axes_locatable(self.ax)
+        cax = divider.append_axes("right", size="5%", pad=0.05)
+        self.colorbar = self.fig.colorbar(self.image, cax=cax, label="Z [cm]")
 
-        z_values = self.plot_data.to_numpy()
-        x_values = self.plot_data.columns
-        y_values = self.plot_data.index
+    @staticmethod
+    def get_image_data(heatmap: tuple[np.ndarray, np.ndarray, np.ndarray] | pd.DataFrame):
+        """
+        Returns the z-values, the x- and y-values and the axis labels of the displayed heatmap (narrow heatmaps are
+        rotated)
+
+        Parameter
+        ---------
+        heatmap : tuple[np.ndarray, np.ndarray, np.ndarray] | pd.DataFrame
+            The heatmap as (z_values, x_values, y_values) arrays or as DataFrame
+
+        """
+        if isinstance(heatmap, pd.DataFrame):
+            z_values = heatmap.to_numpy()
+            x_values = heatmap.columns
+            y_values = heatmap.index
+        else:
+            z_values, x_values, y_values = heatmap
 
         width = max(x_values) - min(x_values)
         height = max(y_values) - min(y_values)
@@ -273,17 +709,7 @@ class VoxelHeatmapPlot:
             x_axis = "Y [cm]"
             y_axis = "X [cm]"
 
-        self.fig, self.ax = plt.subplots(1, 1)
-        im = self.ax.imshow(z_values, cmap='jet', interpolation='bessel', origin='lower', aspect='equal',
-                            extent=[min(x_values), max(x_values), min(y_values), max(y_values)])
-        self.ax.set_aspect("equal", adjustable="box")
-
-        plt.title("Voxel Heatmap", fontsize=15)
-        plt.xlabel(x_axis, fontsize=10)
-        plt.ylabel(y_axis, fontsize=10)
-        divider = make_axes_locatable(self.ax)
-        cax = divider.append_axes("right", size="5%", pad=0.05)
-        plt.colorbar(im, cax=cax, label="Z [cm]")
+        return z_values, x_values, y_values, x_axis, y_axis
 
     def add_draggable_rect(self, cx: int = 0, cy: int = 0, col_width: int = 80, row_height: int = 50,
                            kernel_size: str = "3x3", rotated: bool = False):
@@ -326,6 +752,16 @@ class VoxelHeatmapPlot:
         self.ax.add_patch(rect)
         self.d_rect_event.connect()
 
+    def remove_draggable_rect(self):
+        """
+        Removes the draggable rectangle from the plot and disconnects its events
+
+        """
+        if self.d_rect_event is not None:
+            self.d_rect_event.disconnect()
+            self.d_rect_event.rect.remove()
+            self.d_rect_event = None
+
     def get_plot(self):
         """
         Returns the figure and the axis object
@@ -333,6 +769,30 @@ class VoxelHeatmapPlot:
         """
         return self.fig, self.ax
 
+    def set_heatmap(self, heatmap: tuple[np.ndarray, np.ndarray, np.ndarray] | pd.DataFrame):
+        """
+        Replaces the displayed heatmap (image, limits and colorbar are updated, the draggable rectangle is removed)
+
+        Parameter
+        ---------
+        heatmap : tuple[np.ndarray, np.ndarray, np.ndarray] | pd.DataFrame
+            The heatmap that will be displayed in the plot
+
+        """
+        self.plot_data = heatmap
+        self.remove_draggable_rect()
+
+        z_values, x_values, y_values, x_axis, y_axis = self.get_image_data(heatmap)
+        extent = [min(x_values), max(x_values), min(y_values), max(y_values)]
+        self.image.set_data(z_values)
+        self.image.set_extent(extent)
+        self.image.autoscale()
+        self.ax.set_xlim(extent[0], extent[1])
+        self.ax.set_ylim(extent[2], extent[3])
+        self.ax.set_xlabel(x_axis, fontsize=10)
+        self.ax.set_ylabel(y_axis, fontsize=10)
+        self.colorbar.update_normal(self.image)
+
     def get_plot_data(self):
         """
         Returns the plotted data
@@ -359,6 +819,14 @@ class VoxelHeatmapPlot:
         zero_offsets = self.calc_zero_offset(x1, y1, x2, y2, rotated)
         self.master.event_handler("cut_event", (x1, y1, x2, y2, zero_offsets))
 
+    def disconnect(self):
+        """
+        Disconnects the events of the plot from the figure (before another plot is drawn on it)
+
+        """
+        if self.d_rect_event is not None:
+            self.d_rect_event.disconnect()
+
     @staticmethod
     def calc_zero_offset(x1: float, y1: float, x2: float, y2: float, rotated_rect: bool):
         """
@@ -405,9 +873,180 @@ class VoxelHeatmapPlot:
         return zero_offsets
 
 
+class RasterPlot:
+    """
+    A class that defines the top view raster plot of a point cloud (figure and axis). The highest z-value of every
+    pixel is displayed as one image, so that the render time depends on the number of pixels and not on the number of
+    points (see CloudProcessing.get_raster_image).
+
+    ...
+
+    Attributes
+    ----------
+    master : tk.Frame
+        The frame on which the plot is displayed
+    plot_data : tuple
+        The displayed raster (highest z-value of every pixel and bounds of the pixel edges)
+    fig : Any
+        The matplotlib figure
+    ax : Any
+        The axis object of the figure (image)
+    image : Any
+        The image of the raster
+    colorbar : Any
+        The colorbar of the raster
+    c_pick : CustomPick
+        An object of the class that defines the pick event
+
+    Methods
+    -------
+    get_plot()
+        Returns the figure and the axis object
+    set_raster(raster)
+        Replaces the displayed raster
+    get_pixel(x, y)
+        Returns the row and column of the pixel containing the x-y-position
+    get_world(row, col)
+        Returns the x-y-position of the center of the pixel
+    get_plot_data()
+        Returns the plot data
+    pick_event_handler()
+        Processes the data of the pick event
+    disconnect()
+        Disconnects the events of the plot from the figure
+
+    """
+
+    def __init__(self, master, raster: tuple[np.ndarray, np.ndarray], fig=None):
+        """
+        Parameter
+        ---------
+        master : Any
+            The frame on which the plot is displayed
+        raster : tuple[np.ndarray, np.ndarray]
+            The raster that will be displayed in the plot (highest z-value of every pixel, NaN for pixels without
+            points, and bounds of the pixel edges (x_min, x_max, y_min, y_max))
+        fig : Any
+            The figure of a persistent canvas on which the plot is drawn (None: a new figure is created)
+
+        """
+        self.master = master
+
+        self.plot_data = raster
+        z_image, extent = raster
+
+        self.fig = get_figure(fig)
+        self.ax = self.fig.add_subplot(1, 1, 1)
+        self.image = self.ax.imshow(z_image, cmap="jet", interpolation="nearest", origin="lower", aspect="equal",
+                                    extent=list(extent), picker=True)
+        self.ax.set_aspect("equal", adjustable="box")
+
+        self.c_pick = CustomPick(self, self.fig)
+
+        self.ax.set_title("Top View", fontsize=15)
+        self.ax.set_xlabel("X [cm]", fontsize=10)
+        self.ax.set_ylabel("Y [cm]", fontsize=10)
+        divider = make_axes_locatable(self.ax)
+        cax = divider.append_axes("right", size="5%", pad=0.05)
+        self.colorbar = self.fig.colorbar(self.image, cax=cax, label="Z [cm]")
+
+    def get_plot(self):
+        """
+        Returns the figure and the axis object
+
+        """
+        return self.fig, self.ax
+
+    def set_raster(self, raster: tuple[np.ndarray, np.ndarray]):
+        """
+        Replaces the displayed raster (image, limits and colorbar are updated)
+
+        Parameter
+        ---------
+        raster : tuple[np.ndarray, np.ndarray]
+            The raster that will be displayed in the plot
+
+        """
+        self.plot_data = raster
+        z_image, extent = raster
+        self.image.set_data(z_image)
+        self.image.set_extent(list(extent))
+        self.image.autoscale()
+        self.ax.set_xlim(extent[0], extent[1])
+        self.ax.set_ylim(extent[2], extent[3])
+        self.colorbar.update_normal(self.image)
+
+    def get_pixel(self, x: float, y: float):
+        """
+        Returns the row and column of the pixel containing the x-y-position (None if it is outside the raster)
+
+        Parameter
+        ---------
+        x : float
+            The x-coordinate
+        y : float
+            The y-coordinate
+
+        """
+        z_image, extent = self.plot_data
+        n_rows, n_cols = z_image.shape
+        col = int(np.floor((x - extent[0]) / (extent[1] - extent[0]) * n_cols))
+        row = int(np.floor((y - extent[2]) / (extent[3] - extent[2]) * n_rows))
+        if not (0 <= row < n_rows and 0 <= col < n_cols):
+            return None
+        return row, col
+
+    def get_world(self, row: int, col: int):
+        """
+        Returns the x-y-position of the center of the pixel
+
+        Parameter
+        ---------
+        row : int
+            The row of the pixel
+        col : int
+            The column of the pixel
+
+        """
+        z_image, extent = self.plot_data
+        n_rows, n_cols = z_image.shape
+        x = extent[0] + (col + 0.5) * (extent[1] - extent[0]) / n_cols
+        y = extent[2] + (row + 0.5) * (extent[3] - extent[2]) / n_rows
+        return x, y
+
+    def get_plot_data(self):
+        """
+        Returns the plot data (highest z-value of every pixel and bounds of the pixel edges)
+
+        """
+        return self.plot_data
+
+    def pick_event_handler(self, event_data):
+        """
+        Processes the data of the pick event. Maps the picked position to its pixel and returns the x- y-coordinates
+        of the pixel center (pixels without points are ignored).
+
+        """
+        x, y = event_data
+        if x is None or y is None:
+            return
+        pixel = self.get_pixel(x, y)
+        if pixel is None or np.isnan(self.plot_data[0][pixel]):
+            return
+        pick_x, pick_y = self.get_world(*pixel)
+        self.master.event_handler("pick_event", (int(pick_x), int(pick_y)))
+
+    def disconnect(self):
+        """
+        Disconnects the events of the plot from the figure (before another plot is drawn on it)
+
+        """
+        self.c_pick.disconnect()
+
+
 class CustomPick:
     """
-    A class that defines a custom pick event for the point cloud and voxel plot
+    A class that defines a custom pick event for the point cloud, voxel and raster plot
 
     ...
 
@@ -432,6 +1071,8 @@ class CustomPick:
         Processes the pick event and passes the data to the masters pick event handler
     disconnect_pick(event)
         Disconnects the pick event so that the user always has to execute the keypress event before the pick event
+    disconnect()
+        Disconnects all events from the figure
 
     """
 
@@ -451,11 +1092,14 @@ class CustomPick:
 
     def on_pick(self, event):
         """
-        Processes the pick event and passes the data to the masters pick event handler
+        Processes the pick event and passes the data to the masters pick event handler (the indices of the picked
+        points or, for images, the position of the mouse in data coordinates)
 
         """
-        ind = event.ind
-        self.master.pick_event_handler(ind)
+        if hasattr(event, "ind"):
+            self.master.pick_event_handler(event.ind)
+        else:
+            self.master.pick_event_handler((event.mouseevent.xdata, event.mouseevent.ydata))
 
     def disconnect_pick(self, event):
         """
@@ -465,3 +1109,12 @@ class CustomPick:
         if self.pick:
             self.fig.canvas.mpl_disconnect(self.pick)
             self.pick = None
+
+    def disconnect(self):
+        """
+        Disconnects all events from the figure
+
+        """
+        self.disconnect_pick(None)
+        self.fig.canvas.mpl_disconnect(self.keypress)
+        self.fig.canvas.mpl_disconnect(self.keyrelease)
@@ -1,52 +1,365 @@
 import os
 
-import open3d
 import numpy as np
 import pandas as pd
+from P020_Backend.P021_Code.CloudArchive import open_archive, split_archive_path
+from P020_Backend.P021_Code.CloudFiles import read_csv_points, read_cutout_points, write_csv_points, \
+    write_cutout_points
+from P020_Backend.P021_Code.CloudFilters import BoxFilter, OutlierFilter, ThresholdFilter, get_filter_mask
+from P020_Backend.P021_Code.SpatialIndex import SpatialIndex
+from P020_Backend.P021_Code.LazyImport import LazyModule
+
+# imported on first use, open3d takes more than a second to import
+open3d = LazyModule("open3d")
+
+
+# maximum number of crops that can be undone
+HISTORY_DEPTH = 20
+# number of points drawn by the level of detail plot
+POINT_BUDGET = 20000
+# maximum number of refinements of the grid size of the level of detail sampling
+LOD_ITERATIONS = 8
+# number of pixels along the longer side of the top view raster
+RASTER_SIZE = 800
+
+
+def get_voxel_data(points: np.ndarray, voxel_size: int = 2):
+    """
+    Creates the voxel data from the given points without building a dense voxel array. The points are quantized to the
+    integer grid indices of an open3D voxel grid (origin half a voxel below the minimum bound) and reduced to the unique
+    occupied voxels. The voxel coordinates are the grid indices scaled by the voxel size, shifted to the center of the
+    points in x- and y-direction.
+
+    Parameter
+    ---------
+    points : np.ndarray
+        The points (x-, y- and z-coordinates) to be voxelized
+    voxel_size : int
+        The size of the voxels
+
+    Returns
+    -------
+    voxel_data : np.ndarray
+        The voxel coordinates, sorted by x-, y- and z-index
+
+    """
+    # float32 points are quantized in float32, only the center is accumulated in float64
+    center = points.mean(axis=0, dtype=np.float64)
+    origin = points.min(axis=0) - voxel_size * 0.5
+    grid_index = np.floor((points - origin) / voxel_size).astype(np.int64)
+
+    min_grid_index = grid_index.min(axis=0)
+    max_grid_index = grid_index.max(axis=0)
+    min_bound = min_grid_index * voxel_size + origin
+    max_bound = (max_grid_index + 1) * voxel_size + origin
+    resolution = np.round(max_bound - min_bound).astype(int)
+
+    # unique voxel indices, encoded in one integer key so that the sort order equals the order of np.where
+    voxel_index = (grid_index * voxel_size).astype(np.int64)
+    dims = voxel_index.max(axis=0) + 1
+    keys = np.unique((voxel_index[:, 0] * dims[1] + voxel_index[:, 1]) * dims[2] + voxel_index[:, 2])
+    indices = np.unravel_index(keys, dims)
+
+    shift_x = resolution[0] / 2
+    shift_y = resolution[1] / 2
+    voxel_data = np.vstack((indices[0], indices[1], indices[2])).T
+    voxel_data[:, 0] = voxel_data[:, 0] - shift_x + center[0]
+    voxel_data[:, 1] = voxel_data[:, 1] - shift_y + center[1]
+
+    return voxel_data
+
+
+def get_heatmap_grid(voxels: np.ndarray, dtype: type = np.float64):
+    """
+    Creates the heatmap grid from the given voxel data in a single pass. The voxels are binned into their x-y-cells and
+    every cell takes the z-value of the last voxel that falls into it (the voxel data is sorted by grid index, so this
+    is the highest voxel). Cells without voxels are filled with zero.
+
+    Parameter
+    ---------
+    voxels : np.ndarray
+        The voxel data (x-, y- and z-coordinates) as returned by get_voxels
+    dtype : type
+        The data type of the heatmap values
+
+    Returns
+    -------
+    z_values : np.ndarray
+        The heatmap values (rows: y-coordinates, columns: x-coordinates)
+    x_values : np.ndarray
+        The sorted x-coordinates of the heatmap columns
+    y_values : np.ndarray
+        The sorted y-coordinates of the heatmap rows
+
+    """
+    x_values, x_idx = np.unique(voxels[:, 0], return_inverse=True)
+    y_values, y_idx = np.unique(voxels[:, 1], return_inverse=True)
+    cells = y_idx * len(x_values) + x_idx
+
+    # index of the last voxel in every occupied cell
+    _, last = np.unique(cells[::-1], return_index=True)
+    last = len(cells) - 1 - last
+    # the voxel in the first row never reached the former heatmap (np.where(...)[0].any() is False for index 0),
+    # it is skipped as well so that the heatmaps (and the networks trained on them) stay identical
+    last = last[last != 0]
+
+    z_values = np.zeros(len(y_values) * len(x_values), dtype=dtype)
+    z_values[cells[last]] = voxels[last, 2]
+
+    return z_values.reshape(len(y_values), len(x_values)), x_values, y_values
+
+
+def get_box_mask(points: np.ndarray, x1: float, y1: float, x2: float, y2: float, z_min: float = None,
+                 z_max: float = None):
+    """
+    Returns the mask of the points inside the axis-aligned box (bounds included) in a single pass. Without a z-range,
+    the box is unbounded in z-direction.
+
+    Parameter
+    ---------
+    points : np.ndarray
+        The points (x-, y- and z-coordinates)
+    x1 : float
+        The lower x-bound
+    y1 : float
+        The lower y-bound
+    x2 : float
+        The upper x-bound
+    y2 : float
+        The upper y-bound
+    z_min : float
+        The lower z-bound (None: no lower bound)
+    z_max : float
+        The upper z-bound (None: no upper bound)
+
+    """
+    return BoxFilter(x1, y1, x2, y2, z_min, z_max).get_mask(points)
+
+
+def get_lod_points(points: np.ndarray, point_budget: int = POINT_BUDGET):
+    """
+    Returns at most point_budget points of the cloud for the level of detail plot: the points are binned into a grid
+    over the x-y-plane and the highest point of every occupied cell is kept. The cell size is chosen so that the number
+    of occupied cells is close to the point budget (coarser grids for larger clouds). Clouds within the budget are
+    returned unchanged.
+
+    Parameter
+    ---------
+    points : np.ndarray
+        The points (x-, y- and z-coordinates)
+    point_budget : int
+        The maximum number of returned points
+
+    """
+    if len(points) <= point_budget:
+        return points
+    x, y = points[:, 0], points[:, 1]
+    x_min, y_min = x.min(), y.min()
+    width, height = max(x.max() - x_min, 1e-6), max(y.max() - y_min, 1e-6)
+
+    # the grid of the area divided into point_budget cells has at most point_budget occupied cells, sparse clouds
+    # occupy less of them and get a finer grid
+    cell_size = np.sqrt(width * height / point_budget)
+    for _ in range(LOD_ITERATIONS):
+        n_cols = int(width / cell_size) + 1
+        n_rows = int(height / cell_size) + 1
+        # the offsets are not negative, so that the conversion to integers rounds down (clipped, float32 offsets can
+        # be rounded up to the far cell edge)
+        keys = (np.minimum(((y - y_min) / cell_size).astype(np.int64), n_rows - 1) * n_cols
+                + np.minimum(((x - x_min) / cell_size).astype(np.int64), n_cols - 1))
+        n_cells = np.count_nonzero(np.bincount(keys, minlength=n_rows * n_cols))
+        if 0.9 * point_budget <= n_cells <= point_budget:
+            break
+        # the number of occupied cells scales approximately with the inverse square of the cell size
+        cell_size *= np.sqrt(n_cells / point_budget) * (1.01 if n_cells > point_budget else 1.0)
+
+    # highest point of every cell (the first one if several points have the highest z-value)
+    z_max = np.full(n_rows * n_cols, -np.inf)
+    np.maximum.at(z_max, keys, points[:, 2])
+    highest = np.flatnonzero(points[:, 2] == z_max[keys])
+    _, first = np.unique(keys[highest], return_index=True)
+    # the budget is exceeded if the cell size did not converge within LOD_ITERATIONS
+    return points[np.sort(highest[first])[:point_budget]]
+
+
+def get_raster_image(points: np.ndarray, raster_size: int = RASTER_SIZE):
+    """
+    Creates the top view raster of the points in a single pass: the points are binned into square pixels over the
+    x-y-plane and every pixel takes the highest z-value of its points (2D histogram with maximum). Pixels without
+    points are NaN.
+
+    Parameter
+    ---------
+    points : np.ndarray
+        The points (x-, y- and z-coordinates)
+    raster_size : int
+        The number of pixels along the longer side of the raster (one more if the points reach the last pixel edge)
+
+    Returns
+    -------
+    z_image : np.ndarray
+        The highest z-value of every pixel (rows: y-coordinates ascending, columns: x-coordinates ascending)
+    extent : np.ndarray
+        The x- and y-bounds of the pixel edges (x_min, x_max, y_min, y_max)
+
+    """
+    x, y = points[:, 0], points[:, 1]
+    x_min, y_min = float(x.min()), float(y.min())
+    width, height = float(x.max()) - x_min, float(y.max()) - y_min
+    pixel_size = max(width, height, 1e-6) / raster_size
+    n_cols = int(width / pixel_size) + 1
+    n_rows = int(height / pixel_size) + 1
+
+    # pixel index of every point, the offsets are not negative, so that the conversion to integers rounds down. The
+    # indices are clipped, float32 offsets can be rounded up to the far pixel edge.
+    offsets = x - x_min
+    offsets /= pixel_size
+    keys = np.minimum(offsets.astype(np.intp), n_cols - 1)
+    offsets = y - y_min
+    offsets /= pixel_size
+    keys += np.minimum(offsets.astype(np.intp), n_rows - 1) * n_cols
+    z_image = np.full(n_rows * n_cols, -np.inf, dtype=points.dtype)
+    np.maximum.at(z_image, keys, points[:, 2])
+    z_image[np.isneginf(z_image)] = np.nan
+
+    extent = np.array([x_min, x_min + n_cols * pixel_size, y_min, y_min + n_rows * pixel_size])
+    return z_image.reshape(n_rows, n_cols), extent
+
+
+def get_pcd_object(points: np.ndarray):
+    """
+    Returns an open3D point cloud object of the points (read-only or memory mapped points are copied)
+
+    Parameter
+    ---------
+    points : np.ndarray
+        The points (x-, y- and z-coordinates)
+
+    """
+    pcd = open3d.geometry.PointCloud()
+    pcd.points = open3d.utility.Vector3dVector(np.require(points, dtype=np.float64, requirements=["C", "W"]))
+    return pcd
 
 
 class Cloud:
     """
-    A class that is used to process a point cloud
+    A class that is used to process a point cloud. The points are kept as array and only converted to an open3D point
+    cloud object if it is requested. Filters are not applied directly, they are collected and applied together (one
+    combined mask, one selection) when the points are needed. The loaded points are kept as source and every applied
+    filter step is stored as the indices of the kept source points, so that crops can be undone or reset without
+    reading the file again.
 
     ...
 
     Attributes
     ----------
     pcd : Any
-        The point cloud object
+        The open3D point cloud object of the current points (None until it is requested)
     pcd_path : Any
         The storage path where the point cloud is saved/The memory path where the point cloud data is located
+    points : np.ndarray
+        The current points (None until they are requested)
+    source : Any
+        The open3D point cloud object of the source points (None until it is requested)
+    source_points : np.ndarray
+        The loaded points (memory mapped if the cloud was opened with mmap)
+    views : list
+        The indices of the source points kept by every filter step (None: all source points)
+    history_depth : int
+        The maximum number of filter steps that can be undone
+    dtype : type
+        The data type of the points and heatmaps
+    filters : list
+        The filters that are not yet applied to the points
+    base_filters : list
+        The filters that are pending again after the point cloud is restored to the source points
+    index : SpatialIndex
+        The spatial index of the points (built on demand)
+    index_points : np.ndarray
+        The points for which the spatial index was built
 
     Methods
     -------
-    set(pcd_path)
-        Retrieves the data from the specified storage path and loads the point cloud as an open3D vector object
+    set(pcd_path, mmap)
+        Retrieves the data from the specified storage path and loads the points of the point cloud
+    set_points(points)
+        Sets the source points of the point cloud
+    set_pcd(pcd)
+        Sets an open3D point cloud object as source of the point cloud
+    add_filter(*filters)
+        Adds filters to the pending filters of the point cloud
+    apply_filters()
+        Applies the pending filters to the points
+    push_view(view)
+        Adds the indices of the kept source points of a filter step to the history
+    undo()
+        Restores the point cloud before the last filter step
+    reset()
+        Restores the point cloud after loading
     remove_points_from_threshold(axis, threshold, direction)
         Removes the points in the point cloud that exceed/fall below the specified threshold value
+    crop(x1, y1, x2, y2, z_min, z_max)
+        Removes the points in the point cloud outside the given box
+    remove_outliers(nb_neighbors, std_ratio)
+        Removes the statistical outliers of the point cloud
     get_voxels(voxel_size)
         Creates the voxel grid from the given point cloud data
     get_heatmap(voxel_size)
         Creates the heatmap from the given point cloud data
+    get_heatmap_array(voxel_size)
+        Creates the heatmap from the given point cloud data as plain arrays
     get()
-        Returns the current point cloud data
-    save_pcd(cutout_path, filename)
+        Returns the current point cloud data as open3D point cloud object
+    get_points()
+        Returns the points of the current point cloud data
+    get_sampled_points(sample_rate)
+        Returns every k-th point of the current point cloud data
+    get_lod_points(point_budget, bounds)
+        Returns the highest points of a grid over the current point cloud data within the point budget
+    get_raster_image(raster_size)
+        Creates the top view raster (highest z-value per pixel) of the current point cloud data
+    get_index()
+        Returns the spatial index of the current point cloud data
+    save_pcd(cutout_path, filename, quantize, compress)
         Saves the point cloud data at the given memory path
 
     """
 
-    def __init__(self):
+    def __init__(self, history_depth: int = HISTORY_DEPTH, dtype: type = np.float64):
+        """
+        Parameter
+        ---------
+        history_depth : int
+            The maximum number of filter steps that can be undone
+        dtype : type
+            The data type of the points and heatmaps (np.float32 halves the memory of the points)
+
+        """
         self.pcd = None
         self.pcd_path = None
-
-    def set(self, pcd_path: str = None):
+        self.points = None
+        self.source = None
+        self.source_points = None
+        self.views = [None]
+        self.history_depth = history_depth
+        self.dtype = dtype
+        self.filters = []
+        self.base_filters = []
+        self.index = None
+        self.index_points = None
+
+    def set(self, pcd_path: str = None, mmap: bool = False):
         """
-        Retrieves the data from the specified storage path and loads the point cloud as an open3D vector object
+        Retrieves the data from the specified storage path and loads the points of the point cloud. Points below the
+        height threshold are removed.
 
         Parameter
         ---------
         pcd_path : str
-            Memory path of the point cloud to be opened
+            Memory path of the point cloud to be opened (csv, npy, ply, binary cutout npz or cutout in an archive,
+            i.e. the archive path joined with the filename of the cutout)
+        mmap : bool
+            Information on whether a npy file is memory mapped (read on demand) instead of being read completely
 
         """
         if pcd_path:
@@ -56,23 +369,154 @@ class Cloud:
         else:
             path = None
 
-        if path.endswith(".csv"):
-            data = np.genfromtxt(path, delimiter=";")
-            pcd = open3d.geometry.PointCloud()
-            pcd.points = open3d.utility.Vector3dVector(data)
+        archive_path, filename = split_archive_path(path)
+        if archive_path:
+            # the points of the cutout stay memory mapped in the archive like a npy file
+            points = open_archive(archive_path).get_points(filename)
+            self.set_points(points if mmap else np.array(points))
+        elif path.endswith(".csv"):
+            self.set_points(read_csv_points(path))
         elif path.endswith(".npy"):
-            data = np.load(path)
-            pcd = open3d.geometry.PointCloud()
-            pcd.points = open3d.utility.Vector3dVector(data)
+            self.set_points(np.load(path, mmap_mode="r" if mmap else None))
+        elif path.endswith(".npz"):
+            self.set_points(read_cutout_points(path))
         elif path.endswith(".ply"):
-            pcd = open3d.io.read_point_cloud(path)
+            self.set_pcd(open3d.io.read_point_cloud(path))
         else:
             raise AttributeError
 
-        if pcd:
-            self.pcd = pcd
-            self.pcd_path = path
-            self.remove_points_from_threshold("Z", -2.5, ">")
+        self.pcd_path = path
+        self.remove_points_from_threshold("Z", -2.5, ">")
+        if mmap:
+            # the height filter stays pending (also after undo/reset), so that it is fused with the next filters and
+            # only the finally kept points are read from the memory mapped file
+            self.base_filters = list(self.filters)
+            return
+
+        self.apply_filters()
+        kept = self.views[-1]
+        if kept is not None and self.source is not None:
+            self.set_pcd(self.source.select_by_index(kept))
+        elif kept is not None:
+            self.set_points(self.source_points[kept])
+
+    def set_points(self, points: np.ndarray):
+        """
+        Sets the source points of the point cloud (the filter history is cleared)
+
+        Parameter
+        ---------
+        points : np.ndarray
+            The points (x-, y- and z-coordinates)
+
+        """
+        if not isinstance(points, np.memmap):
+            points = points.astype(self.dtype, copy=False)
+        self.source_points = points
+        self.source = None
+        self.views = [None]
+        self.filters = []
+        self.base_filters = []
+        self.points = None
+        self.pcd = None
+
+    def set_pcd(self, pcd: "open3d.geometry.PointCloud"):
+        """
+        Sets an open3D point cloud object as source of the point cloud (the filter history is cleared). Its other
+        attributes (e.g. colors) are kept by the filters.
+
+        Parameter
+        ---------
+        pcd : open3d.geometry.PointCloud
+            The point cloud object
+
+        """
+        self.set_points(np.asarray(pcd.points))
+        self.source = pcd
+
+    def add_filter(self, *filters):
+        """
+        Adds filters to the pending filters of the point cloud. They are applied when the points are needed.
+
+        Parameter
+        ---------
+        filters : PointFilter
+            The filters to be added
+
+        """
+        self.filters.extend(filters)
+        return self
+
+    def apply_filters(self):
+        """
+        Applies the pending filters to the points with a single combined mask
+
+        """
+        if not self.filters:
+            return
+
+        filters = self.filters
+        self.filters = []
+        points = self.get_points()
+        if self.index is not None and self.index_points is points and type(filters[0]) is BoxFilter:
+            # only the points found by the spatial index have to be checked by the remaining filters
+            candidates = self.index.box(*filters[0].bounds)
+            kept = candidates[get_filter_mask(points[candidates], filters)]
+        else:
+            kept = np.flatnonzero(get_filter_mask(points, filters))
+
+        if len(kept) < len(points):
+            view = self.views[-1]
+            self.push_view(kept if view is None else view[kept])
+
+    def push_view(self, view: np.ndarray):
+        """
+        Adds the indices of the kept source points of a filter step to the history. If the history is full, the oldest
+        step after loading is removed.
+
+        Parameter
+        ---------
+        view : np.ndarray
+            The indices of the kept source points
+
+        """
+        self.views.append(view)
+        if len(self.views) > self.history_depth + 1:
+            del self.views[1]
+        self.points = None
+        self.pcd = None
+
+    def undo(self):
+        """
+        Restores the point cloud before the last filter step (pending filters are discarded). The points are selected
+        from the source in memory when they are needed.
+
+        """
+        if len(self.views) == 1:
+            undone = self.filters != self.base_filters
+            self.filters = list(self.base_filters)
+            return undone
+        if self.filters:
+            self.filters = []
+            return True
+
+        self.views.pop()
+        if len(self.views) == 1:
+            self.filters = list(self.base_filters)
+        self.points = None
+        self.pcd = None
+        return True
+
+    def reset(self):
+        """
+        Restores the point cloud after loading (pending filters are discarded) without reading the file again
+
+        """
+        self.filters = list(self.base_filters)
+        if len(self.views) > 1:
+            del self.views[1:]
+            self.points = None
+            self.pcd = None
 
     def remove_points_from_threshold(self, axis: str = 'Z', threshold: float = -6.8, direction: str = '>'):
         """
@@ -88,28 +532,44 @@ class Cloud:
             The direction in which the points are to be maintained
 
         """
-        points = np.asarray(self.pcd.points)
-        if axis == 'X':
-            ax = 0
-        elif axis == 'Y':
-            ax = 1
-        else:
-            ax = 2
-
-        if direction == '=':
-            pcd_sel = self.pcd.select_by_index(np.where(points[:, ax] == threshold)[0])
-        elif direction == '>=':
-            pcd_sel = self.pcd.select_by_index(np.where(points[:, ax] >= threshold)[0])
-        elif direction == '<=':
-            pcd_sel = self.pcd.select_by_index(np.where(points[:, ax] <= threshold)[0])
-        elif direction == '<':
-            pcd_sel = self.pcd.select_by_index(np.where(points[:, ax] < threshold)[0])
-        elif direction == '!=':
-            pcd_sel = self.pcd.select_by_index(np.where(points[:, ax] != threshold)[0])
-        else:
-            pcd_sel = self.pcd.select_by_index(np.where(points[:, ax] > threshold)[0])
+        self.add_filter(ThresholdFilter(axis, threshold, direction))
 
-        self.pcd = pcd_sel
+    def crop(self, x1: float, y1: float, x2: float, y2: float, z_min: float = None, z_max: float = None):
+        """
+        Removes the points in the point cloud outside the given box (bounds included). Gives the same result as the
+        chained threshold removals (X >= x1, X <= x2, Y >= y1, Y <= y2).
+
+        Parameter
+        ---------
+        x1 : float
+            The lower x-bound
+        y1 : float
+            The lower y-bound
+        x2 : float
+            The upper x-bound
+        y2 : float
+            The upper y-bound
+        z_min : float
+            The lower z-bound (None: no lower bound)
+        z_max : float
+            The upper z-bound (None: no upper bound)
+
+        """
+        self.add_filter(BoxFilter(x1, y1, x2, y2, z_min, z_max))
+
+    def remove_outliers(self, nb_neighbors: int = 20, std_ratio: float = 2.0):
+        """
+        Removes the statistical outliers of the point cloud
+
+        Parameter
+        ---------
+        nb_neighbors : int
+            The number of neighbours taken into account
+        std_ratio : float
+            The standard deviation ratio above which a point is an outlier
+
+        """
+        self.add_filter(OutlierFilter(nb_neighbors, std_ratio))
 
     def get_voxels(self, voxel_size: int = 2):
         """
@@ -121,28 +581,27 @@ class Cloud:
             The size of the voxels
 
         """
-        center = self.pcd.get_center()
-        voxel_grid = open3d.geometry.VoxelGrid.create_from_point_cloud(input=self.pcd, voxel_size=voxel_size)
-        resolution = np.round(voxel_grid.get_max_bound() - voxel_grid.get_min_bound()).astype(int)
-        voxel_array = np.zeros((resolution[0], resolution[1], resolution[2]))
-        voxels = voxel_grid.get_voxels()
+        points = self.get_points()
+        return get_voxel_data(points, voxel_size)
 
-        for voxel in voxels:
-            voxel_index = voxel.grid_index * voxel_size
-            voxel_array[int(voxel_index[0]), int(voxel_index[1]), int(voxel_index[2])] = 1
+    def get_heatmap(self, voxel_size: int = 10):
+        """
+        Creates the heatmap from the given point cloud data
 
-        indices = np.where(voxel_array == 1)
-        shift_x = resolution[0] / 2
-        shift_y = resolution[1] / 2
-        voxel_data = np.vstack((indices[0], indices[1], indices[2])).T
-        voxel_data[:, 0] = voxel_data[:, 0] - shift_x + center[0]
-        voxel_data[:, 1] = voxel_data[:, 1] - shift_y + center[1]
+        Parameter
+        ---------
+        voxel_size : int
+            The size of the voxels from which the heatmap is generated
 
-        return voxel_data
+        """
+        z_values, x_values, y_values = self.get_heatmap_array(voxel_size)
+        df = pd.DataFrame(z_values, index=y_values, columns=x_values)
+        return df
 
-    def get_heatmap(self, voxel_size: int = 10):
+    def get_heatmap_array(self, voxel_size: int = 10):
         """
-        Creates the heatmap from the given point cloud data
+        Creates the heatmap from the given point cloud data as plain arrays. Returns the z-values (rows: y, columns: x)
+        together with the sorted x- and y-coordinates of the heatmap cells.
 
         Parameter
         ---------
@@ -151,39 +610,117 @@ class Cloud:
 
         """
         voxels = self.get_voxels(voxel_size)
-        x_values = np.unique(voxels[:, 0])
-        y_values = np.unique(voxels[:, 1])
-        x_sorted = x_values[x_values[:].argsort()]
-        y_sorted = y_values[y_values[:].argsort()]
-
-        df = pd.DataFrame(index=y_sorted, columns=x_sorted)
-        for col, x in enumerate(df.columns):
-            for idx, y in enumerate(df.index):
-                try:
-                    array_idx = np.where((voxels[:, 0] == x) & (voxels[:, 1] == y))[0]
-                    if array_idx.any():
-                        array_idx = max(array_idx)
-                        df.iloc[idx, col] = voxels[array_idx, 2]
-                except IndexError:
-                    pass
-
-        df = df.fillna(0)
-        return df
+        return get_heatmap_grid(voxels, self.dtype)
 
     def get(self):
         """
-        Returns the current point cloud data
+        Returns the current point cloud data as open3D point cloud object (converted on the first request)
 
         """
+        self.apply_filters()
+        if self.pcd is None:
+            view = self.views[-1]
+            if self.source is None and view is None:
+                self.source = get_pcd_object(self.source_points)
+            if self.source is not None:
+                self.pcd = self.source if view is None else self.source.select_by_index(view)
+            else:
+                self.pcd = get_pcd_object(self.get_points())
         return self.pcd
 
-    def save_pcd(self, cutout_path, filename):
+    def get_points(self):
         """
-        Saves the point cloud data at the given memory path
+        Returns the points of the current point cloud data
+
+        """
+        self.apply_filters()
+        if self.points is None:
+            view = self.views[-1]
+            points = self.source_points if view is None else self.source_points[view]
+            # memory mapped points are converted when they are read
+            self.points = points.astype(self.dtype, copy=False)
+        return self.points
+
+    def get_sampled_points(self, sample_rate: int = 60):
+        """
+        Returns every k-th point of the current point cloud data (same points as the uniform down sampling of open3D)
+
+        Parameter
+        ---------
+        sample_rate : int
+            The sampling rate k
+
+        """
+        return self.get_points()[::sample_rate]
+
+    def get_lod_points(self, point_budget: int = POINT_BUDGET, bounds: tuple = None):
+        """
+        Returns the highest points of a grid over the current point cloud data within the point budget (see
+        get_lod_points). With bounds, only the points inside the box are sampled (finer grid for a zoomed region).
+
+        Parameter
+        ---------
+        point_budget : int
+            The maximum number of returned points
+        bounds : tuple
+            The box (x1, y1, x2, y2) to be sampled (None: the whole point cloud)
+
+        """
+        points = self.get_points()
+        if bounds is not None:
+            points = points[self.get_index().box(*bounds)]
+        return get_lod_points(points, point_budget)
+
+    def get_raster_image(self, raster_size: int = RASTER_SIZE):
+        """
+        Creates the top view raster of the current point cloud data (see get_raster_image). Returns the highest z-value
+        of every pixel and the bounds of the pixel edges.
+
+        Parameter
+        ---------
+        raster_size : int
+            The number of pixels along the longer side of the raster
+
+        """
+        return get_raster_image(self.get_points(), raster_size)
+
+    def get_index(self):
+        """
+        Returns the spatial index of the current point cloud data. The index is built on the first call and rebuilt
+        after the point cloud has changed (e.g. by a filter).
+
+        """
+        points = self.get_points()
+        if self.index_points is not points:
+            self.index = SpatialIndex(points)
+            self.index_points = points
+        return self.index
+
+    def save_pcd(self, cutout_path, filename, quantize: bool = False, compress: bool = True,
+                 dtype: type = np.float64):
+        """
+        Saves the point cloud data at the given memory path. Filenames ending with .npz are written in the binary cutout
+        format (atomically, float64 by default, so that the cutout is as exact as a csv file), all others as csv.
+
+        Parameter
+        ---------
+        cutout_path : str
+            The path of the dataset
+        filename : str
+            The filename of the cutout
+        quantize : bool
+            Information on whether the points of a binary cutout are quantized to int16 or stored with dtype
+        compress : bool
+            Information on whether a binary cutout is zlib compressed or not
+        dtype : type
+            The data type of the points of a binary cutout that is not quantized
 
         """
         memory_path = os.path.join(cutout_path, filename)
+        points = self.get_points()
+        if filename.endswith(".npz"):
+            write_cutout_points(memory_path, points, quantize, compress, dtype)
+            return
         if os.path.exists(memory_path):
             os.remove(memory_path)
-        points = np.asarray(self.pcd.points)
-        np.savetxt(memory_path, points, delimiter=";")
+        write_csv_points(memory_path, points)
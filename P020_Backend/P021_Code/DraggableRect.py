@@ -171,3 +171,4 @@ class DraggableRectangle:
         self.rect.figure.canvas.mpl_disconnect(self.cidpress)
         self.rect.figure.canvas.mpl_disconnect(self.cidrelease)
         self.rect.figure.canvas.mpl_disconnect(self.cidmotion)
+        self.rect.figure.canvas.mpl_disconnect(self.cidkeypress)
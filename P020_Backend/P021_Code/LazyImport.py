@@ -0,0 +1,53 @@
+import importlib
+
+
+class LazyModule:
+    """
+    A class that stands in for a heavy module (e.g. open3d or seaborn). The module is imported on the first access of
+    one of its attributes, so that importing a module that only needs it in some functions does not load it.
+
+    ...
+
+    Attributes
+    ----------
+    name : str
+        The name of the module
+    module : module
+        The imported module (None until the first attribute access)
+
+    Methods
+    -------
+    load()
+        Imports the module (once) and returns it
+
+    """
+
+    def __init__(self, name: str):
+        """
+        Parameter
+        ---------
+        name : str
+            The name of the module
+
+        """
+        self.name = name
+        self.module = None
+
+    def load(self):
+        """
+        Imports the module (once) and returns it
+
+        """
+        if self.module is None:
+            self.module = importlib.import_module(self.name)
+        return self.module
+
+    def __getattr__(self, attribute):
+        # only called for attributes that are not set on the placeholder itself
+        if attribute in ("name", "module"):
+            raise AttributeError(attribute)
+        return getattr(self.load(), attribute)
+
+    def __repr__(self):
+        state = "imported" if self.module is not None else "not imported"
+        return f"<lazy module {self.name!r} ({state})>"
@@ -1,40 +1,27 @@
-import os
-import open3d
 import numpy as np
 import matplotlib.pyplot as plt
-import pandas as pd
 from mpl_toolkits.axes_grid1 import make_axes_locatable
+from P020_Backend.P021_Code.CloudConversion import CloudConverter
+from P020_Backend.P021_Code.CloudFiles import read_csv_points, read_cutout_points
+from P020_Backend.P021_Code.CloudFilters import ThresholdFilter
+from P020_Backend.P021_Code.CloudProcessing import get_heatmap_grid, get_pcd_object, get_voxel_data
+from P020_Backend.P021_Code.LazyImport import LazyModule
 
+# imported on first use, open3d takes more than a second to import
+open3d = LazyModule("open3d")
 
-def remove_points_from_threshold(pcd: open3d.geometry.PointCloud, axis: str = 'Z', threshold: float = -6.8,
+
+def remove_points_from_threshold(pcd: "open3d.geometry.PointCloud", axis: str = 'Z', threshold: float = -6.8,
                                  direction: str = '>'):
 
     # Punkte aus der Punktwolke als Array holen
     points = np.asarray(pcd.points)
-    if axis == 'X':
-        ax = 0
-    elif axis == 'Y':
-        ax = 1
-    else:
-        ax = 2
-
-    if direction == '=':
-        pcd_sel = pcd.select_by_index(np.where(points[:, ax] == threshold)[0])
-    elif direction == '>=':
-        pcd_sel = pcd.select_by_index(np.where(points[:, ax] >= threshold)[0])
-    elif direction == '<=':
-        pcd_sel = pcd.select_by_index(np.where(points[:, ax] <= threshold)[0])
-    elif direction == '<':
-        pcd_sel = pcd.select_by_index(np.where(points[:, ax] < threshold)[0])
-    elif direction == '!=':
-        pcd_sel = pcd.select_by_index(np.where(points[:, ax] != threshold)[0])
-    else:
-        pcd_sel = pcd.select_by_index(np.where(points[:, ax] > threshold)[0])
+    mask = ThresholdFilter(axis, threshold, direction).get_mask(points)
 
-    return pcd_sel
+    return pcd.select_by_index(np.flatnonzero(mask))
 
 
-def display_inlier_outlier(pcd: open3d.geometry.PointCloud, ind: int):
+def display_inlier_outlier(pcd: "open3d.geometry.PointCloud", ind: int):
     inlier_cloud = pcd.select_by_index(ind)
     outlier_cloud = pcd.select_by_index(ind, invert=True)
 
@@ -43,7 +30,7 @@ def display_inlier_outlier(pcd: open3d.geometry.PointCloud, ind: int):
     open3d.visualization.draw_geometries([inlier_cloud, outlier_cloud])
 
 
-def show_sampled_cloud(pcd: open3d.geometry.PointCloud, sample_rate: int = 60):
+def show_sampled_cloud(pcd: "open3d.geometry.PointCloud", sample_rate: int = 60):
     uni_down_pcd = pcd.uniform_down_sample(sample_rate)
     pcd_as_ar = np.asarray(uni_down_pcd.points)
     fig = plt.figure()
@@ -67,28 +54,12 @@ def show_sampled_cloud(pcd: open3d.geometry.PointCloud, sample_rate: int = 60):
     return fig, ax, uni_down_pcd
 
 
-def get_voxels(pcd: open3d.geometry.PointCloud, voxel_size: int = 2):
-    center = pcd.get_center()
-    voxel_grid = open3d.geometry.VoxelGrid.create_from_point_cloud(input=pcd, voxel_size=voxel_size)
-    resolution = np.round(voxel_grid.get_max_bound() - voxel_grid.get_min_bound()).astype(int)
-    voxel_array = np.zeros((resolution[0], resolution[1], resolution[2]))
-    voxels = voxel_grid.get_voxels()
-
-    for voxel in voxels:
-        voxel_index = voxel.grid_index * voxel_size
-        voxel_array[int(voxel_index[0]), int(voxel_index[1]), int(voxel_index[2])] = 1
-
-    indices = np.where(voxel_array == 1)
-    shift_x = resolution[0] / 2
-    shift_y = resolution[1] / 2
-    voxel_data = np.vstack((indices[0], indices[1], indices[2])).T
-    voxel_data[:, 0] = voxel_data[:, 0] - shift_x + center[0]
-    voxel_data[:, 1] = voxel_data[:, 1] - shift_y + center[1]
-
-    return voxel_data
+def get_voxels(pcd: "open3d.geometry.PointCloud", voxel_size: int = 2):
+    points = np.asarray(pcd.points)
+    return get_voxel_data(points, voxel_size)
 
 
-def show_voxel(pcd: open3d.geometry.PointCloud, voxel_size: int = 10):
+def show_voxel(pcd: "open3d.geometry.PointCloud", voxel_size: int = 10):
     voxels_as_array = get_voxels(pcd, voxel_size)
 
     fig = plt.figure()
@@ -116,7 +87,7 @@ def show_voxel(pcd: open3d.geometry.PointCloud, voxel_size: int = 10):
     return fig, ax, pcd
 
 
-def show_voxel_heatmap(pcd: open3d.geometry.PointCloud, voxel_size: int = 10):
+def show_voxel_heatmap(pcd: "open3d.geometry.PointCloud", voxel_size: int = 10):
     # voxel_grid = open3d.geometry.VoxelGrid.create_from_point_cloud(input=pcd, voxel_size=voxel_size)
     # voxels = voxel_grid.get_voxels()
     # resolution = np.round(voxel_grid.get_max_bound() - voxel_grid.get_min_bound()).astype(int)
@@ -128,24 +99,7 @@ def show_voxel_heatmap(pcd: open3d.geometry.PointCloud, voxel_size: int = 10):
     # voxels_as_array = voxels_as_array[voxels_as_array[:, 0].argsort()]
     voxels_as_array = get_voxels(pcd, voxel_size)
 
-    x_values = np.unique(voxels_as_array[:, 0])
-    y_values = np.unique(voxels_as_array[:, 1])
-    x_sorted = x_values[x_values[:].argsort()]
-    y_sorted = y_values[y_values[:].argsort()]
-
-    df = pd.DataFrame(index=y_sorted, columns=x_sorted)
-    for col, x in enumerate(df.columns):
-        for idx, y in enumerate(df.index):
-            try:
-                array_idx = np.where((voxels_as_array[:, 0] == x) & (voxels_as_array[:, 1] == y))[0]
-                if array_idx.any():
-                    array_idx = max(array_idx)
-                    df.iloc[idx, col] = voxels_as_array[array_idx, 2]
-            except IndexError:
-                pass
-
-    df = df.fillna(0)
-    z_values = df.to_numpy()
+    z_values, x_sorted, y_sorted = get_heatmap_grid(voxels_as_array)
     fig, ax = plt.subplots(1, 1)
     im = ax.imshow(z_values, cmap='jet', interpolation='bessel', origin='lower', aspect='equal',
                    extent=[min(x_sorted), max(x_sorted), min(y_sorted), max(y_sorted)])
@@ -165,40 +119,30 @@ def show_voxel_heatmap(pcd: open3d.geometry.PointCloud, voxel_size: int = 10):
     return fig, ax, pcd
 
 
-def get_pcd(pcd_path):
+def get_pcd(pcd_path, mmap: bool = True):
     if pcd_path.endswith(".csv"):
-        data = np.genfromtxt(pcd_path, delimiter=";")
-        pcd = open3d.geometry.PointCloud()
-        pcd.points = open3d.utility.Vector3dVector(data)
+        data = read_csv_points(pcd_path)
     elif pcd_path.endswith(".npy"):
-        data = np.load(pcd_path)
-        pcd = open3d.geometry.PointCloud()
-        pcd.points = open3d.utility.Vector3dVector(data)
+        # memory mapped, only the points above the height threshold are copied to the open3D object
+        data = np.load(pcd_path, mmap_mode="r" if mmap else None)
+    elif pcd_path.endswith(".npz"):
+        data = read_cutout_points(pcd_path)
     elif pcd_path.endswith(".ply"):
         pcd = open3d.io.read_point_cloud(pcd_path)
+        return remove_points_from_threshold(pcd, "Z", -2.5, ">")
     else:
-        pcd = None
-
-    if pcd:
-        # pcd, _ = pcd.remove_statistical_outlier(nb_neighbors=20, std_ratio=3.0)
-        pcd = remove_points_from_threshold(pcd, "Z", -2.5, ">")
-
-    return pcd
-
-
-def prepare_clouds(path):
-    for pc in os.listdir(path):
-        file = os.path.join(path, pc)
-        try:
-            data = np.load(file)
-            pcd = open3d.geometry.PointCloud()
-            pcd.points = open3d.utility.Vector3dVector(data)
-            pcd = remove_points_from_threshold(pcd, "Z", -2.5, ">")
-            data = np.asarray(pcd.points)
-            data = data*10
-            np.save(file, data)
-        except EOFError:
-            os.remove(file)
+        return None
+
+    # pcd, _ = pcd.remove_statistical_outlier(nb_neighbors=20, std_ratio=3.0)
+    mask = ThresholdFilter("Z", -2.5, ">").get_mask(data)
+    return get_pcd_object(data[mask])
+
+
+def prepare_clouds(path, workers: int = 1):
+    # npy files in place: height threshold and scaling to mm, resumable (see CloudConversion), defective files are kept
+    converter = CloudConverter(path, threshold=-2.5, scale=10, source_formats=(".npy",))
+    converter.run(workers)
+    return converter.failed_files
 
 
 if __name__ == "__main__":
@@ -1,7 +1,11 @@
-import seaborn as sn
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
+from P020_Backend.P021_Code.LazyImport import LazyModule
+
+# imported on first use, seaborn takes about two seconds to import
+sn = LazyModule("seaborn")
+
 plt.rcParams.update({'font.size': 8})
 
 
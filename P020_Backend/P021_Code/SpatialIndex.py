@@ -0,0 +1,175 @@
+import numpy as np
+
+
+class SpatialIndex:
+    """
+    A class that indexes the points of a cloud in a regular grid over the x-y-plane (grid hash). The point indices are
+    sorted by their grid cell, so that the points of a row of cells are one contiguous slice and a query only has to
+    check the points of the cells it overlaps.
+
+    ...
+
+    Attributes
+    ----------
+    points : np.ndarray
+        The indexed points (x-, y- and z-coordinates)
+    cell_size : float
+        The edge length of a grid cell
+    min_bound : np.ndarray
+        The minimum x- and y-coordinate of the points (origin of the grid)
+    shape : np.ndarray
+        The number of grid cells in x- and y-direction
+    order : np.ndarray
+        The point indices sorted by grid cell (row by row)
+    starts : np.ndarray
+        The position of the first point of every grid cell in the sorted point indices
+
+    Methods
+    -------
+    get_candidates(x1, y1, x2, y2)
+        Returns the indices of the points in the grid cells overlapping the box
+    box(x1, y1, x2, y2)
+        Returns the indices of the points inside the box
+    highest_near(x, y, radius)
+        Returns the index of the highest point within the radius around (x, y)
+    nearest(x, y, k)
+        Returns the indices of the k nearest points to (x, y) in the x-y-plane
+
+    """
+
+    def __init__(self, points: np.ndarray, cell_size: float = None, points_per_cell: int = 16):
+        """
+        Parameter
+        ---------
+        points : np.ndarray
+            The points (x-, y- and z-coordinates) to be indexed
+        cell_size : float
+            The edge length of a grid cell (default: chosen so that a cell contains points_per_cell points on average)
+        points_per_cell : int
+            The average number of points per grid cell if no cell size is given
+
+        """
+        self.points = points
+        xy = points[:, :2]
+        if len(points):
+            self.min_bound = xy.min(axis=0)
+            extent = xy.max(axis=0) - self.min_bound
+        else:
+            self.min_bound = np.zeros(2)
+            extent = np.zeros(2)
+
+        if cell_size is None:
+            n_cells = max(len(points) / points_per_cell, 1)
+            if extent.min() > 0:
+                cell_size = np.sqrt(extent[0] * extent[1] / n_cells)
+            else:
+                cell_size = extent.max() / n_cells
+        self.cell_size = float(cell_size) if cell_size > 0 else 1.0
+        self.shape = (np.floor(extent / self.cell_size) + 1).astype(np.int64)
+
+        cells = np.floor((xy - self.min_bound) / self.cell_size).astype(np.int64)
+        cells = np.minimum(cells, self.shape - 1)
+        keys = cells[:, 1] * self.shape[0] + cells[:, 0]
+        self.order = np.argsort(keys)
+        counts = np.bincount(keys, minlength=int(self.shape[0] * self.shape[1]))
+        self.starts = np.concatenate(([0], np.cumsum(counts)))
+
+    def get_candidates(self, x1: float, y1: float, x2: float, y2: float):
+        """
+        Returns the indices of the points in the grid cells overlapping the box
+
+        Parameter
+        ---------
+        x1 : float
+            The lower x-bound
+        y1 : float
+            The lower y-bound
+        x2 : float
+            The upper x-bound
+        y2 : float
+            The upper y-bound
+
+        """
+        lower = np.floor((np.array([x1, y1]) - self.min_bound) / self.cell_size).astype(np.int64)
+        upper = np.floor((np.array([x2, y2]) - self.min_bound) / self.cell_size).astype(np.int64)
+        lower = np.maximum(lower, 0)
+        upper = np.minimum(upper, self.shape - 1)
+        if (lower > upper).any():
+            return np.empty(0, dtype=np.int64)
+
+        rows = np.arange(lower[1], upper[1] + 1) * self.shape[0]
+        starts = self.starts[rows + lower[0]]
+        ends = self.starts[rows + upper[0] + 1]
+        return np.concatenate([self.order[start:end] for start, end in zip(starts, ends)])
+
+    def box(self, x1: float, y1: float, x2: float, y2: float):
+        """
+        Returns the indices (ascending) of the points inside the box (bounds included)
+
+        Parameter
+        ---------
+        x1 : float
+            The lower x-bound
+        y1 : float
+            The lower y-bound
+        x2 : float
+            The upper x-bound
+        y2 : float
+            The upper y-bound
+
+        """
+        candidates = self.get_candidates(x1, y1, x2, y2)
+        x = self.points[candidates, 0]
+        y = self.points[candidates, 1]
+        inside = (x >= x1) & (x <= x2) & (y >= y1) & (y <= y2)
+        return np.sort(candidates[inside])
+
+    def highest_near(self, x: float, y: float, radius: float):
+        """
+        Returns the index of the highest point within the radius around (x, y) in the x-y-plane, or None if there is no
+        point within the radius
+
+        Parameter
+        ---------
+        x : float
+            The x-coordinate of the query point
+        y : float
+            The y-coordinate of the query point
+        radius : float
+            The search radius
+
+        """
+        candidates = self.get_candidates(x - radius, y - radius, x + radius, y + radius)
+        distances = (self.points[candidates, 0] - x) ** 2 + (self.points[candidates, 1] - y) ** 2
+        candidates = candidates[distances <= radius ** 2]
+        if not len(candidates):
+            return None
+        return int(candidates[np.argmax(self.points[candidates, 2])])
+
+    def nearest(self, x: float, y: float, k: int = 1):
+        """
+        Returns the indices of the k nearest points to (x, y) in the x-y-plane, sorted by distance. The search box is
+        doubled until it contains the k nearest points.
+
+        Parameter
+        ---------
+        x : float
+            The x-coordinate of the query point
+        y : float
+            The y-coordinate of the query point
+        k : int
+            The number of points
+
+        """
+        k = min(k, len(self.points))
+        radius = self.cell_size
+        max_radius = self.cell_size * (self.shape.max() + 1) + np.abs(np.array([x, y]) - self.min_bound).max()
+        while True:
+            candidates = self.get_candidates(x - radius, y - radius, x + radius, y + radius)
+            if len(candidates) >= k or radius > max_radius:
+                distances = (self.points[candidates, 0] - x) ** 2 + (self.points[candidates, 1] - y) ** 2
+                nearest = np.argsort(distances, kind="stable")[:k]
+                # points outside the box may be closer than the k-th point if it lies outside the inscribed circle
+                if not len(nearest) or distances[nearest[-1]] <= radius ** 2 or radius > max_radius:
+                    return candidates[nearest]
+            radius *= 2
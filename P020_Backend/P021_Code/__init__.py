@@ -1,6 +1,27 @@
-from .CloudPlots import *
-from .CloudProcessing import *
-from .DraggableRect import *
-from .LabelingResults import *
-from .PointCloudFunctions import *
-from .ResultPlots import *
+import importlib
+
+# the modules are imported on first access of one of their names, so that importing a single module (e.g.
+# CloudProcessing) does not import all others (and seaborn or open3d with them)
+MODULES = ["CloudArchive", "CloudCache", "CloudConversion", "CloudFiles", "CloudFilters", "CloudLoader", "CloudPlots",
+           "CloudProcessing", "DraggableRect", "LabelingResults", "LazyImport", "PointCloudFunctions", "ResultPlots",
+           "SpatialIndex"]
+
+
+def get_public_names(module):
+    return getattr(module, "__all__", [name for name in vars(module) if not name.startswith("_")])
+
+
+def __getattr__(name):
+    # a module is returned without importing the others ("from P020_Backend.P021_Code import CloudProcessing" checks
+    # the attribute before it imports the submodule)
+    if name in MODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    if name == "__all__":
+        return sorted({public_name for module_name in MODULES
+                       for public_name in get_public_names(importlib.import_module(f"{__name__}.{module_name}"))})
+    # later modules shadow earlier ones (same as the former star imports)
+    for module_name in reversed(MODULES):
+        module = importlib.import_module(f"{__name__}.{module_name}")
+        if name in vars(module) and not name.startswith("_"):
+            return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
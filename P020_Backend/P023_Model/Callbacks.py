@@ -0,0 +1,189 @@
+import queue
+import threading
+
+
+class Callback:
+    """
+    A class that defines the interface between a training loop and its caller. The base class ignores all events, so
+    that a training loop can run without any frontend.
+
+    ...
+
+    Attributes
+    ----------
+    stop_event : threading.Event
+        The event that is set if the training loop should stop
+
+    Methods
+    -------
+    on_start()
+        Is called when the loop starts
+    on_message(message)
+        Is called with a status message of the loop
+    on_progress(progress)
+        Is called with the current progress of the loop in percent
+    on_epoch_end(epoch, loss_history, train_accuracy, valid_accuracy)
+        Is called with the metrics at the end of every epoch
+    on_test_update(step, f1, accuracy, conf_matrix)
+        Is called with the current metrics of a test loop
+    on_end()
+        Is called when the loop ends (finished or stopped)
+    stop()
+        Requests the loop to stop after the current epoch
+    should_stop()
+        Returns whether the loop should stop
+
+    """
+
+    def __init__(self):
+        self.stop_event = threading.Event()
+
+    def on_start(self):
+        """
+        Is called when the loop starts
+
+        """
+        pass
+
+    def on_message(self, message: str):
+        """
+        Is called with a status message of the loop
+
+        """
+        pass
+
+    def on_progress(self, progress: float):
+        """
+        Is called with the current progress of the loop in percent
+
+        """
+        pass
+
+    def on_epoch_end(self, epoch: int, loss_history: list, train_accuracy: float, valid_accuracy: float):
+        """
+        Is called with the metrics at the end of every epoch
+
+        """
+        pass
+
+    def on_test_update(self, step: int, f1: float, accuracy: float, conf_matrix):
+        """
+        Is called with the current metrics of a test loop (step: index of the last tested sample)
+
+        """
+        pass
+
+    def on_end(self):
+        """
+        Is called when the loop ends (finished or stopped)
+
+        """
+        pass
+
+    def stop(self):
+        """
+        Requests the loop to stop after the current epoch
+
+        """
+        self.stop_event.set()
+
+    def should_stop(self):
+        """
+        Returns whether the loop should stop
+
+        """
+        return self.stop_event.is_set()
+
+
+class ConsoleCallback(Callback):
+    """
+    A callback that prints the messages and epoch results of the loop to the console
+
+    """
+
+    def on_message(self, message: str):
+        print(message, flush=True)
+
+    def on_epoch_end(self, epoch: int, loss_history: list, train_accuracy: float, valid_accuracy: float):
+        loss = loss_history[-1] if loss_history else float("nan")
+        print(f"Epoche {epoch + 1}: loss {loss:>7f}, train accuracy {train_accuracy:.4f}, "
+              f"valid accuracy {valid_accuracy:.4f}", flush=True)
+
+    def on_test_update(self, step: int, f1: float, accuracy: float, conf_matrix):
+        print(f"Sample {step + 1}: f1 {f1:.4f}, accuracy {accuracy:.4f}", flush=True)
+
+
+class QueueCallback(Callback):
+    """
+    A callback that collects the events of a loop running in a worker thread in a queue. The events are processed by
+    calling process_events() from the thread that owns the frontend (e.g. periodically via tkinter after()), so that
+    the frontend is only updated from its own thread and not once per batch.
+
+    ...
+
+    Attributes
+    ----------
+    events : queue.Queue
+        The queue containing the events (method name and arguments) of the loop
+    ended : bool
+        Information on whether the end event was processed
+
+    Methods
+    -------
+    process_events(handler)
+        Passes all queued events to the handler, only the latest progress event is passed
+
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.events = queue.Queue()
+        self.ended = False
+
+    def on_start(self):
+        self.events.put(("on_start", ()))
+
+    def on_message(self, message: str):
+        self.events.put(("on_message", (message,)))
+
+    def on_progress(self, progress: float):
+        self.events.put(("on_progress", (progress,)))
+
+    def on_epoch_end(self, epoch: int, loss_history: list, train_accuracy: float, valid_accuracy: float):
+        self.events.put(("on_epoch_end", (epoch, list(loss_history), train_accuracy, valid_accuracy)))
+
+    def on_test_update(self, step: int, f1: float, accuracy: float, conf_matrix):
+        self.events.put(("on_test_update", (step, f1, accuracy, conf_matrix)))
+
+    def on_end(self):
+        self.events.put(("on_end", ()))
+
+    def process_events(self, handler: Callback):
+        """
+        Passes all queued events to the handler. Consecutive progress events are merged, so that only the latest
+        progress is passed.
+
+        Parameter
+        ---------
+        handler : Callback
+            The callback which processes the events in the calling thread
+
+        """
+        progress = None
+        while True:
+            try:
+                name, args = self.events.get_nowait()
+            except queue.Empty:
+                break
+            if name == "on_progress":
+                progress = args
+                continue
+            if progress is not None:
+                handler.on_progress(*progress)
+                progress = None
+            getattr(handler, name)(*args)
+            if name == "on_end":
+                self.ended = True
+
+        if progress is not None:
+            handler.on_progress(*progress)
@@ -0,0 +1,180 @@
+import copy
+import os
+import queue
+import threading
+import time
+
+import torch
+from P020_Backend.P021_Code.CloudFiles import create_tmp_file
+
+
+# the run id (start time of the training) keeps the checkpoints of former runs in the same folder apart
+CHECKPOINT_NAME = "GraspDirection_Model_{run_id}_Epoch_{epoch}.pth"
+
+
+class CheckpointManager:
+    """
+    A class that saves the checkpoints of a training run in a background thread. A checkpoint contains the model
+    weights, the optimizer state and the metadata (model size, epoch, metrics). It is saved once per interval and for
+    the last epoch of the run, and written atomically (temporary file and rename). Only the best checkpoints (by the
+    chosen metric) and the last checkpoints of the run are kept, checkpoints of other runs are not touched.
+
+    ...
+
+    Attributes
+    ----------
+    memory_path : str
+        The path where the checkpoints are saved
+    model_size : str
+        The kernel size of the model
+    interval : int
+        The number of epochs between two checkpoints
+    keep_best : int
+        The number of best checkpoints that are kept
+    keep_last : int
+        The number of last checkpoints that are kept
+    metric : str
+        The metric by which the best checkpoints are determined
+    run_id : str
+        The id of the training run contained in the checkpoint names
+    checkpoints : list
+        The epoch, metrics and path of every checkpoint of this run that is kept
+
+    Methods
+    -------
+    save(epoch, model, optimizer, metrics, last)
+        Queues a checkpoint if the epoch is due or the last epoch of the run, raises errors of the writer thread
+    write(checkpoint, epoch, metrics)
+        Writes a checkpoint and removes the checkpoints that are not kept anymore
+    close(raise_error)
+        Waits until all queued checkpoints are written
+    load(path)
+        Returns the model weights of a checkpoint or of a plain state dict file
+
+    """
+
+    def __init__(self, memory_path: str, model_size: str, interval: int = 10, keep_best: int = 3,
+                 keep_last: int = 3, metric: str = "valid_accuracy", run_id: str = None):
+        self.memory_path = memory_path
+        self.model_size = model_size
+        self.interval = interval
+        self.keep_best = keep_best
+        self.keep_last = keep_last
+        self.metric = metric
+        self.run_id = run_id if run_id else time.strftime("%Y%m%d_%H%M%S")
+        self.checkpoints = []
+
+        self.queue = queue.Queue(maxsize=2)
+        self.error = None
+        self.thread = threading.Thread(daemon=True, target=self.run)
+        self.thread.start()
+
+    def save(self, epoch: int, model: torch.nn.Module, optimizer: torch.optim.Optimizer, metrics: dict,
+             last: bool = False):
+        """
+        Queues a checkpoint if the epoch is due or the last epoch of the run (finished or stopped). The weights and
+        the optimizer state are copied, so that the training can continue while the checkpoint is written. An error
+        of the writer thread (e.g. full disk) is raised here, so that it does not go unnoticed until the end of the run.
+
+        Parameter
+        ---------
+        epoch : int
+            The current epoch
+        model : torch.nn.Module
+            The model to be saved
+        optimizer : torch.optim.Optimizer
+            The optimizer to be saved
+        metrics : dict
+            The metrics of the epoch (e.g. train_accuracy, valid_accuracy, loss)
+        last : bool
+            Information on whether the epoch is the last one of the run
+
+        """
+        if self.error:
+            error, self.error = self.error, None
+            raise error
+        if epoch % self.interval != 0 and not last:
+            return False
+
+        checkpoint = {"model_state": {key: value.detach().to("cpu", copy=True)
+                                      for key, value in model.state_dict().items()},
+                      "optimizer_state": copy.deepcopy(optimizer.state_dict()),
+                      "metadata": {"model_size": self.model_size, "run_id": self.run_id, "epoch": epoch,
+                                   "metrics": dict(metrics)}}
+        self.queue.put((checkpoint, epoch, dict(metrics)))
+        return True
+
+    def run(self):
+        """
+        Writes the queued checkpoints until the manager is closed
+
+        """
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            try:
+                self.write(*item)
+            except Exception as write_exception:
+                self.error = write_exception
+
+    def write(self, checkpoint: dict, epoch: int, metrics: dict):
+        """
+        Writes a checkpoint and removes the checkpoints of this run that are neither among the best nor among the last
+        checkpoints.
+
+        """
+        path = os.path.join(self.memory_path, CHECKPOINT_NAME.format(run_id=self.run_id, epoch=epoch))
+        tmp_path = create_tmp_file(path)
+        try:
+            torch.save(checkpoint, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.checkpoints = [entry for entry in self.checkpoints if entry["path"] != path]
+        self.checkpoints.append({"epoch": epoch, "metrics": metrics, "path": path})
+
+        by_metric = sorted(self.checkpoints, key=lambda entry: (entry["metrics"].get(self.metric, float("-inf")),
+                                                                entry["epoch"]), reverse=True)
+        by_epoch = sorted(self.checkpoints, key=lambda entry: entry["epoch"], reverse=True)
+        kept = {entry["path"] for entry in by_metric[:self.keep_best] + by_epoch[:self.keep_last]}
+
+        for entry in self.checkpoints:
+            if entry["path"] not in kept and os.path.exists(entry["path"]):
+                os.remove(entry["path"])
+        self.checkpoints = [entry for entry in self.checkpoints if entry["path"] in kept]
+
+    def close(self, raise_error: bool = True):
+        """
+        Waits until all queued checkpoints are written. Raises the last error of the writer thread.
+
+        Parameter
+        ---------
+        raise_error : bool
+            Information on whether the error of the writer thread is raised or not (e.g. if the training already
+            failed with another exception)
+
+        """
+        self.queue.put(None)
+        self.thread.join()
+        if self.error and raise_error:
+            raise self.error
+
+    @staticmethod
+    def load(path: str):
+        """
+        Returns the model weights of a checkpoint or of a plain state dict file (models of former training runs)
+
+        Parameter
+        ---------
+        path : str
+            Memory path of the checkpoint
+
+        """
+        state = torch.load(path, map_location="cpu")
+        if "model_state" in state:
+            return state["model_state"]
+        return state
@@ -0,0 +1,369 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from P020_Backend.P021_Code.CloudArchive import is_archive, open_archive
+from P020_Backend.P021_Code.CloudFiles import create_tmp_file
+from P020_Backend.P021_Code.CloudProcessing import Cloud
+
+
+STORE_FOLDER = ".feature_store"
+FEATURES_FILE = "features.npy"
+MANIFEST_FILE = "manifest.csv"
+
+
+def get_features(filepath: str, voxel_size: int = 10, dtype: type = np.float64):
+    """
+    Loads a cutout point cloud and returns its min-max standardized heatmap
+
+    Parameter
+    ---------
+    filepath : str
+        Memory path of the cutout point cloud
+    voxel_size : int
+        The size of the voxels from which the heatmap is generated
+    dtype : type
+        The data type in which the points and the heatmap are processed
+
+    """
+    cloud = Cloud(dtype=dtype)
+    cloud.set(filepath, mmap=True)
+    features_np, _, _ = cloud.get_heatmap_array(voxel_size=voxel_size)
+    # Min-Max standardization
+    features_np = (features_np - np.min(features_np)) / (np.max(features_np) - np.min(features_np))
+
+    return features_np
+
+
+def try_get_features(filepath: str, voxel_size: int = 10, dtype: type = np.float64):
+    """
+    Returns the features of a cutout point cloud and None, or None and the error message if the cutout can not be
+    processed
+
+    Parameter
+    ---------
+    filepath : str
+        Memory path of the cutout point cloud
+    voxel_size : int
+        The size of the voxels from which the heatmap is generated
+    dtype : type
+        The data type in which the points and the heatmap are processed
+
+    """
+    try:
+        return get_features(filepath, voxel_size, dtype), None
+    except Exception as feature_exception:
+        return None, f"{type(feature_exception).__name__}: {feature_exception}"
+
+
+def extract_features(filepaths: list, voxel_size: int = 10, workers: int = 1, dtype: type = np.float64):
+    """
+    Computes the features of several cutout point clouds, in parallel processes if more than one worker is used.
+    The order of the features equals the order of the filepaths. A cutout that can not be processed does not abort the
+    extraction, its features are None and the error is reported in the failures.
+
+    Parameter
+    ---------
+    filepaths : list
+        Memory paths of the cutout point clouds
+    voxel_size : int
+        The size of the voxels from which the heatmaps are generated
+    workers : int
+        The number of processes (None: number of CPU cores)
+    dtype : type
+        The data type in which the points and the heatmaps are processed
+
+    Returns
+    -------
+    features : list
+        The features of every cutout (None if it failed)
+    failures : list
+        The filepath and error message of every failed cutout
+
+    """
+    if workers is None:
+        workers = os.cpu_count()
+    workers = min(workers, len(filepaths))
+
+    if workers > 1:
+        chunksize = max(1, len(filepaths) // (workers * 4))
+        # the workers are spawned, forking the multithreaded GUI process (tkinter, torch, loader thread) can deadlock
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            results = list(executor.map(try_get_features, filepaths, [voxel_size] * len(filepaths),
+                                        [dtype] * len(filepaths), chunksize=chunksize))
+    else:
+        results = [try_get_features(filepath, voxel_size, dtype) for filepath in filepaths]
+
+    features = [feature for feature, _ in results]
+    failures = [(filepath, message) for filepath, (_, message) in zip(filepaths, results) if message]
+    return features, failures
+
+
+class FeatureStore:
+    """
+    A class that manages the precomputed features of a cutout dataset. All heatmaps are stored in one memory mapped
+    array file (rotated to landscape format and zero padded to a common shape) and described by a manifest with the
+    filename, label, use case, original shape, rotation and the state of the source file of every cutout. The manifest
+    also contains the size and modification time of the feature file it was written for, so that a manifest and a
+    feature file of different builds (interrupted or concurrent build) are not used together.
+
+    ...
+
+    Attributes
+    ----------
+    feature_path : str
+        The path of the cutout dataset
+    store_path : str
+        The path where the feature and manifest file are stored
+    voxel_size : int
+        The size of the voxels from which the heatmaps are generated
+    dtype : str
+        The name of the data type in which the points and the heatmaps are processed
+    manifest : pd.DataFrame
+        The manifest of the stored features
+    features : np.memmap
+        The stored features (memory mapped)
+    failed_files : list
+        The filename and error message of every cutout that could not be processed in the last build
+
+    Methods
+    -------
+    build(results_file, workers)
+        Creates or incrementally updates the store for the cutouts listed in the results file
+    write_features(manifest, new_features)
+        Writes the feature file of the new manifest atomically and returns its state
+    write_manifest()
+        Writes the manifest file atomically
+    open()
+        Opens the feature and manifest file of the store
+    get(use_case)
+        Returns the equalized features and the labels of all cutouts of a use case
+
+    """
+
+    def __init__(self, feature_path: str, voxel_size: int = 10, store_path: str = None, dtype: type = np.float64):
+        """
+        Parameter
+        ---------
+        feature_path : str
+            The path of the cutout dataset (folder or archive)
+        voxel_size : int
+            The size of the voxels from which the heatmaps are generated
+        store_path : str
+            The path where the feature and manifest file are stored (default: hidden folder in the dataset, for an
+            archive in the hidden folder next to it)
+        dtype : type
+            The data type in which the points and the heatmaps are processed (the features are always stored as
+            float32)
+
+        """
+        self.feature_path = feature_path
+        if store_path:
+            self.store_path = store_path
+        elif is_archive(feature_path):
+            dirname, basename = os.path.split(os.path.abspath(feature_path))
+            self.store_path = os.path.join(dirname, STORE_FOLDER, basename)
+        else:
+            self.store_path = os.path.join(feature_path, STORE_FOLDER)
+        self.voxel_size = voxel_size
+        self.dtype = np.dtype(dtype).name
+        self.manifest = None
+        self.features = None
+        self.failed_files = []
+
+    def build(self, results_file: str, workers: int = 1):
+        """
+        Creates or incrementally updates the store for the cutouts listed in the results file. Only the heatmaps of
+        cutouts that are new or whose source file changed (size or modification time) since the last build are
+        computed, all others are taken from the existing store. Labels and use cases are always taken from the
+        results file. Cutouts that cannot be processed are left out and listed in the failed files.
+
+        Parameter
+        ---------
+        results_file : str
+            Memory path of the results csv file (not used for an archive, which contains its results)
+        workers : int
+            The number of processes used to compute the heatmaps
+
+        """
+        archive = is_archive(self.feature_path)
+        if archive:
+            results_df = open_archive(self.feature_path).results
+        else:
+            results_df = pd.read_csv(results_file, sep=";")
+        label_columns = list(results_df.columns[2:10])
+
+        stored = {}
+        if self.open():
+            valid = self.manifest["voxel_size"] == self.voxel_size
+            # stores of former versions were always computed in float64
+            dtypes = self.manifest["dtype"] if "dtype" in self.manifest else "float64"
+            valid &= dtypes == self.dtype
+            stored = {filename: ind for ind, filename in self.manifest.loc[valid, "filename"].items()}
+
+        self.failed_files = []
+        rows = []
+        for _, result in results_df.iterrows():
+            filename = result.iloc[0]
+            try:
+                # the cutouts of an archive change with the archive
+                stat = os.stat(self.feature_path if archive else os.path.join(self.feature_path, filename))
+            except OSError as stat_exception:
+                self.failed_files.append((filename, str(stat_exception)))
+                continue
+            row = {"filename": filename, "use_case": result["use_case"]}
+            row |= {column: result[column] for column in label_columns}
+
+            ind = stored.get(filename)
+            if ind is not None and self.manifest.at[ind, "file_size"] == stat.st_size and \
+                    self.manifest.at[ind, "file_mtime"] == stat.st_mtime_ns:
+                row |= self.manifest.loc[ind, ["height", "width", "rotated"]].to_dict()
+                row["source"] = ind
+            else:
+                row["source"] = -1
+
+            row |= {"file_size": stat.st_size, "file_mtime": stat.st_mtime_ns, "voxel_size": self.voxel_size,
+                    "dtype": self.dtype}
+            rows.append(row)
+
+        new_rows = [row for row in rows if row["source"] == -1]
+        filepaths = [os.path.join(self.feature_path, row["filename"]) for row in new_rows]
+        features, failures = extract_features(filepaths, self.voxel_size, workers, self.dtype)
+        self.failed_files += [(os.path.basename(filepath), message) for filepath, message in failures]
+        for row, feature in zip(new_rows, features):
+            if feature is not None:
+                row |= {"height": feature.shape[0], "width": feature.shape[1],
+                        "rotated": feature.shape[0] > feature.shape[1], "feature": feature}
+        rows = [row for row in rows if row["source"] != -1 or "feature" in row]
+        new_features = {ind: row.pop("feature") for ind, row in enumerate(rows) if "feature" in row}
+
+        manifest = pd.DataFrame(rows, columns=["filename", "use_case", *label_columns, "height", "width", "rotated",
+                                               "file_size", "file_mtime", "voxel_size", "dtype", "source"])
+        unchanged = (not new_features and self.manifest is not None and len(manifest) == len(self.manifest) and
+                     (manifest["source"].to_numpy() == np.arange(len(manifest))).all())
+        if unchanged:
+            manifest = manifest.drop(columns="source").assign(features_size=self.manifest["features_size"].to_numpy(),
+                                                              features_mtime=self.manifest["features_mtime"].to_numpy())
+            if not manifest.equals(self.manifest):
+                self.manifest = manifest
+                self.write_manifest()
+            return self
+
+        stat = self.write_features(manifest, new_features)
+        self.manifest = manifest.drop(columns="source").assign(features_size=stat.st_size,
+                                                               features_mtime=stat.st_mtime_ns)
+        self.write_manifest()
+        self.open()
+        return self
+
+    def write_features(self, manifest: pd.DataFrame, new_features: dict):
+        """
+        Writes the feature file of the new manifest atomically. Reused features are copied from the current store.
+        Returns the state (os.stat) of the written feature file, which it keeps when it is renamed.
+
+        Parameter
+        ---------
+        manifest : pd.DataFrame
+            The new manifest (including the index of the reused feature in the current store, -1 for new features)
+        new_features : dict
+            The newly computed features with their row in the new manifest as key
+
+        """
+        rotated = manifest["rotated"].to_numpy(dtype=bool)
+        heights = np.where(rotated, manifest["width"], manifest["height"])
+        widths = np.where(rotated, manifest["height"], manifest["width"])
+        shape = (len(manifest), int(heights.max(initial=0)), int(widths.max(initial=0)))
+
+        os.makedirs(self.store_path, exist_ok=True)
+        features_path = os.path.join(self.store_path, FEATURES_FILE)
+        tmp_path = create_tmp_file(features_path)
+        try:
+            features = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=shape)
+            for ind, source in enumerate(manifest["source"]):
+                if ind in new_features:
+                    feature = new_features[ind]
+                    if rotated[ind]:
+                        feature = np.rot90(feature)
+                else:
+                    feature = self.features[source, :heights[ind], :widths[ind]]
+                features[ind, :feature.shape[0], :feature.shape[1]] = feature
+            features.flush()
+            del features
+            stat = os.stat(tmp_path)
+
+            # release the memory map of the current store before it is replaced
+            self.features = None
+            os.replace(tmp_path, features_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return stat
+
+    def write_manifest(self):
+        """
+        Writes the manifest file atomically
+
+        """
+        manifest_path = os.path.join(self.store_path, MANIFEST_FILE)
+        tmp_path = create_tmp_file(manifest_path)
+        try:
+            self.manifest.to_csv(tmp_path, sep=";", index=False)
+            os.replace(tmp_path, manifest_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def open(self):
+        """
+        Opens the feature and manifest file of the store. Returns False if the store does not exist or is
+        inconsistent (e.g. the manifest was written for another feature file or by a former version without the state
+        of the feature file).
+
+        """
+        manifest_path = os.path.join(self.store_path, MANIFEST_FILE)
+        features_path = os.path.join(self.store_path, FEATURES_FILE)
+        if not os.path.exists(manifest_path) or not os.path.exists(features_path):
+            return False
+
+        try:
+            manifest = pd.read_csv(manifest_path, sep=";")
+            features = np.load(features_path, mmap_mode="r")
+            stat = os.stat(features_path)
+        except (OSError, ValueError):
+            return False
+        if features.ndim != 3 or features.shape[0] != len(manifest):
+            return False
+        if "features_size" not in manifest or "features_mtime" not in manifest or \
+                (manifest["features_size"] != stat.st_size).any() or \
+                (manifest["features_mtime"] != stat.st_mtime_ns).any():
+            return False
+
+        self.manifest = manifest
+        self.features = features
+        return True
+
+    def get(self, use_case: str = "train"):
+        """
+        Returns the features and the labels of all cutouts of a use case. The features are padded to the largest shape
+        among the selected cutouts.
+
+        Parameter
+        ---------
+        use_case : str
+            The use case of the cutouts ("train" or "test")
+
+        """
+        selected = (self.manifest["use_case"] == use_case).to_numpy()
+        manifest = self.manifest.loc[selected]
+        label = manifest.iloc[:, 2:10].to_numpy()
+
+        rotated = manifest["rotated"].to_numpy(dtype=bool)
+        heights = np.where(rotated, manifest["width"], manifest["height"])
+        widths = np.where(rotated, manifest["height"], manifest["width"])
+        features = self.features[np.flatnonzero(selected), :heights.max(initial=0), :widths.max(initial=0)]
+
+        return np.asarray(features), label
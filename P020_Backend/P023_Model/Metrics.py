@@ -0,0 +1,106 @@
+import numpy as np
+
+
+class StreamingMetrics:
+    """
+    A class that accumulates the classification results of a loop in a running confusion matrix (rows: true class,
+    columns: predicted class). Every update and every metric only depends on the number of classes, not on the number
+    of samples seen so far.
+
+    ...
+
+    Attributes
+    ----------
+    n_classes : int
+        The number of classes
+    matrix : np.ndarray
+        The running confusion matrix (integer counts)
+
+    Methods
+    -------
+    reset()
+        Resets the confusion matrix (e.g. at the start of every epoch)
+    update(true_idx, pred_idx)
+        Adds the true and predicted class indices of a batch
+    count()
+        Returns the number of samples seen since the last reset
+    accuracy()
+        Returns the accuracy
+    precision()
+        Returns the macro averaged precision over all classes
+    f1()
+        Returns the macro averaged f1-score over all classes
+    confusion_matrix()
+        Returns a copy of the confusion matrix
+
+    """
+
+    def __init__(self, n_classes: int = 8):
+        self.n_classes = n_classes
+        self.matrix = np.zeros((n_classes, n_classes), dtype=np.int64)
+
+    def reset(self):
+        """
+        Resets the confusion matrix (e.g. at the start of every epoch)
+
+        """
+        self.matrix[:] = 0
+
+    def update(self, true_idx, pred_idx):
+        """
+        Adds the true and predicted class indices of a batch
+
+        Parameter
+        ---------
+        true_idx : Any
+            The true class indices (int or array)
+        pred_idx : Any
+            The predicted class indices (int or array)
+
+        """
+        true_idx = np.asarray(true_idx, dtype=np.int64).ravel()
+        pred_idx = np.asarray(pred_idx, dtype=np.int64).ravel()
+        counts = np.bincount(true_idx * self.n_classes + pred_idx, minlength=self.n_classes ** 2)
+        self.matrix += counts.reshape(self.n_classes, self.n_classes)
+
+    def count(self):
+        """
+        Returns the number of samples seen since the last reset
+
+        """
+        return int(self.matrix.sum())
+
+    def accuracy(self):
+        """
+        Returns the accuracy (0 if no sample was seen)
+
+        """
+        total = self.matrix.sum()
+        return float(np.trace(self.matrix) / total) if total else 0.0
+
+    def precision(self):
+        """
+        Returns the macro averaged precision over all classes (classes without predictions count as 0)
+
+        """
+        true_positives = np.diag(self.matrix)
+        predicted = self.matrix.sum(axis=0)
+        precision = np.divide(true_positives, predicted, out=np.zeros(self.n_classes), where=predicted > 0)
+        return float(precision.mean())
+
+    def f1(self):
+        """
+        Returns the macro averaged f1-score over all classes (classes without true or predicted samples count as 0)
+
+        """
+        true_positives = np.diag(self.matrix)
+        denominator = self.matrix.sum(axis=0) + self.matrix.sum(axis=1)
+        f1 = np.divide(2 * true_positives, denominator, out=np.zeros(self.n_classes), where=denominator > 0)
+        return float(f1.mean())
+
+    def confusion_matrix(self):
+        """
+        Returns a copy of the confusion matrix
+
+        """
+        return self.matrix.copy()
@@ -1,33 +1,54 @@
+import argparse
 import os
+import time
 
-import numpy.exceptions
 import torch
 import torch.nn as nn
 from torch.utils.data import Dataset, random_split
 import pandas as pd
 from torch.utils.data import DataLoader
 import numpy as np
-from sklearn.metrics import accuracy_score, precision_score, confusion_matrix, f1_score
-from P020_Backend.P021_Code.CloudProcessing import Cloud
+from P020_Backend.P021_Code.CloudArchive import is_archive, open_archive
+from P020_Backend.P023_Model.Callbacks import Callback, ConsoleCallback
+from P020_Backend.P023_Model.Checkpoints import CheckpointManager
+from P020_Backend.P023_Model.Metrics import StreamingMetrics
+from P020_Backend.P023_Model.FeatureStore import FeatureStore, extract_features, get_features
 
 
 class PointCloudSet(Dataset):
 
-    def __init__(self, results_file, feature_path, train: bool = True):
+    def __init__(self, results_file, feature_path, train: bool = True, use_store: bool = True, workers: int = 1,
+                 dtype: type = np.float64):
         super().__init__()
 
-        results_df = pd.read_csv(results_file, sep=";")
         self.path_to_feature_files = feature_path
-        if train:
-            self.feature_files = results_df.loc[results_df["use_case"] == "train"].iloc[:, 0].to_numpy()
-            self.label = results_df.loc[results_df["use_case"] == "train"].iloc[:, 2:10].to_numpy()
+        # float32 halves the memory of the points and heatmaps and matches the tensors of the network
+        self.dtype = dtype
+        use_case = "train" if train else "test"
+        if use_store:
+            # features are taken from the precomputed feature store, only new or changed cutouts are processed
+            store = FeatureStore(feature_path, dtype=dtype).build(results_file, workers=workers)
+            self.features, self.label = store.get(use_case)
+            self.feature_files = store.manifest.loc[store.manifest["use_case"] == use_case, "filename"].to_numpy()
+            self.failed_files = store.failed_files
+            return
+
+        # a packed archive contains the results, its cutouts are read as archive path joined with the filename
+        if is_archive(feature_path):
+            results_df = open_archive(feature_path).results
         else:
-            self.feature_files = results_df.loc[results_df["use_case"] == "test"].iloc[:, 0].to_numpy()
-            self.label = results_df.loc[results_df["use_case"] == "test"].iloc[:, 2:10].to_numpy()
-
-        self.features = []
-        for feature_file in self.feature_files:
-            self.features.append(self.get_features(feature_file))
+            results_df = pd.read_csv(results_file, sep=";")
+        self.feature_files = results_df.loc[results_df["use_case"] == use_case].iloc[:, 0].to_numpy()
+        self.label = results_df.loc[results_df["use_case"] == use_case].iloc[:, 2:10].to_numpy()
+
+        filepaths = [os.path.join(self.path_to_feature_files, feature_file) for feature_file in self.feature_files]
+        features, failures = extract_features(filepaths, workers=workers, dtype=dtype)
+        self.failed_files = [(os.path.basename(filepath), message) for filepath, message in failures]
+        # cutouts that could not be processed are left out of the dataset
+        processed = np.array([feature is not None for feature in features], dtype=bool)
+        self.feature_files = self.feature_files[processed]
+        self.label = self.label[processed]
+        self.features = [feature for feature in features if feature is not None]
         self.equalize_shapes()
 
     def equalize_shapes(self):
@@ -46,15 +67,8 @@ class PointCloudSet(Dataset):
         self.features = np.asarray(self.features)
 
     def get_features(self, feature_file):
-        cloud = Cloud()
         filepath = os.path.join(self.path_to_feature_files, feature_file)
-        cloud.set(filepath)
-        df = cloud.get_heatmap(voxel_size=10)
-        features_np = df.to_numpy()
-        # Min-Max standardization
-        features_np = (features_np - np.min(features_np)) / (np.max(features_np) - np.min(features_np))
-
-        return features_np
+        return get_features(filepath, dtype=self.dtype)
 
     def __len__(self):
         return len(self.label)
@@ -82,8 +96,9 @@ class Network(nn.Module):
 
         self.flatten = nn.Flatten()
         self.model = self.get_model(model_size)
+        self.model_size = model_size
         if model:
-            self.model.load_state_dict(torch.load(model))
+            self.model.load_state_dict(CheckpointManager.load(model))
         self.device = "cpu"
         if torch.cuda.is_available():
             self.device = "cuda"
@@ -124,94 +139,78 @@ class Network(nn.Module):
         x = self.flatten(x)
         return self.model(x)
 
-    def perform_training(self, train_loader, valid_loader, frame=None, epochs=500, memory_path=os.getcwd()):
-        loss_history = []
-        train_predictions = np.array([])
-        train_labels = np.array([])
-
-        valid_predictions = np.array([])
-        valid_labels = np.array([])
-
-        frame.results.clear_all()
-        frame.options.disable_start_training()
-        frame.results.set_status("Training gestartet")
-
-        for t in range(epochs):
-            message = f"\nEpoche {t + 1}\n---------------------------------------------------------"
-            frame.results.update_console(message)
-
-            # Perform training
-            self.model.train()
-            for batch_nb, (X, y), in enumerate(train_loader):
-                # get true label
-                det_y = y.cpu().detach().numpy().squeeze()
-                try:
-                    true_idx = det_y.argmax(1)
-                except numpy.exceptions.AxisError:
-                    true_idx = det_y.argmax()
-                train_labels = np.append(train_labels, self.all_labels[true_idx])
-
-                # compute prediction
-                y_pred = self(X)
-                det_y_pred = y_pred.cpu().detach().numpy().squeeze()
-                try:
-                    pred_idx = det_y_pred.argmax(1)
-                except numpy.exceptions.AxisError:
-                    pred_idx = det_y_pred.argmax()
-                train_predictions = np.append(train_predictions, self.all_labels[pred_idx])
-
-                # compute loss
-                loss = self.loss_fn(y_pred, y)
-
-                # reset gradients before iteration
-                self.optimizer.zero_grad()
-                # performe backward step (calculate gradients)
-                loss.backward()
-                # update model weights with gradients
-                self.optimizer.step()
-
-                loss, passed_batches = loss.item(), batch_nb * len(X)
-                if passed_batches % 10 == 0:
-                    message = f"loss: {loss:>7f}, passed batches: [{passed_batches:>5d}/{len(train_loader.dataset):>5d}]"
-                    frame.results.update_console(message)
-                    frame.results.update_progress(t/epochs*100)
-                    loss_history.append(loss)
-
-                if t % 10 == 0:
-                    file_path = os.path.join(memory_path, f"GraspDirection_Model_Epoch_{t}.pth")
-                    torch.save(self.model.state_dict(), file_path)
-
-            # Perform validation
-            self.model.eval()
-            for batch_nb, (X, y), in enumerate(valid_loader):
-                # Get true labels
-                det_y = y.cpu().detach().numpy().squeeze()
-                try:
-                    true_idx = np.argmax(det_y, axis=1)
-                except np.exceptions.AxisError:
-                    true_idx = np.argmax(det_y)
-                valid_labels = np.append(valid_labels, self.all_labels[true_idx])
-
-                # Get prediction
-                y_pred = self(X)
-                det_y_pred = y_pred.cpu().detach().numpy().squeeze()
-                try:
-                    pred_idx = np.argmax(det_y_pred, axis=1)
-                except np.exceptions.AxisError:
-                    pred_idx = np.argmax(det_y_pred)
-                valid_predictions = np.append(valid_predictions, self.all_labels[pred_idx])
-
-            train_accuracy = accuracy_score(train_labels, train_predictions)
-            valid_accuracy = accuracy_score(valid_labels, valid_predictions)
-            frame.results.update_training_history(loss_history, train_accuracy, valid_accuracy)
-
-            if frame.options.stop.get():
-                frame.options.enable_start_training()
-                frame.results.set_status("Training beendet")
-                break
+    def perform_training(self, train_loader, valid_loader, callback: Callback = None, epochs=500,
+                         memory_path=os.getcwd(), checkpoints: CheckpointManager = None, failed_files: list = None):
+        if callback is None:
+            callback = Callback()
+        if checkpoints is None:
+            checkpoints = CheckpointManager(memory_path, self.model_size)
 
-        frame.options.enable_start_training()
-        frame.results.set_status("Training beendet")
+        loss_history = []
+        train_metrics = StreamingMetrics(len(self.all_labels))
+        valid_metrics = StreamingMetrics(len(self.all_labels))
+
+        callback.on_start()
+        # the files that could not be prepared are reported after the start, which resets the frontend
+        for filename, message in failed_files or []:
+            callback.on_message(f"Fehler bei {filename}: {message}")
+
+        try:
+            for t in range(epochs):
+                message = f"\nEpoche {t + 1}\n---------------------------------------------------------"
+                callback.on_message(message)
+                train_metrics.reset()
+                valid_metrics.reset()
+
+                # Perform training
+                self.model.train()
+                for batch_nb, (X, y), in enumerate(train_loader):
+                    # compute prediction
+                    y_pred = self(X)
+                    train_metrics.update(y.argmax(dim=1).cpu().numpy(), y_pred.detach().argmax(dim=1).cpu().numpy())
+
+                    # compute loss
+                    loss = self.loss_fn(y_pred, y)
+
+                    # reset gradients before iteration
+                    self.optimizer.zero_grad()
+                    # performe backward step (calculate gradients)
+                    loss.backward()
+                    # update model weights with gradients
+                    self.optimizer.step()
+
+                    loss, passed_batches = loss.item(), batch_nb * len(X)
+                    if passed_batches % 10 == 0:
+                        message = (f"loss: {loss:>7f}, passed batches: "
+                                   f"[{passed_batches:>5d}/{len(train_loader.dataset):>5d}]")
+                        callback.on_message(message)
+                        callback.on_progress(t/epochs*100)
+                        loss_history.append(loss)
+
+                # Perform validation
+                self.model.eval()
+                for batch_nb, (X, y), in enumerate(valid_loader):
+                    y_pred = self(X)
+                    valid_metrics.update(y.argmax(dim=1).cpu().numpy(), y_pred.detach().argmax(dim=1).cpu().numpy())
+
+                train_accuracy = train_metrics.accuracy()
+                valid_accuracy = valid_metrics.accuracy()
+                callback.on_epoch_end(t, loss_history, train_accuracy, valid_accuracy)
+                # the last epoch of the run (finished or stopped) is always saved
+                stop = callback.should_stop()
+                checkpoints.save(t, self.model, self.optimizer,
+                                 {"train_accuracy": train_accuracy, "valid_accuracy": valid_accuracy,
+                                  "loss": loss_history[-1] if loss_history else None}, last=stop or t == epochs - 1)
+
+                if stop:
+                    break
+        except BaseException:
+            # the queued checkpoints are written and the writer thread ends also if the training fails, an error of
+            # the writer does not replace the exception of the training
+            checkpoints.close(raise_error=False)
+            raise
+        checkpoints.close()
+        callback.on_end()
 
     def hardmax(self, array):
         max_ind = np.argmax(array)
@@ -219,44 +218,126 @@ class Network(nn.Module):
         hardmax[max_ind] = 1
         return hardmax
 
-    def perform_test(self, dataloader, frame=None):
-        frame.options.disable_start_test()
-        frame.results.clear_all()
-        frame.results.set_status("Test gestartet")
+    def perform_test(self, dataloader, callback: Callback = None, refresh_batches: int = None,
+                     refresh_interval: float = 0.25, failed_files: list = None):
+        if callback is None:
+            callback = Callback()
+
+        callback.on_start()
+        # the test set does not contain the files that could not be prepared
+        if failed_files:
+            callback.on_message(f"Fehler bei {len(failed_files)} Dateien: "
+                                f"{', '.join(filename for filename, _ in failed_files)}")
 
         self.model.eval()
 
-        predictions = np.array([])
-        labels = np.array([])
-        for batch_nb, (X, y) in enumerate(dataloader):
-            # Labels
-            det_y = y.cpu().detach().numpy().squeeze()
-            try:
-                true_idx = np.argmax(det_y, axis=1)
-            except np.exceptions.AxisError:
-                true_idx = np.argmax(det_y)
-            labels = np.append(labels, self.all_labels[true_idx])
-            # Predictions
-            y_pred = self(X)
-            det_y_pred = y_pred.cpu().detach().numpy().squeeze()
-            try:
-                pred_idx = np.argmax(det_y_pred, axis=1)
-            except np.exceptions.AxisError:
-                pred_idx = np.argmax(det_y_pred)
-            predictions = np.append(predictions, self.all_labels[pred_idx])
-            accuracy = accuracy_score(labels, predictions)
-            # precision = precision_score(labels, predictions, average="macro")
-            f1 = f1_score(labels, predictions, labels=self.all_labels, average="macro", zero_division=0.0)
-            conf_matrix = confusion_matrix(list(labels), list(predictions), labels=self.all_labels)
-            df_cm = pd.DataFrame(conf_matrix, self.all_labels, self.all_labels)
-            frame.results.update_progress(batch_nb / len(dataloader) * 100)
-            frame.results.update_test_history(batch_nb, f1, accuracy, df_cm)
-
-            if frame.options.stop.get():
-                frame.options.enable_start_test()
-                frame.results.set_status("Test beendet")
-                break
-
-        frame.options.enable_start_test()
-        frame.results.reset_progress()
-        frame.results.set_status("Test beendet")
+        metrics = StreamingMetrics(len(self.all_labels))
+        last_refresh = time.perf_counter()
+        with torch.inference_mode():
+            for batch_nb, (X, y) in enumerate(dataloader):
+                y_pred = self(X)
+                metrics.update(y.argmax(dim=1).cpu().numpy(), y_pred.argmax(dim=1).cpu().numpy())
+
+                # the results are only passed at the refresh rate, but always after the last batch
+                stop = callback.should_stop()
+                now = time.perf_counter()
+                refresh = now - last_refresh >= refresh_interval
+                if refresh_batches:
+                    refresh = refresh or (batch_nb + 1) % refresh_batches == 0
+                if refresh or stop or batch_nb == len(dataloader) - 1:
+                    last_refresh = now
+                    accuracy = metrics.accuracy()
+                    # precision = metrics.precision()
+                    f1 = metrics.f1()
+                    df_cm = pd.DataFrame(metrics.confusion_matrix(), self.all_labels, self.all_labels)
+                    callback.on_progress(metrics.count() / len(dataloader.dataset) * 100)
+                    callback.on_test_update(metrics.count() - 1, f1, accuracy, df_cm)
+
+                if stop:
+                    break
+
+        callback.on_end()
+
+
+def train_network(results_file, feature_path, kernel_size, memory_path, epochs=500, callback: Callback = None,
+                  workers: int = 1, batch_size: int = 10, checkpoint_interval: int = 10, keep_best: int = 3,
+                  keep_last: int = 3, dtype: type = np.float64):
+    """
+    Trains a network on a cutout dataset without any frontend. The progress, metrics and stop signal are exchanged
+    through the callback.
+
+    Parameter
+    ---------
+    results_file : str
+        Memory path of the results csv file
+    feature_path : str
+        The path of the cutout dataset
+    kernel_size : str
+        Kernel size used to cut out the point clouds (selects the model type)
+    memory_path : str
+        Memory path for the model
+    epochs : int
+        The number of training epochs
+    callback : Callback
+        The callback receiving the training events
+    workers : int
+        The number of processes used to prepare the features
+    batch_size : int
+        The batch size of the training data
+    checkpoint_interval : int
+        The number of epochs between two checkpoints
+    keep_best : int
+        The number of checkpoints with the best validation accuracy that are kept
+    keep_last : int
+        The number of last checkpoints that are kept
+    dtype : type
+        The data type in which the point clouds and heatmaps are processed
+
+    """
+    if callback is None:
+        callback = Callback()
+
+    callback.on_message("Vorbereiten der Feature Dateien")
+    training_set = PointCloudSet(results_file, feature_path, workers=workers, dtype=dtype)
+    failed_files = training_set.failed_files
+
+    training_set, valid_set = random_split(training_set, [0.8, 0.2])
+
+    train_loader = DataLoader(training_set, batch_size=batch_size, shuffle=True)
+    valid_loader = DataLoader(valid_set, batch_size=len(valid_set))
+
+    nn = Network(kernel_size)
+    checkpoints = CheckpointManager(memory_path, kernel_size, interval=checkpoint_interval, keep_best=keep_best,
+                                    keep_last=keep_last)
+    nn.perform_training(train_loader, valid_loader, callback=callback, epochs=epochs, memory_path=memory_path,
+                        checkpoints=checkpoints, failed_files=failed_files)
+
+    return nn
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trains a grasp direction network on a cutout dataset")
+    parser.add_argument("feature_path", help="Path of the cutout dataset (e.g. Cutout_3x3 or Cutout_3x3.cpack)")
+    parser.add_argument("--results", help="Results csv file (default: Cutout_<kernel>_Results_Labeled.csv)")
+    parser.add_argument("--kernel-size", help="Kernel size (default: taken from the dataset folder name)")
+    parser.add_argument("--memory-path", default=os.getcwd(), help="Memory path for the models")
+    parser.add_argument("--epochs", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--checkpoint-interval", type=int, default=10)
+    parser.add_argument("--keep-best", type=int, default=3)
+    parser.add_argument("--keep-last", type=int, default=3)
+    parser.add_argument("--float32", action="store_true", help="Process the point clouds and heatmaps in float32")
+    args = parser.parse_args()
+
+    kernel = args.kernel_size
+    if not kernel:
+        kernel = os.path.splitext(os.path.basename(os.path.normpath(args.feature_path)))[0].split("_")[-1]
+    results = args.results
+    if not results:
+        results = os.path.join(args.feature_path, f"Cutout_{kernel}_Results_Labeled.csv")
+
+    train_network(results, args.feature_path, kernel, args.memory_path, epochs=args.epochs,
+                  callback=ConsoleCallback(), workers=args.workers, batch_size=args.batch_size,
+                  checkpoint_interval=args.checkpoint_interval, keep_best=args.keep_best, keep_last=args.keep_last,
+                  dtype=np.float32 if args.float32 else np.float64)
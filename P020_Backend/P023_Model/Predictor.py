@@ -0,0 +1,228 @@
+import argparse
+import time
+
+import numpy as np
+import torch
+from P020_Backend.P021_Code.CloudProcessing import Cloud, get_box_mask, get_voxel_data, get_heatmap_grid
+from P020_Backend.P023_Model.Model import Network
+
+
+# size of one kernel element (matrix cell of the cutout rectangle, see CloudPlots.add_draggable_rect)
+COL_WIDTH = 80
+ROW_HEIGHT = 50
+# points below this height are removed when a cloud is loaded (see Cloud.set)
+Z_THRESHOLD = -2.5
+
+
+class GraspPredictor:
+    """
+    A class that predicts the grasp direction of a pick point in a raw point cloud in memory. It runs the same steps as
+    the labeling and test workflow (cutout around the pick point, heatmap, min-max standardization, rotation to
+    landscape format and zero padding, network) without writing any file and without the frontend, so that it can be
+    called repeatedly (e.g. by a robot cell).
+
+    ...
+
+    Attributes
+    ----------
+    network : Network
+        The network used for the prediction
+    kernel_size : str
+        The kernel size of the network (e.g. "3x3")
+    voxel_size : int
+        The size of the voxels from which the heatmap is generated
+    input_shape : tuple
+        The shape (rows, columns) of the heatmap expected by the network
+
+    Methods
+    -------
+    get_input_shape(kernel_size, voxel_size)
+        Returns the heatmap shape of a cutout of the given kernel size
+    get_cutout_bounds(points, pick_x, pick_y, rotated)
+        Returns the bounding box of the cutout around the pick point
+    get_input(heatmap)
+        Returns the network input of a heatmap
+    predict(cloud, pick_x, pick_y, rotated)
+        Predicts the grasp direction scores of a pick point and measures the latency of every step
+
+    """
+
+    def __init__(self, model, kernel_size: str = "3x3", voxel_size: int = 10):
+        """
+        Parameter
+        ---------
+        model : str | Network
+            Memory path of the model or an already loaded network
+        kernel_size : str
+            The kernel size of the network (e.g. "3x3")
+        voxel_size : int
+            The size of the voxels from which the heatmap is generated (must match the training data)
+
+        """
+        if isinstance(model, Network):
+            self.network = model
+        else:
+            self.network = Network(kernel_size, model=model)
+        self.network.model.eval()
+        self.kernel_size = kernel_size
+        self.voxel_size = voxel_size
+
+        self.input_shape = self.get_input_shape(kernel_size, voxel_size)
+        in_features = self.network.model[0].in_features
+        if self.input_shape[0] * self.input_shape[1] != in_features:
+            raise ValueError(f"The heatmap shape {self.input_shape} does not match the {in_features} input features of "
+                             f"the {kernel_size} network")
+
+    @staticmethod
+    def get_input_shape(kernel_size: str, voxel_size: int = 10):
+        """
+        Returns the heatmap shape (rows, columns) of a cutout of the given kernel size in landscape format
+
+        Parameter
+        ---------
+        kernel_size : str
+            The kernel size (e.g. "3x3")
+        voxel_size : int
+            The size of the voxels from which the heatmap is generated
+
+        """
+        n_rows, n_cols = (int(n) for n in kernel_size.split("x"))
+        return ROW_HEIGHT * n_rows // voxel_size + 1, COL_WIDTH * n_cols // voxel_size + 1
+
+    def get_cutout_bounds(self, points: np.ndarray, pick_x: float, pick_y: float, rotated: bool = False):
+        """
+        Returns the bounding box (x1, y1, x2, y2) of the cutout centered at the pick point. Like the draggable
+        rectangle, the box is moved inside the cloud if it crosses the boundaries.
+
+        Parameter
+        ---------
+        points : np.ndarray
+            The points of the cloud
+        pick_x : float
+            x-coordinate of the pick point
+        pick_y : float
+            y-coordinate of the pick point
+        rotated : bool
+            Information on whether the cutout is rotated (portrait format) or not
+
+        """
+        n_rows, n_cols = (int(n) for n in self.kernel_size.split("x"))
+        width, height = COL_WIDTH * n_cols, ROW_HEIGHT * n_rows
+        if rotated:
+            width, height = height, width
+
+        min_bound = points[:, :2].min(axis=0)
+        max_bound = points[:, :2].max(axis=0)
+        cx = min(max(pick_x, min_bound[0] + width / 2), max_bound[0] - width / 2)
+        cy = min(max(pick_y, min_bound[1] + height / 2), max_bound[1] - height / 2)
+
+        return cx - width / 2, cy - height / 2, cx + width / 2, cy + height / 2
+
+    def get_input(self, heatmap: np.ndarray):
+        """
+        Returns the network input of a heatmap: min-max standardized, rotated to landscape format and zero padded (or
+        cut) to the input shape of the network
+
+        Parameter
+        ---------
+        heatmap : np.ndarray
+            The heatmap values (rows: y-coordinates, columns: x-coordinates)
+
+        """
+        features = (heatmap - np.min(heatmap)) / (np.max(heatmap) - np.min(heatmap))
+        if features.shape[0] > features.shape[1]:
+            features = np.rot90(features)
+
+        rows, cols = self.input_shape
+        features_in = np.zeros((1, rows, cols), dtype=np.float32)
+        features = features[:rows, :cols]
+        features_in[0, :features.shape[0], :features.shape[1]] = features
+        return features_in
+
+    def predict(self, cloud, pick_x: float, pick_y: float, rotated: bool = False):
+        """
+        Predicts the grasp direction scores of a pick point and measures the latency of every step
+
+        Parameter
+        ---------
+        cloud : str | np.ndarray
+            Memory path of the point cloud (csv, npy, ply or npz) or its points (x-, y- and z-coordinates)
+        pick_x : float
+            x-coordinate of the pick point
+        pick_y : float
+            y-coordinate of the pick point
+        rotated : bool
+            Information on whether the cutout is rotated (portrait format) or not
+
+        Returns
+        -------
+        result : dict
+            The predicted direction, the scores (softmax) of all directions and the latency of every step in ms
+
+        """
+        latency = {}
+        start = time.perf_counter()
+
+        def lap(stage):
+            nonlocal start
+            now = time.perf_counter()
+            latency[stage] = (now - start) * 1000
+            start = now
+
+        if isinstance(cloud, str):
+            pcd_cloud = Cloud()
+            pcd_cloud.set(cloud)
+            points = pcd_cloud.get_points()
+        else:
+            points = np.asarray(cloud, dtype=np.float64)
+        lap("load")
+
+        points = points[points[:, 2] > Z_THRESHOLD]
+        x1, y1, x2, y2 = self.get_cutout_bounds(points, pick_x, pick_y, rotated)
+        points = points[get_box_mask(points, x1, y1, x2, y2)]
+        if not len(points):
+            raise ValueError(f"The cutout at ({pick_x}, {pick_y}) does not contain any points")
+        lap("crop")
+
+        heatmap, _, _ = get_heatmap_grid(get_voxel_data(points, self.voxel_size))
+        lap("heatmap")
+
+        features = self.get_input(heatmap)
+        lap("features")
+
+        with torch.inference_mode():
+            x = torch.from_numpy(features).to(self.network.device)
+            scores = torch.softmax(self.network(x), dim=1)[0].cpu().numpy()
+        lap("model")
+
+        latency["total"] = sum(latency.values())
+        labels = self.network.all_labels
+        return {"direction": labels[int(np.argmax(scores))],
+                "scores": {label: float(score) for label, score in zip(labels, scores)},
+                "bounds": (x1, y1, x2, y2),
+                "latency": latency}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Predicts the grasp direction of a pick point in a point cloud")
+    parser.add_argument("cloud", help="Point cloud file (csv, npy, ply or npz)")
+    parser.add_argument("model", help="Model file (.pth)")
+    parser.add_argument("pick_x", type=float)
+    parser.add_argument("pick_y", type=float)
+    parser.add_argument("--kernel-size", default="3x3")
+    parser.add_argument("--voxel-size", type=int, default=10)
+    parser.add_argument("--rotated", action="store_true")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of predictions (latency of the last one)")
+    args = parser.parse_args()
+
+    predictor = GraspPredictor(args.model, args.kernel_size, args.voxel_size)
+    points_in = Cloud()
+    points_in.set(args.cloud)
+    points_in = points_in.get_points()
+    for _ in range(args.repeat):
+        prediction = predictor.predict(points_in, args.pick_x, args.pick_y, args.rotated)
+
+    print(f"Richtung: {prediction['direction']}")
+    for direction, score in prediction["scores"].items():
+        print(f"{direction:>3}: {score:.4f}")
+    print(", ".join(f"{stage} {ms:.2f} ms" for stage, ms in prediction["latency"].items()))
@@ -0,0 +1,74 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from P020_Backend.P021_Code.CloudArchive import open_archive, pack_cutouts
+from P020_Backend.P021_Code.CloudConversion import RESULTS_SUFFIX, read_points
+from P020_Backend.P023_Model.Model import PointCloudSet
+
+
+def read_folder(cutout_path: str):
+    """
+    Lists the dataset folder and reads every cutout of the results file (one open per file)
+
+    """
+    results_file = [filename for filename in os.listdir(cutout_path) if filename.endswith(RESULTS_SUFFIX)][0]
+    filenames = np.genfromtxt(os.path.join(cutout_path, results_file), delimiter=";", dtype=str, skip_header=1,
+                              usecols=0)
+    return [read_points(os.path.join(cutout_path, filename)) for filename in filenames]
+
+
+def read_archive(archive_path: str):
+    """
+    Opens the archive and reads every cutout (one open for the whole dataset)
+
+    """
+    archive = open_archive(archive_path)
+    return [np.array(archive.get_points(filename)) for filename in archive.filenames]
+
+
+def measure(function, *args):
+    """
+    Returns the result and the runtime in seconds of the function call
+
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def run(cutout_path: str, workers: int):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        (archive_path, failures), pack_time = measure(pack_cutouts, cutout_path,
+                                                      os.path.join(tmp_dir, "cutouts.cpack"))
+        n_files = len([filename for filename in os.listdir(cutout_path) if not filename.startswith(".")])
+        folder_size = sum(os.path.getsize(os.path.join(cutout_path, filename)) for filename in os.listdir(cutout_path)
+                          if os.path.isfile(os.path.join(cutout_path, filename)))
+
+        print(f"Dataset {cutout_path}: {n_files} files, {folder_size / 1e6:.1f} MB, archive "
+              f"{os.path.getsize(archive_path) / 1e6:.1f} MB (packed in {pack_time:.3f} s, {len(failures)} failed)")
+        folder_points, folder_time = measure(read_folder, cutout_path)
+        archive_points, archive_time = measure(read_archive, archive_path)
+        equal = len(folder_points) == len(archive_points) and all(
+            np.allclose(a, b, atol=1e-3) for a, b in zip(folder_points, archive_points))
+        print(f"{'':>24} {'folder [s]':>11} {'archive [s]':>12} {'speedup':>8}")
+        print(f"{'read all cutouts':>24} {folder_time:>11.3f} {archive_time:>12.3f} "
+              f"{folder_time / archive_time:>7.1f}x   equal: {equal}")
+
+        results_file = [filename for filename in os.listdir(cutout_path) if filename.endswith(RESULTS_SUFFIX)][0]
+        folder_set, folder_time = measure(PointCloudSet, os.path.join(cutout_path, results_file), cutout_path, True,
+                                          False, workers)
+        archive_set, archive_time = measure(PointCloudSet, None, archive_path, True, False, workers)
+        print(f"{'PointCloudSet (no store)':>24} {folder_time:>11.3f} {archive_time:>12.3f} "
+              f"{folder_time / archive_time:>7.1f}x   equal: {np.allclose(folder_set.features, archive_set.features)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares reading a cutout dataset folder and its packed archive")
+    parser.add_argument("cutout_path", help="Dataset folder (e.g. Cutout_3x3)")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    run(args.cutout_path, args.workers)
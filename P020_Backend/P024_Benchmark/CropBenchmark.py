@@ -0,0 +1,64 @@
+import argparse
+import copy
+import time
+
+import numpy as np
+import open3d
+from P020_Backend.P021_Code.CloudProcessing import Cloud
+from P020_Backend.P024_Benchmark.VoxelBenchmark import create_bin_cloud
+
+
+def crop_chained(cloud: Cloud, x1: float, y1: float, x2: float, y2: float):
+    """
+    The former crop of the cut event (four chained threshold removals, each selecting the points directly), kept as
+    benchmark reference
+
+    """
+    for ax, threshold, comparison in [(0, x1, np.greater_equal), (0, x2, np.less_equal), (1, y1, np.greater_equal),
+                                      (1, y2, np.less_equal)]:
+        points = np.asarray(cloud.source.points)
+        cloud.set_pcd(cloud.source.select_by_index(np.where(comparison(points[:, ax], threshold))[0]))
+
+
+def crop_fused(cloud: Cloud, x1: float, y1: float, x2: float, y2: float):
+    cloud.crop(x1, y1, x2, y2)
+    cloud.get()
+
+
+def measure(function, pcd: open3d.geometry.PointCloud, box: tuple, repeat: int):
+    """
+    Returns the cropped points and the best runtime in seconds of the crop function over several runs
+
+    """
+    runtimes = []
+    for _ in range(repeat):
+        cloud = Cloud()
+        cloud.set_pcd(copy.deepcopy(pcd))
+        start = time.perf_counter()
+        function(cloud, *box)
+        runtimes.append(time.perf_counter() - start)
+    return cloud.get_points(), min(runtimes)
+
+
+def run(n_points: int, repeat: int):
+    points = create_bin_cloud(n_points)
+    pcd = open3d.geometry.PointCloud()
+    pcd.points = open3d.utility.Vector3dVector(points)
+
+    print(f"Crop of {n_points} points (best of {repeat} runs)")
+    print(f"{'box':>22} {'points':>9} {'chained [s]':>12} {'fused [s]':>10} {'speedup':>8} {'equal':>6}")
+    # 3x3 and 5x5 cutouts (80 x 50 per element) and a box covering most of the cloud
+    for box in [(-120, -75, 120, 75), (-200, -125, 200, 125), (-350, -250, 350, 250)]:
+        chained, chained_time = measure(crop_chained, pcd, box, repeat)
+        fused, fused_time = measure(crop_fused, pcd, box, repeat)
+        print(f"{str(box):>22} {len(fused):>9} {chained_time:>12.3f} {fused_time:>10.3f} "
+              f"{chained_time / fused_time:>7.1f}x {str(np.array_equal(chained, fused)):>6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares the chained threshold removals and the fused box crop")
+    parser.add_argument("--points", type=int, default=5000000, help="Number of points of the synthetic cloud")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs per crop")
+    args = parser.parse_args()
+
+    run(args.points, args.repeat)
@@ -0,0 +1,76 @@
+import argparse
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+from P020_Backend.P021_Code.CloudProcessing import Cloud
+from P020_Backend.P024_Benchmark.VoxelBenchmark import create_bin_cloud
+
+
+def get_heatmap(cloud: Cloud, voxel_size: int):
+    """
+    Returns the min-max standardized heatmap of the cloud and the runtime of the heatmap in seconds
+
+    """
+    start = time.perf_counter()
+    heatmap, _, _ = cloud.get_heatmap_array(voxel_size=voxel_size)
+    runtime = time.perf_counter() - start
+    heatmap = (heatmap - np.min(heatmap)) / (np.max(heatmap) - np.min(heatmap))
+    return heatmap, runtime
+
+
+def compare(clouds: dict, voxel_size: int, tolerance: float):
+    """
+    Returns the maximum deviation of the float32 from the float64 heatmap, the memory of the points and the runtimes of
+    both modes and the information on whether the heatmaps are equal within the tolerance
+
+    """
+    heatmaps, memory, runtimes = {}, {}, {}
+    for dtype, cloud in clouds.items():
+        heatmaps[dtype], runtimes[dtype] = get_heatmap(cloud, voxel_size)
+        memory[dtype] = cloud.get_points().nbytes
+
+    if heatmaps[np.float32].shape != heatmaps[np.float64].shape:
+        return np.inf, memory, runtimes, False
+    deviation = np.abs(heatmaps[np.float32] - heatmaps[np.float64]).max(initial=0)
+    return deviation, memory, runtimes, heatmaps[np.float32].dtype == np.float32 and deviation <= tolerance
+
+
+def run(n_points: int, cutout_path: str, voxel_size: int, tolerance: float):
+    rows = []
+    clouds = {}
+    for dtype in [np.float64, np.float32]:
+        clouds[dtype] = Cloud(dtype=dtype)
+        clouds[dtype].set_points(create_bin_cloud(n_points))
+    rows.append((f"synthetic ({n_points})", *compare(clouds, voxel_size, tolerance)))
+
+    if cutout_path:
+        for filepath in sorted(glob.glob(os.path.join(cutout_path, "*"))):
+            if not filepath.endswith((".csv", ".npy", ".ply")) or "Results" in os.path.basename(filepath):
+                continue
+            clouds = {}
+            for dtype in [np.float64, np.float32]:
+                clouds[dtype] = Cloud(dtype=dtype)
+                clouds[dtype].set(filepath)
+            rows.append((os.path.basename(filepath), *compare(clouds, voxel_size, tolerance)))
+
+    print(f"Heatmaps in float32 and float64 (voxel size {voxel_size}, tolerance {tolerance})")
+    print(f"{'cloud':>32} {'f64 [MB]':>9} {'f32 [MB]':>9} {'f64 [s]':>8} {'f32 [s]':>8} {'deviation':>10} {'equal':>6}")
+    for name, deviation, memory, runtimes, equal in rows:
+        print(f"{name[-32:]:>32} {memory[np.float64] / 1e6:>9.2f} {memory[np.float32] / 1e6:>9.2f} "
+              f"{runtimes[np.float64]:>8.3f} {runtimes[np.float32]:>8.3f} {deviation:>10.2e} {str(equal):>6}")
+
+    return all(row[-1] for row in rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares the heatmaps of the float32 and the float64 mode")
+    parser.add_argument("--points", type=int, default=5000000, help="Number of points of the synthetic cloud")
+    parser.add_argument("--cutouts", help="Path of a cutout dataset whose heatmaps are compared as well")
+    parser.add_argument("--voxel-size", type=int, default=10)
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="Maximum deviation of the standardized heatmaps")
+    args = parser.parse_args()
+
+    sys.exit(0 if run(args.points, args.cutouts, args.voxel_size, args.tolerance) else 1)
@@ -0,0 +1,63 @@
+import argparse
+import time
+
+import numpy as np
+from P020_Backend.P021_Code.SpatialIndex import SpatialIndex
+from P020_Backend.P024_Benchmark.VoxelBenchmark import create_bin_cloud
+
+
+def best_time(function, *args, repeat: int = 20):
+    """
+    Returns the result and the best runtime in milliseconds of the function call over several runs
+
+    """
+    runtimes = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(*args)
+        runtimes.append(time.perf_counter() - start)
+    return result, min(runtimes) * 1000
+
+
+def highest_near_scan(points: np.ndarray, x: float, y: float, radius: float):
+    distances = (points[:, 0] - x) ** 2 + (points[:, 1] - y) ** 2
+    candidates = np.flatnonzero(distances <= radius ** 2)
+    return int(candidates[np.argmax(points[candidates, 2])])
+
+
+def box_scan(points: np.ndarray, x1: float, y1: float, x2: float, y2: float):
+    return np.flatnonzero((points[:, 0] >= x1) & (points[:, 0] <= x2) & (points[:, 1] >= y1) & (points[:, 1] <= y2))
+
+
+def nearest_scan(points: np.ndarray, x: float, y: float, k: int):
+    distances = (points[:, 0] - x) ** 2 + (points[:, 1] - y) ** 2
+    return np.argsort(distances, kind="stable")[:k]
+
+
+def run(n_points: int):
+    points = create_bin_cloud(n_points)
+    index, build_time = best_time(SpatialIndex, points, repeat=1)
+    print(f"Spatial index of {n_points} points: build {build_time:.1f} ms, cell size {index.cell_size:.2f}")
+
+    queries = [("highest near (r=10)", index.highest_near, highest_near_scan, (12.3, -45.6, 10)),
+               ("box 3x3 cutout", index.box, box_scan, (-120, -75, 120, 75)),
+               ("box 20x20", index.box, box_scan, (-10, -10, 10, 10)),
+               ("nearest (k=16)", index.nearest, nearest_scan, (12.3, -45.6, 16))]
+    print(f"{'query':>20} {'scan [ms]':>10} {'index [ms]':>11} {'speedup':>8} {'equal':>6}")
+    for name, query, scan, args in queries:
+        scan_result, scan_time = best_time(scan, points, *args)
+        index_result, index_time = best_time(query, *args)
+        if name.startswith("nearest"):
+            # points with the same distance may be returned in a different order
+            equal = np.array_equal(np.sort(scan_result), np.sort(index_result))
+        else:
+            equal = np.array_equal(scan_result, index_result)
+        print(f"{name:>20} {scan_time:>10.3f} {index_time:>11.3f} {scan_time / index_time:>7.1f}x {str(equal):>6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares the spatial index queries with full scans of the points")
+    parser.add_argument("--points", type=int, default=5000000, help="Number of points of the synthetic cloud")
+    args = parser.parse_args()
+
+    run(args.points)
@@ -0,0 +1,67 @@
+import argparse
+import time
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from P020_Backend.P021_Code import CloudPlots
+from P020_Backend.P021_Code.CloudProcessing import POINT_BUDGET, Cloud
+from P020_Backend.P024_Benchmark.RedrawBenchmark import Master
+from P020_Backend.P024_Benchmark.VoxelBenchmark import create_bin_cloud
+
+
+def measure_draw(plot, repeats: int):
+    """
+    Returns the median time of drawing the figure of the plot in seconds
+
+    """
+    canvas = FigureCanvasAgg(plot.fig)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        canvas.draw()
+        times.append(time.perf_counter() - start)
+    return np.median(times)
+
+
+def run(sizes: list, sample_rate: int, point_budget: int, repeats: int):
+    print(f"Point cloud plot: sample rate {sample_rate} vs. level of detail with a budget of {point_budget} points "
+          f"(median of {repeats} draws)")
+    print(f"{'points':>10} {'sampled':>8} {'draw [ms]':>10} {'lod':>7} {'sampling [ms]':>14} {'draw [ms]':>10} "
+          f"{'zoom [ms]':>10}")
+    for size in sizes:
+        cloud = Cloud()
+        cloud.set_points(create_bin_cloud(size))
+
+        sampled = cloud.get_sampled_points(sample_rate)
+        sampled_time = measure_draw(CloudPlots.SampledCloudPlot(Master(), sampled, sample_rate, fig=Figure()), repeats)
+
+        start = time.perf_counter()
+        lod = cloud.get_lod_points(point_budget)
+        sampling_time = time.perf_counter() - start
+        plot = CloudPlots.LodCloudPlot(Master(), lod, point_budget, fig=Figure())
+        lod_time = measure_draw(plot, repeats)
+
+        # zoom into the center quarter of the cloud: sampling of the region
+        x1, y1, x2, y2 = plot.get_view_bounds()
+        bounds = (x1 + (x2 - x1) / 4, y1 + (y2 - y1) / 4, x2 - (x2 - x1) / 4, y2 - (y2 - y1) / 4)
+        cloud.get_index()
+        start = time.perf_counter()
+        cloud.get_lod_points(point_budget, bounds)
+        zoom_time = time.perf_counter() - start
+
+        print(f"{size:>10} {len(sampled):>8} {sampled_time * 1e3:>10.1f} {len(lod):>7} {sampling_time * 1e3:>14.1f} "
+              f"{lod_time * 1e3:>10.1f} {zoom_time * 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares the point cloud plot with a fixed sample rate and the level "
+                                                 "of detail plot with a point budget for growing clouds")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000, 4000000],
+                        help="Numbers of points of the synthetic clouds")
+    parser.add_argument("--sample-rate", type=int, default=60)
+    parser.add_argument("--point-budget", type=int, default=POINT_BUDGET)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    run(args.sizes, args.sample_rate, args.point_budget, args.repeats)
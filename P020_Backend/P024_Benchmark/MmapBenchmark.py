@@ -0,0 +1,85 @@
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from P020_Backend.P024_Benchmark.VoxelBenchmark import create_bin_cloud
+
+
+# 3x3 cutout (80 x 50 per element) in the middle of the synthetic cloud
+CUTOUT = (-120, -75, 120, 75)
+
+
+def run_mode(path: str, mode: str, voxel_size: int, cutout: bool):
+    """
+    Creates the heatmap of the npy cloud (or of a cutout of it) in the current process and prints the runtime and the
+    peak memory (maximum resident set size, including the resident pages of a memory mapped file) of the process
+
+    """
+    start = time.perf_counter()
+    if mode == "open3d":
+        import open3d
+        from P020_Backend.P021_Code.CloudProcessing import get_heatmap_grid, get_voxel_data
+        # the former loading: complete array and open3D copy, threshold and crop on the open3D object
+        pcd = open3d.geometry.PointCloud()
+        pcd.points = open3d.utility.Vector3dVector(np.load(path))
+        thresholds = [(2, -2.5, np.greater)]
+        if cutout:
+            x1, y1, x2, y2 = CUTOUT
+            thresholds += [(0, x1, np.greater_equal), (0, x2, np.less_equal), (1, y1, np.greater_equal),
+                           (1, y2, np.less_equal)]
+        for ax, threshold, comparison in thresholds:
+            points = np.asarray(pcd.points)
+            pcd = pcd.select_by_index(np.where(comparison(points[:, ax], threshold))[0])
+        heatmap, _, _ = get_heatmap_grid(get_voxel_data(np.asarray(pcd.points), voxel_size))
+    else:
+        from P020_Backend.P021_Code.CloudProcessing import Cloud
+        cloud = Cloud()
+        cloud.set(path, mmap=mode == "mmap")
+        if cutout:
+            cloud.crop(*CUTOUT)
+        heatmap, _, _ = cloud.get_heatmap_array(voxel_size)
+    runtime = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode} {runtime:.3f} {peak:.1f} {heatmap.sum():.6f}")
+
+
+def run(n_points: int, voxel_size: int):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "cloud.npy")
+        np.save(path, create_bin_cloud(n_points))
+
+        # every mode runs in a new process, so that the peak memory is not shared
+        baseline = subprocess.run([sys.executable, "-c", "import numpy, open3d, resource; "
+                                   "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)"],
+                                  capture_output=True, text=True, check=True)
+        print(f"Heatmap of a npy cloud with {n_points} points ({os.path.getsize(path) / 1e6:.0f} MB), "
+              f"interpreter with imports: {float(baseline.stdout):.0f} MB")
+        print(f"{'region':>7} {'mode':>8} {'runtime [s]':>12} {'peak [MB]':>10} {'heatmap sum':>14}")
+        for region in ["cloud", "cutout"]:
+            for mode in ["open3d", "array", "mmap"]:
+                command = [sys.executable, __file__, "--mode", mode, "--path", path, "--voxel-size", str(voxel_size)]
+                if region == "cutout":
+                    command.append("--cutout")
+                result = subprocess.run(command, capture_output=True, text=True, check=True)
+                mode, runtime, peak, checksum = result.stdout.split()
+                print(f"{region:>7} {mode:>8} {float(runtime):>12.3f} {float(peak):>10.1f} {float(checksum):>14.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares the peak memory of loading npy clouds with and without mmap")
+    parser.add_argument("--points", type=int, default=5000000, help="Number of points of the synthetic cloud")
+    parser.add_argument("--voxel-size", type=int, default=10)
+    parser.add_argument("--mode", help="Runs a single mode (open3d, array or mmap) on the cloud given by --path")
+    parser.add_argument("--path")
+    parser.add_argument("--cutout", action="store_true", help="Creates the heatmap of a 3x3 cutout (single mode)")
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.path, args.mode, args.voxel_size, args.cutout)
+    else:
+        run(args.points, args.voxel_size)
@@ -0,0 +1,63 @@
+import argparse
+import os
+import time
+
+import numpy as np
+from P020_Backend.P021_Code.CloudCache import CloudCache
+from P020_Backend.P021_Code.CloudConversion import FORMATS, RESULTS_SUFFIX
+from P020_Backend.P021_Code.CloudLoader import CloudLoader, load_cloud, prefetch_clouds
+
+DEFAULT_SETTINGS = ("pcd", 60, None)
+
+
+def walk(paths: list, cache: CloudCache, count: int, dwell: float, voxel_size: int):
+    """
+    Opens the point clouds one after another like an annotator (load job and dwell time) and returns the latency of
+    every open in seconds. With a cache, the next files are prefetched in a worker thread during the dwell time.
+
+    """
+    prefetcher = CloudLoader() if cache is not None else None
+    latencies = []
+    for ind, path in enumerate(paths):
+        if prefetcher is not None:
+            prefetcher.cancel()
+        start = time.perf_counter()
+        load_cloud(path, *DEFAULT_SETTINGS, cache)
+        latencies.append(time.perf_counter() - start)
+        if prefetcher is not None:
+            prefetcher.submit(prefetch_clouds, (paths[ind + 1:ind + 1 + count],
+                                                [DEFAULT_SETTINGS, ("heatmap", None, voxel_size)], cache), None)
+        time.sleep(dwell)
+    return np.array(latencies)
+
+
+def run(cutout_path: str, count: int, budget: float, dwell: float, voxel_size: int):
+    paths = [os.path.join(cutout_path, filename) for filename in sorted(os.listdir(cutout_path))
+             if filename.endswith(FORMATS) and not filename.endswith(RESULTS_SUFFIX)]
+
+    without_cache = walk(paths, None, count, dwell, voxel_size)
+    cache = CloudCache(int(budget * 2 ** 20))
+    with_cache = walk(paths, cache, count, dwell, voxel_size)
+    stats = cache.get_stats()
+
+    print(f"{len(paths)} clouds of {cutout_path}, prefetch of {count} files, budget {budget:.0f} MB, "
+          f"dwell time {dwell:.2f} s")
+    print(f"{'':>16} {'mean [ms]':>10} {'median [ms]':>12} {'max [ms]':>9}")
+    for name, latencies in [("no cache", without_cache), ("prefetch", with_cache)]:
+        print(f"{name:>16} {latencies.mean() * 1e3:>10.2f} {np.median(latencies) * 1e3:>12.2f} "
+              f"{latencies.max() * 1e3:>9.2f}")
+    print(f"hits {stats['hits']}, misses {stats['misses']}, hit rate {stats['hit_rate']:.2f}, evictions "
+          f"{stats['evictions']}, cached {stats['entries']} clouds ({stats['memory'] / 2 ** 20:.1f} MB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures the latency of opening the clouds of a dataset one after "
+                                                 "another with and without prefetch")
+    parser.add_argument("cutout_path", help="Dataset folder (e.g. Cutout_3x3)")
+    parser.add_argument("--count", type=int, default=3, help="Number of prefetched files")
+    parser.add_argument("--budget", type=float, default=512, help="Memory budget of the cache in MB")
+    parser.add_argument("--dwell", type=float, default=0.2, help="Time in seconds between two opens (labeling)")
+    parser.add_argument("--voxel-size", type=int, default=10)
+    args = parser.parse_args()
+
+    run(args.cutout_path, args.count, args.budget, args.dwell, args.voxel_size)
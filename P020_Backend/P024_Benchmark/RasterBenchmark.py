@@ -0,0 +1,84 @@
+import argparse
+import time
+
+import numpy as np
+from matplotlib.backend_bases import MouseEvent
+from matplotlib.figure import Figure
+from P020_Backend.P021_Code import CloudPlots
+from P020_Backend.P021_Code.CloudProcessing import RASTER_SIZE, Cloud
+from P020_Backend.P024_Benchmark.LodBenchmark import measure_draw
+from P020_Backend.P024_Benchmark.RedrawBenchmark import Master
+from P020_Backend.P024_Benchmark.VoxelBenchmark import create_bin_cloud
+
+# radius around a picked pixel in which the highest point of the cloud is searched (labeling frame with SNAP_PICK)
+PICK_RADIUS = 10
+
+
+class PickMaster(Master):
+    """
+    Stands in for the labeling frame and keeps the picked position
+
+    """
+
+    def __init__(self):
+        self.pick = None
+
+    def event_handler(self, event_type, event_data):
+        if event_type == "pick_event":
+            self.pick = event_data
+
+
+def run(sizes: list, raster_size: int, repeats: int, dtypes: list):
+    print(f"Top view raster with {raster_size} pixels along the longer side (median of {repeats} runs)")
+    print("index and raster are computed in the loading job, draw and pick run on the GUI thread")
+    print(f"{'points':>10} {'dtype':>8} {'index [ms]':>11} {'raster [ms]':>12} {'draw [ms]':>10} {'pick [ms]':>10} "
+          f"{'total [ms]':>11}")
+    for size, dtype in [(size, dtype) for size in sizes for dtype in dtypes]:
+        points = create_bin_cloud(size)
+        index_times = []
+        raster_times = []
+        for _ in range(repeats):
+            # a new cloud, so that the spatial index is built again (as in load_cloud)
+            cloud = Cloud(dtype=dtype)
+            cloud.set_points(points)
+            cloud.get_points()
+            start = time.perf_counter()
+            index = cloud.get_index()
+            index_times.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            raster = cloud.get_raster_image(raster_size)
+            raster_times.append(time.perf_counter() - start)
+        master = PickMaster()
+        plot = CloudPlots.RasterPlot(master, raster, fig=Figure())
+        draw_time = measure_draw(plot, repeats)
+
+        # pick at the center of the cloud: pick event of the image, pixel center and highest point near it
+        center = cloud.get_points()[:, :2].mean(axis=0)
+        mouse_event = MouseEvent("button_press_event", plot.fig.canvas, *plot.ax.transData.transform(center))
+        pick_times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            plot.c_pick.custom_pick(None)
+            plot.fig.pick(mouse_event)
+            plot.c_pick.disconnect_pick(None)
+            if master.pick is not None:
+                index.highest_near(*master.pick, PICK_RADIUS)
+            pick_times.append(time.perf_counter() - start)
+
+        index_time, raster_time, pick_time = np.median(index_times), np.median(raster_times), np.median(pick_times)
+        print(f"{size:>10} {np.dtype(dtype).name:>8} {index_time * 1e3:>11.1f} {raster_time * 1e3:>12.1f} "
+              f"{draw_time * 1e3:>10.1f} {pick_time * 1e3:>10.1f} "
+              f"{(index_time + raster_time + draw_time + pick_time) * 1e3:>11.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures the computation, drawing and picking of the top view raster "
+                                                 "for growing clouds")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000000, 2000000, 4000000],
+                        help="Numbers of points of the synthetic clouds")
+    parser.add_argument("--raster-size", type=int, default=RASTER_SIZE)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--dtypes", nargs="+", default=["float64", "float32"], help="Data types of the points")
+    args = parser.parse_args()
+
+    run(args.sizes, args.raster_size, args.repeats, [np.dtype(dtype) for dtype in args.dtypes])
@@ -0,0 +1,172 @@
+import argparse
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from P020_Backend.P021_Code import CloudPlots
+from P020_Backend.P021_Code.CloudLoader import get_plot_data
+from P020_Backend.P021_Code.CloudProcessing import Cloud
+from P020_Backend.P024_Benchmark.VoxelBenchmark import create_bin_cloud
+
+# interactions of the labeling frame: plot settings and whether the cloud is cropped before
+INTERACTIONS = [("open cloud", ("pcd", 60, None), False),
+                ("sample rate", ("pcd", 30, None), False),
+                ("voxel plot", ("voxel", None, 10), False),
+                ("voxel size", ("voxel", None, 20), False),
+                ("heatmap", ("heatmap", None, 10), False),
+                ("voxel size", ("heatmap", None, 20), False),
+                ("cut", ("heatmap", None, 20), True),
+                ("point cloud", ("pcd", 60, None), True)]
+PLOT_CLASSES = {"pcd": CloudPlots.SampledCloudPlot, "voxel": CloudPlots.VoxelPlot,
+                "heatmap": CloudPlots.VoxelHeatmapPlot}
+
+
+class Master:
+    """
+    Stands in for the labeling frame (receives the plot events)
+
+    """
+
+    def event_handler(self, event_type, event_data):
+        pass
+
+
+class Surface:
+    """
+    The canvas on which the plots are displayed: a tkinter canvas with toolbar (like the labeling frame) or, without
+    display, an Agg canvas
+
+    """
+
+    def __init__(self, tk_root=None):
+        self.tk_root = tk_root
+        self.canvas = None
+        self.toolbar = None
+
+    def create(self, fig):
+        if self.tk_root is None:
+            self.canvas = FigureCanvasAgg(fig)
+            return
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+        self.canvas = FigureCanvasTkAgg(fig, master=self.tk_root)
+        self.canvas.get_tk_widget().grid(column=0, row=1, sticky="NSWE")
+        self.toolbar = NavigationToolbar2Tk(self.canvas, self.tk_root, pack_toolbar=False)
+        self.toolbar.grid(column=0, row=2)
+
+    def destroy(self):
+        if self.tk_root is not None and self.canvas is not None:
+            self.canvas.get_tk_widget().destroy()
+            self.toolbar.grid_forget()
+
+    def draw(self):
+        self.canvas.draw()
+        if self.toolbar is not None:
+            self.toolbar.update()
+            self.tk_root.update()
+
+
+def create_plot(settings: tuple, plot_data, fig=None):
+    plot_type, sample_rate, voxel_size = settings
+    if plot_type == "pcd":
+        return PLOT_CLASSES[plot_type](Master(), plot_data, sample_rate, fig=fig)
+    elif plot_type == "voxel":
+        return PLOT_CLASSES[plot_type](Master(), plot_data, voxel_size, fig=fig)
+    plot = PLOT_CLASSES[plot_type](Master(), plot_data, fig=fig)
+    plot.add_draggable_rect()
+    return plot
+
+
+def rebuild(surface: Surface, plot, settings: tuple, plot_data):
+    """
+    Former display of a plot: new figure, canvas and toolbar for every interaction
+
+    """
+    plt.close()
+    surface.destroy()
+    plot = create_plot(settings, plot_data)
+    surface.create(plot.fig)
+    surface.draw()
+    return plot
+
+
+def reuse(surface: Surface, plot, settings: tuple, plot_data):
+    """
+    Display of a plot on the persistent figure and canvas: the artists of a plot of the same type are updated
+
+    """
+    plot_type, sample_rate, voxel_size = settings
+    if surface.canvas is None:
+        surface.create(Figure())
+    if type(plot) is PLOT_CLASSES[plot_type]:
+        if plot_type == "pcd":
+            plot.set_points(plot_data, sample_rate)
+        elif plot_type == "voxel":
+            plot.set_voxels(plot_data, voxel_size)
+        else:
+            plot.set_heatmap(plot_data)
+            plot.add_draggable_rect()
+    else:
+        if plot is not None:
+            plot.disconnect()
+        plot = create_plot(settings, plot_data, surface.canvas.figure)
+    surface.draw()
+    return plot
+
+
+def run(n_points: int, cloud_path: str, repeats: int, use_tk: bool):
+    cloud = Cloud()
+    if cloud_path:
+        cloud.set(cloud_path)
+    else:
+        cloud.set_points(create_bin_cloud(n_points))
+    cropped = Cloud()
+    points = cloud.get_points()
+    center = points.mean(axis=0)
+    cropped.set_points(points[np.all(np.abs(points[:, :2] - center[:2]) < 150, axis=1)])
+    plot_data = [get_plot_data(cropped if crop else cloud, *settings) for _, settings, crop in INTERACTIONS]
+
+    tk_root = None
+    if use_tk:
+        try:
+            import tkinter as tk
+            tk_root = tk.Tk()
+        except Exception as tk_exception:
+            print(f"tkinter not available ({type(tk_exception).__name__}: {tk_exception}), Agg canvas is used")
+
+    latencies = {}
+    for name, display in [("rebuild", rebuild), ("reuse", reuse)]:
+        times = np.zeros((repeats, len(INTERACTIONS)))
+        for repeat in range(repeats):
+            surface, plot = Surface(tk_root), None
+            for ind, (_, settings, _) in enumerate(INTERACTIONS):
+                start = time.perf_counter()
+                plot = display(surface, plot, settings, plot_data[ind])
+                times[repeat, ind] = time.perf_counter() - start
+            surface.destroy()
+            plt.close("all")
+        latencies[name] = np.median(times, axis=0)
+
+    print(f"Redraw latency per interaction ({len(points)} points, {'tkinter' if tk_root else 'Agg'} canvas, "
+          f"median of {repeats} runs)")
+    print(f"{'interaction':>24} {'rebuild [ms]':>13} {'reuse [ms]':>11} {'speedup':>8}")
+    for ind, (name, settings, _) in enumerate(INTERACTIONS):
+        print(f"{name + ' (' + settings[0] + ')':>24} {latencies['rebuild'][ind] * 1e3:>13.1f} "
+              f"{latencies['reuse'][ind] * 1e3:>11.1f} {latencies['rebuild'][ind] / latencies['reuse'][ind]:>7.1f}x")
+    print(f"{'total':>24} {latencies['rebuild'].sum() * 1e3:>13.1f} {latencies['reuse'].sum() * 1e3:>11.1f} "
+          f"{latencies['rebuild'].sum() / latencies['reuse'].sum():>7.1f}x")
+    if tk_root is not None:
+        tk_root.destroy()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares the redraw latency of rebuilding the figure and canvas "
+                                                 "with updating a persistent figure")
+    parser.add_argument("--points", type=int, default=1000000, help="Number of points of the synthetic cloud")
+    parser.add_argument("--cloud", help="Point cloud file used instead of the synthetic cloud")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--agg", action="store_true", help="Use an Agg canvas instead of a tkinter canvas")
+    args = parser.parse_args()
+
+    run(args.points, args.cloud, args.repeats, not args.agg)
@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# modules that take more than a second to import, they should only be imported when they are used
+HEAVY_MODULES = ["torch", "open3d", "seaborn", "sklearn"]
+MODULES = ["numpy", "pandas", "matplotlib.pyplot", "P020_Backend.P021_Code.CloudProcessing",
+           "P020_Backend.P021_Code.CloudPlots", "P020_Backend.P021_Code.ResultPlots", "P020_Backend.P023_Model.Model"]
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+FRONTEND_PATH = os.path.join(ROOT_PATH, "P030_Frontend")
+
+IMPORT_SCRIPT = """
+import importlib, json, sys, time
+start = time.perf_counter()
+importlib.import_module({module!r})
+print(json.dumps({{"time": time.perf_counter() - start,
+                  "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+# "from package import module" (as used by the frontend) checks the attribute of the package before the submodule
+FROM_IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from {package} import {name}
+print(json.dumps({{"time": time.perf_counter() - start,
+                  "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+ROOT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import Root_Window
+import_time = time.perf_counter() - start
+try:
+    root = Root_Window.Root()
+    root.update()
+    root_time = time.perf_counter() - start
+    root.destroy()
+    error = None
+except Exception as root_exception:
+    root_time = None
+    error = f"{{type(root_exception).__name__}}: {{root_exception}}"
+print(json.dumps({{"import": import_time, "root": root_time, "error": error,
+                  "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def run_script(script: str, cwd: str):
+    """
+    Runs the script in a fresh interpreter (nothing imported yet) and returns its json output
+
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([ROOT_PATH, FRONTEND_PATH, env.get("PYTHONPATH", "")])
+    process = subprocess.run([sys.executable, "-c", script], cwd=cwd, env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        return {"error": process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "failed"}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def print_import_times(label: str, script: str, repeats: int):
+    """
+    Runs the import script several times and prints the minimum import time and the heavy modules imported
+
+    """
+    results = [run_script(script, ROOT_PATH) for _ in range(repeats)]
+    if any("error" in result for result in results):
+        print(f"{label:>40} {'-':>9}  {results[0].get('error', '')}")
+        return
+    print(f"{label:>40} {min(result['time'] for result in results):>9.3f}  {', '.join(results[0]['heavy']) or '-'}")
+
+
+def run(repeats: int, modules: list):
+    print(f"Import time in a fresh interpreter (minimum of {repeats} runs)")
+    print(f"{'module':>40} {'time [s]':>9}  heavy modules imported")
+    for module in modules:
+        print_import_times(module, IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES), repeats)
+        if "." in module:
+            package, name = module.rsplit(".", 1)
+            print_import_times(f"from ... import {name}",
+                               FROM_IMPORT_SCRIPT.format(package=package, name=name, heavy=HEAVY_MODULES), repeats)
+
+    results = [run_script(ROOT_SCRIPT.format(heavy=HEAVY_MODULES), FRONTEND_PATH) for _ in range(repeats)]
+    print("GUI start (Root_Window)")
+    if any("import" not in result for result in results):
+        print(f"{'import':>40} {'-':>9}  {results[0].get('error', '')}")
+        return
+    print(f"{'import':>40} {min(result['import'] for result in results):>9.3f}  "
+          f"{', '.join(results[0]['heavy']) or '-'}")
+    if results[0]["error"]:
+        # e.g. no display available
+        print(f"{'Root()':>40} {'-':>9}  not available: {results[0]['error']}")
+    else:
+        print(f"{'Root()':>40} {min(result['root'] for result in results):>9.3f}  "
+              f"{', '.join(results[0]['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measures the import time of the modules and the start of the GUI")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--modules", nargs="+", default=MODULES, help="Modules whose import time is measured")
+    args = parser.parse_args()
+
+    run(args.repeats, args.modules)
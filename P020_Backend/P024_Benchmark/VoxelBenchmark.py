@@ -0,0 +1,96 @@
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import open3d
+from P020_Backend.P021_Code.CloudProcessing import get_voxel_data
+
+
+def get_voxels_dense(pcd: open3d.geometry.PointCloud, voxel_size: int = 2):
+    """
+    The former voxelization (dense voxel array filled from the open3D voxel list), kept as benchmark reference
+
+    """
+    center = pcd.get_center()
+    voxel_grid = open3d.geometry.VoxelGrid.create_from_point_cloud(input=pcd, voxel_size=voxel_size)
+    resolution = np.round(voxel_grid.get_max_bound() - voxel_grid.get_min_bound()).astype(int)
+    voxel_array = np.zeros((resolution[0], resolution[1], resolution[2]))
+    voxels = voxel_grid.get_voxels()
+
+    for voxel in voxels:
+        voxel_index = voxel.grid_index * voxel_size
+        voxel_array[int(voxel_index[0]), int(voxel_index[1]), int(voxel_index[2])] = 1
+
+    indices = np.where(voxel_array == 1)
+    shift_x = resolution[0] / 2
+    shift_y = resolution[1] / 2
+    voxel_data = np.vstack((indices[0], indices[1], indices[2])).T
+    voxel_data[:, 0] = voxel_data[:, 0] - shift_x + center[0]
+    voxel_data[:, 1] = voxel_data[:, 1] - shift_y + center[1]
+
+    return voxel_data
+
+
+def create_bin_cloud(n_points: int = 500000, width: float = 800, depth: float = 600, height: float = 100,
+                     seed: int = 0):
+    """
+    Creates a synthetic bin cloud (bin floor with randomly placed terminal blocks)
+
+    Parameter
+    ---------
+    n_points : int
+        The number of points
+    width : float
+        The extent of the bin in x-direction
+    depth : float
+        The extent of the bin in y-direction
+    height : float
+        The maximum height of the objects in the bin
+
+    """
+    rng = np.random.default_rng(seed)
+    points = np.empty((n_points, 3))
+    points[:, 0] = rng.uniform(-width / 2, width / 2, n_points)
+    points[:, 1] = rng.uniform(-depth / 2, depth / 2, n_points)
+    heights = np.sin(points[:, 0] / 40) * np.cos(points[:, 1] / 25)
+    points[:, 2] = np.clip(heights, 0, None) * height + rng.normal(0, 0.5, n_points)
+    return points
+
+
+def measure(function, *args):
+    """
+    Returns the result, the runtime in seconds and the peak of the traced memory in bytes of the function call
+
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    runtime = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, runtime, peak
+
+
+def run(n_points: int, voxel_sizes: list):
+    points = create_bin_cloud(n_points)
+    pcd = open3d.geometry.PointCloud()
+    pcd.points = open3d.utility.Vector3dVector(points)
+
+    print(f"Voxelization of {n_points} points")
+    print(f"{'size':>5} {'voxels':>9} {'dense [s]':>10} {'dense [MB]':>11} {'sparse [s]':>11} {'sparse [MB]':>12} "
+          f"{'speedup':>8} {'equal':>6}")
+    for voxel_size in voxel_sizes:
+        dense, dense_time, dense_peak = measure(get_voxels_dense, pcd, voxel_size)
+        sparse, sparse_time, sparse_peak = measure(get_voxel_data, points, voxel_size)
+        print(f"{voxel_size:>5} {len(sparse):>9} {dense_time:>10.3f} {dense_peak / 1e6:>11.1f} {sparse_time:>11.3f} "
+              f"{sparse_peak / 1e6:>12.1f} {dense_time / sparse_time:>7.1f}x {str(np.array_equal(dense, sparse)):>6}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares the dense and the sparse voxelization")
+    parser.add_argument("--points", type=int, default=500000, help="Number of points of the synthetic cloud")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(range(1, 21)), help="Voxel sizes to measure")
+    args = parser.parse_args()
+
+    run(args.points, args.sizes)
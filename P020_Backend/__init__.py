@@ -1 +1,12 @@
-from .P021_Code import *
+import importlib
+
+
+# the subpackages are returned without searching the backend code for their names
+PACKAGES = ["P021_Code", "P023_Model", "P024_Benchmark"]
+
+
+def __getattr__(name):
+    if name in PACKAGES:
+        return importlib.import_module(f"{__name__}.{name}")
+    # the backend code is only imported on first access (see P021_Code)
+    return getattr(importlib.import_module(f"{__name__}.P021_Code"), name)
@@ -2,8 +2,6 @@ import tkinter as tk
 import os
 from PIL import Image, ImageTk
 from W2_Labeling import LabelingFrame
-from W3_Training import TrainingFrame
-from W4_Test import TestFrame
 
 ORANGE = "#eb8c00"
 LIGHT_ORANGE = "#ffc54b"
@@ -138,13 +136,16 @@ class ToolBar(tk.Frame):
             The variable contains information about which frame should be displayed.
 
         """
+        # the training and test frames import the model (torch), they are only imported when they are opened
         if var == "training":
+            from W3_Training import TrainingFrame
             frame = TrainingFrame().show()
             self.change_button_color(self.training)
         elif var == "labeling":
             frame = LabelingFrame().show()
             self.change_button_color(self.labeling)
         elif var == "test":
+            from W4_Test import TestFrame
             frame = TestFrame().show()
             self.change_button_color(self.test)
 
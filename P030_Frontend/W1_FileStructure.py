@@ -3,6 +3,8 @@ from tkinter import ttk
 import os
 from tkinter import filedialog
 from tkinter import messagebox
+from P020_Backend.P021_Code.CloudArchive import ARCHIVE_EXTENSION, open_archive
+from P020_Backend.P021_Code.CloudConversion import FORMATS, RESULTS_SUFFIX
 
 BACKEND_FOLDER = "F02_Backend"
 DATASET_FOLDER = "F021_Dataset"
@@ -44,8 +46,10 @@ class FileStructure(tk.Frame):
         Inserts the files and folders contained at the given path recursively to the treeview object
     check_for_parents(child_iid, iids)
         Returns the parent node of a passed child node from the treeview object
-    get_path()
-        Returns the filepath of the currently selected item in the treeview object
+    get_path(item_iid)
+        Returns the filepath of the currently selected item (or of the given item) in the treeview object
+    get_next_paths(count)
+        Returns the filepaths of the point cloud files following the currently selected item in the treeview object
     get_item()
         Returns the name of the item currently selected in the treeview object
     select_item_by_name(filename, item="")
@@ -110,7 +114,8 @@ class FileStructure(tk.Frame):
     def set_file_structure(self, parent, path):
         """
         Inserts the files and folders contained at the given path recursively to the treeview object.
-        If the current path is a folder path, it is searched for further files.
+        If the current path is a folder path, it is searched for further files. The cutouts of a packed archive are
+        inserted as its children (read from the index of the archive). Hidden files and folders are skipped.
 
         Parameter
         ---------
@@ -120,11 +125,20 @@ class FileStructure(tk.Frame):
             The path to be searched for files
         """
         for file in os.listdir(path):
+            # hidden folders contain caches of the backend (e.g. binary copies of csv point clouds)
+            if file.startswith("."):
+                continue
             abspath = os.path.join(path, file)
             isdir = os.path.isdir(abspath)
             oid = self.file_treeview.insert(parent, 'end', text=file, open=False)
             if isdir:
                 self.set_file_structure(oid, abspath)
+            elif file.endswith(ARCHIVE_EXTENSION):
+                try:
+                    for filename in open_archive(abspath).filenames:
+                        self.file_treeview.insert(oid, 'end', text=filename, open=False)
+                except (OSError, ValueError):
+                    pass
 
     def check_for_parents(self, child_iid, iids):
         """
@@ -144,13 +158,19 @@ class FileStructure(tk.Frame):
             self.check_for_parents(parent_iid, iids)
         return iids
 
-    def get_path(self):
+    def get_path(self, item_iid=None):
         """
-        Returns the filepath of the currently selected item in the treeview object.
+        Returns the filepath of the currently selected item (or of the given item) in the treeview object.
+
+        Parameter
+        ---------
+        item_iid : Any
+            The iid of the item (default: the selected item)
 
         """
         path = ""
-        item_iid = self.file_treeview.selection()[0]
+        if item_iid is None:
+            item_iid = self.file_treeview.selection()[0]
         iids = [item_iid]
         self.check_for_parents(item_iid, iids)
         reordered_iids = [iids[i] for i in range(len(iids) - 1, -1, -1)]
@@ -159,6 +179,31 @@ class FileStructure(tk.Frame):
             path = os.path.join(path, filename)
         return path
 
+    def get_next_paths(self, count: int):
+        """
+        Returns the filepaths of the point cloud files (no folders, archives or results files) that follow the
+        currently selected item in its folder in the treeview object (e.g. to load them in advance).
+
+        Parameter
+        ---------
+        count : int
+            The maximum number of filepaths
+
+        """
+        selection = self.file_treeview.selection()
+        if not selection:
+            return []
+        siblings = self.file_treeview.get_children(self.file_treeview.parent(selection[0]))
+        paths = []
+        for iid in siblings[siblings.index(selection[0]) + 1:]:
+            if len(paths) >= count:
+                break
+            name = self.file_treeview.item(iid)["text"]
+            if self.file_treeview.get_children(iid) or not name.endswith(FORMATS) or name.endswith(RESULTS_SUFFIX):
+                continue
+            paths.append(self.get_path(iid))
+        return paths
+
     def get_item(self):
         """
         Returns the name of the item currently selected in the treeview object.
@@ -5,9 +5,15 @@ from PIL import Image, ImageTk
 import os
 from P020_Backend.P021_Code import CloudProcessing
 from P020_Backend.P021_Code import CloudPlots
+from P020_Backend.P021_Code.CloudArchive import open_archive, split_archive_path
+from P020_Backend.P021_Code.CloudConversion import FORMATS
+from P020_Backend.P021_Code.CloudFiles import CUTOUT_EXTENSION
+from P020_Backend.P021_Code.CloudCache import CloudCache
+from P020_Backend.P021_Code.CloudLoader import CloudLoader, crop_cloud, get_plot_data, load_cloud, prefetch_clouds, \
+    refine_cloud
 from P020_Backend.P021_Code.LabelingResults import ResultsDataFrame
 from ToolTip import CustomToolTip
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk
 
@@ -27,6 +33,15 @@ BLUE = '#1874CD'
 YELLOW = '#FFFF00'
 
 OPEN_CLOUD = False
+# moves a picked plot point to the highest point of the full cloud within PICK_RADIUS (off: the picked coordinates are
+# kept, as the cutout rectangle and the labels are placed at them)
+SNAP_PICK = False
+# radius around a picked plot point in which the highest point of the full cloud is searched (SNAP_PICK)
+PICK_RADIUS = 10
+# interval in ms in which the results of the loading thread are polled
+POLL_INTERVAL = 50
+# number of files following an opened point cloud in the file structure that are loaded in advance
+PREFETCH_COUNT = 3
 
 
 class LabelingFrame(tk.Frame):
@@ -48,6 +63,8 @@ class LabelingFrame(tk.Frame):
         Returns the class instance so that the frame can be displayed on the main window
     set_at_target(target, items)
         Distributes the parameters transferred in a drop event to the respective class objects (label frames)
+    show_item(item, path)
+        Sets the labeling options of a loaded point cloud
     """
 
     def __init__(self):
@@ -86,35 +103,55 @@ class LabelingFrame(tk.Frame):
             The item dropped from the tree view
 
         """
-        global OPEN_CLOUD
         try:
             if target == self.point_cloud_display or target == self.point_cloud_display.canvas.get_tk_widget():
                 item, path = items
-                if "Cutout" in item:
-                    self.labeling_options.release()
-                    filename = os.path.splitext(item)[0]
-                    kernel_size = filename.split("_")[-1]
-                    dirname = os.path.dirname(path)
-                    results_df = ResultsDataFrame(dirname, kernel_size)
-                    label = results_df.get_label(item)
-                    self.labeling_options.set_label(label)
-                    self.point_cloud_display.cutout.set(True)
-                    self.selection_options.save_result_bt.configure(state="normal")
-                else:
-                    self.point_cloud_display.cutout.set(False)
-                    self.labeling_options.set_label(label=None)
-                    self.labeling_options.disable()
-                    self.selection_options.save_result_bt.configure(state="disabled")
-
-                self.point_cloud_display.cloud.set(path)
-                self.selection_options.file_name.set(item)
-                self.point_cloud_display.reset_variables()
-                self.point_cloud_display.show_plot()
-                self.selection_options.status.set("Nicht gespeichert")
-                OPEN_CLOUD = True
+                # the cloud is read in the loading thread (a load that is still running is cancelled), the labeling
+                # options are set when it is displayed
+                self.point_cloud_display.load(path, lambda a=item, b=path: self.show_item(a, b))
         except AttributeError:
             pass
 
+    def show_item(self, item, path):
+        """
+        Sets the labeling options of a loaded point cloud (label of a cutout, state of the labeling and save button)
+
+        Parameter
+        ---------
+        item : str
+            The name of the point cloud file
+        path : str
+            Memory path of the point cloud
+
+        """
+        global OPEN_CLOUD
+        archive_path, _ = split_archive_path(path)
+        if "Cutout" in item and archive_path:
+            # packed cutouts are shown with their label, the archive itself is not changed
+            self.labeling_options.set_label(open_archive(archive_path).get_label(item))
+            self.labeling_options.disable()
+            self.point_cloud_display.cutout.set(True)
+            self.selection_options.save_result_bt.configure(state="disabled")
+        elif "Cutout" in item:
+            self.labeling_options.release()
+            filename = os.path.splitext(item)[0]
+            kernel_size = filename.split("_")[-1]
+            dirname = os.path.dirname(path)
+            results_df = ResultsDataFrame(dirname, kernel_size)
+            label = results_df.get_label(item)
+            self.labeling_options.set_label(label)
+            self.point_cloud_display.cutout.set(True)
+            self.selection_options.save_result_bt.configure(state="normal")
+        else:
+            self.point_cloud_display.cutout.set(False)
+            self.labeling_options.set_label(label=None)
+            self.labeling_options.disable()
+            self.selection_options.save_result_bt.configure(state="disabled")
+
+        self.selection_options.file_name.set(item)
+        self.selection_options.status.set("Nicht gespeichert")
+        OPEN_CLOUD = True
+
 
 class SelectionOptions(tk.LabelFrame):
     """
@@ -200,11 +237,12 @@ class SelectionOptions(tk.LabelFrame):
         event : Any
             The bound combobox selection event
         """
-        if OPEN_CLOUD:
+        # the point cloud is not changed while it is loaded or cropped
+        if OPEN_CLOUD and not self.root.point_cloud_display.loader.is_busy():
             self.save_result_bt.configure(state="disabled")
             self.root.labeling_options.disable()
             self.root.point_cloud_display.cutout.set(False)
-            self.root.point_cloud_display.cloud.set()
+            self.root.point_cloud_display.cloud.reset()
             self.root.point_cloud_display.show_plot()
 
     def save_result(self):
@@ -214,12 +252,14 @@ class SelectionOptions(tk.LabelFrame):
         saves the labeling results in the results csv file.
 
         """
+        if self.root.point_cloud_display.loader.is_busy():
+            return
         cutout_dir = self.root.master.file_structure.get_cutout_path(self.kernel_cbb.get())
         if cutout_dir:
             filename = self.file_name.get()
             if "Cutout" not in filename:
                 filename = filename.split(".")
-                filename = f"{filename[0]}_Cutout_{self.kernel_cbb.get()}.csv"
+                filename = f"{filename[0]}_Cutout_{self.kernel_cbb.get()}{CUTOUT_EXTENSION}"
             self.root.point_cloud_display.cloud.save_pcd(cutout_dir, filename)
             label = self.root.labeling_options.get_label()
             offsets = self.root.point_cloud_display.get_zero_offsets()
@@ -407,12 +447,12 @@ class PointCloud(tk.LabelFrame):
         A variable that assumes the value one if the point cloud plot is displayed on the GUI
     cb_pcd : tk.Checkbutton
         The checkbutton to display the point cloud plot
-    sample_rate : tk.StingVar
-        The sample rate at which the point cloud is sampled
-    lb_sample_rate :  tk.Label
-        A label with the info text about the sample rate
-    en_sample_rate : tk.Entry
-        An entry in which the sample rate is written
+    point_budget : tk.StingVar
+        The maximum number of points drawn in the point cloud plot
+    lb_point_budget :  tk.Label
+        A label with the info text about the point budget
+    en_point_budget : tk.Entry
+        An entry in which the point budget is written
     voxel_var : tk.IntVar
         A variable that assumes the value one if the voxel plot is displayed on the GUI
     cb_voxel : tk.Checkbutton
@@ -427,10 +467,16 @@ class PointCloud(tk.LabelFrame):
         A variable that assumes the value one if the heatmap is displayed on the GUI
     cb_heatmap : tk.Checkbutton
         The checkbutton to display the heatmap plot
+    raster_var : tk.IntVar
+        A variable that assumes the value one if the top view raster is displayed on the GUI
+    cb_raster : tk.Checkbutton
+        The checkbutton to display the top view raster plot (fast display of very large point clouds)
     lb_info : tk.Label
         The label showing the tooltip
+    fig : Any
+        The matplotlib figure on which all plots are drawn (created with the canvas)
     canvas : Any
-        The canvas object displaying the plots
+        The canvas object displaying the plots (one canvas for the session)
     toolbar : Any
         The matplotlib toolbar object
     cloud : PointCloud
@@ -445,20 +491,61 @@ class PointCloud(tk.LabelFrame):
         The y coordinates of a picked point (Determined when a cutoff event is triggered)
     zero_offsets : Any
         The zero offset value to the cutout rectangle of the heatmap plot (Determined when a cutoff event is triggered)
+    busy : tk.StringVar
+        The text of the job running in the loading thread (empty if no job is running)
+    lb_busy : tk.Label
+        A label containing the busy attribute
+    loader : CloudLoader
+        The loading thread in which the point clouds are read, cropped and their plot data is computed (shared by all
+        labeling frames)
+    polling : bool
+        Information on whether the results of the loading thread are polled
+    cache : CloudCache
+        The cache of the loaded and prefetched point clouds and their plot data (shared by all labeling frames, its
+        hit and miss counters are returned by get_stats())
+    prefetcher : CloudLoader
+        The thread in which the files following an opened point cloud are loaded into the cache (shared by all
+        labeling frames)
+    plot_settings : tuple
+        The plot type, point budget and voxel size of the displayed plot
 
     Methods
     -------
     set_cb(value)
         Deselects the unselected checkboxes and triggers the show plot method
-    get_plot()
+    get_plot_settings()
+        Returns the plot type, point budget and voxel size selected in the frame
+    get_plot(settings, plot_data)
         Gets the plot classes with respect to the selected checkbox
+    load(path, on_loaded)
+        Loads a point cloud in the loading thread and displays it
+    show_loaded(settings, on_loaded, result, exception)
+        Replaces the point cloud by the loaded one and displays it
+    prefetch()
+        Loads the files following the opened point cloud into the cache
     show_plot()
-        Places the selected plot in the frame (displays it)
+        Computes the selected plot in the loading thread and displays it
+    show_plot_data(settings, result, exception)
+        Displays the computed plot
+    display_plot(settings, plot_data)
+        Places the plot in the frame (displays it)
+    run_job(text, function, args, callback)
+        Runs a job in the loading thread and shows the busy state until it has finished
+    poll_jobs()
+        Passes the results of the loading thread to their callbacks and ends the busy state
+    set_busy(text)
+        Shows or hides the busy state
+    show_error(exception)
+        Shows the error of a failed job
     update_plot(event)
-        Updates the plot to a new voxel size or sample rate if one of them was written in the associated entry and
+        Updates the plot to a new voxel size or point budget if one of them was written in the associated entry and
         logged by pressing return
     event_handler(event_type, event_data)
         Manages the following processes after a plot event was triggered
+    show_cutout(settings, result, exception)
+        Displays the cropped point cloud and releases the labeling button
+    show_detail(bounds, result, exception)
+        Displays the points sampled from a zoomed region
     get_zero_offsets()
         Returns the information about the current zero offset
     reset_variables()
@@ -466,6 +553,10 @@ class PointCloud(tk.LabelFrame):
 
     """
 
+    LOADER = None
+    CACHE = None
+    PREFETCHER = None
+
     def __init__(self, root):
         """
         Parameter
@@ -483,13 +574,13 @@ class PointCloud(tk.LabelFrame):
         self.cb_pcd.select()
         self.cb_pcd.grid(column=0, row=0, padx=5, pady=5)
 
-        self.sample_rate = tk.StringVar()
-        self.sample_rate.set("60")
-        self.lb_sample_rate = tk.Label(self, text="Sample rate:")
-        self.lb_sample_rate.grid(column=1, row=0, padx=(0, 3), pady=5)
-        self.en_sample_rate = tk.Entry(self, textvariable=self.sample_rate, width=5)
-        self.en_sample_rate.grid(column=2, row=0, pady=5)
-        self.en_sample_rate.bind("<Return>", self.update_plot)
+        self.point_budget = tk.StringVar()
+        self.point_budget.set(str(CloudProcessing.POINT_BUDGET))
+        self.lb_point_budget = tk.Label(self, text="Point budget:")
+        self.lb_point_budget.grid(column=1, row=0, padx=(0, 3), pady=5)
+        self.en_point_budget = tk.Entry(self, textvariable=self.point_budget, width=7)
+        self.en_point_budget.grid(column=2, row=0, pady=5)
+        self.en_point_budget.bind("<Return>", self.update_plot)
 
         self.voxel_var = tk.IntVar()
         self.cb_voxel = tk.Checkbutton(self, text="Voxel", justify="left", anchor="w", variable=self.voxel_var,
@@ -509,6 +600,11 @@ class PointCloud(tk.LabelFrame):
                                          command=lambda x="heatmap": self.set_cb(x))
         self.cb_heatmap.grid(column=8, row=0, padx=5, pady=5)
 
+        self.raster_var = tk.IntVar()
+        self.cb_raster = tk.Checkbutton(self, text="Top view (raster)", justify="left", anchor="w",
+                                        variable=self.raster_var, command=lambda x="raster": self.set_cb(x))
+        self.cb_raster.grid(column=9, row=0, padx=5, pady=5)
+
         try:
             info_icon_path = os.path.join(os.getcwd(), r"Icon\Info.png")
             info_icon_img = Image.open(info_icon_path)
@@ -522,11 +618,12 @@ class PointCloud(tk.LabelFrame):
                                     "2. Ziehen Sie eine Punktwolke-Datei aus\n"
                                     "   der Ordnerstruktur in das freie\n"
                                     "   Feld im Bereich 'Punktwolke'.")
-        self.lb_info.grid(column=9, row=0, padx=5, pady=5)
+        self.lb_info.grid(column=10, row=0, padx=5, pady=5)
 
         self.columnconfigure(3, weight=1, uniform="empty")
         self.columnconfigure(7, weight=1, uniform="empty")
 
+        self.fig = None
         self.canvas = None
         self.toolbar = None
         self.cloud = CloudProcessing.Cloud()
@@ -538,6 +635,20 @@ class PointCloud(tk.LabelFrame):
 
         self.zero_offsets = None
 
+        self.busy = tk.StringVar()
+        self.lb_busy = tk.Label(self, textvariable=self.busy, fg=DARK_GREY)
+        self.lb_busy.grid(column=3, row=0, padx=5, pady=5)
+        if PointCloud.LOADER is None:
+            PointCloud.LOADER = CloudLoader()
+        self.loader = PointCloud.LOADER
+        if PointCloud.CACHE is None:
+            PointCloud.CACHE = CloudCache()
+            PointCloud.PREFETCHER = CloudLoader()
+        self.cache = PointCloud.CACHE
+        self.prefetcher = PointCloud.PREFETCHER
+        self.polling = False
+        self.plot_settings = None
+
     def set_cb(self, value):
         """
         Deselects the unselected checkboxes and triggers the show plot method.
@@ -550,41 +661,88 @@ class PointCloud(tk.LabelFrame):
         if value == "pcd":
             self.cb_voxel.deselect()
             self.cb_heatmap.deselect()
+            self.cb_raster.deselect()
         elif value == "voxel":
             self.cb_pcd.deselect()
             self.cb_heatmap.deselect()
+            self.cb_raster.deselect()
         elif value == "heatmap":
             self.cb_pcd.deselect()
             self.cb_voxel.deselect()
+            self.cb_raster.deselect()
+        elif value == "raster":
+            self.cb_pcd.deselect()
+            self.cb_voxel.deselect()
+            self.cb_heatmap.deselect()
 
         if OPEN_CLOUD:
             self.show_plot()
 
-    def get_plot(self):
+    def get_plot_settings(self):
         """
-        Gets the plot objects with respect to the selected checkbox and changes the tooltip.
+        Returns the plot type ("lod", "voxel", "heatmap" or "raster"), the point budget and the voxel size selected in
+        the frame (None if not used by the plot type)
 
         """
         if self.pcd_var.get():
-            sample_rate = int(self.sample_rate.get())
-            pcd = self.cloud.get()
-            self.plot = CloudPlots.SampledCloudPlot(self, pcd, sample_rate)
+            return "lod", int(self.point_budget.get()), None
+        elif self.voxel_var.get():
+            return "voxel", None, int(self.voxel_size.get())
+        elif self.raster_var.get():
+            return "raster", None, None
+        else:
+            return "heatmap", None, int(self.voxel_size.get())
+
+    def get_plot(self, settings, plot_data):
+        """
+        Gets the plot objects with respect to the plot type and changes the tooltip. If the displayed plot has the same
+        type, its data is replaced (its artists are updated), otherwise the new plot is drawn on the figure.
+
+        Parameter
+        ---------
+        settings : tuple
+            The plot type, point budget and voxel size of the plot
+        plot_data : Any
+            The data of the plot computed in the loading thread (sampled points, voxels, heatmap arrays or raster)
+
+        """
+        plot_type, point_budget, voxel_size = settings
+        plot_classes = {"lod": CloudPlots.LodCloudPlot, "voxel": CloudPlots.VoxelPlot,
+                        "heatmap": CloudPlots.VoxelHeatmapPlot, "raster": CloudPlots.RasterPlot}
+        replace = type(self.plot) is plot_classes[plot_type]
+        if self.plot is not None and not replace:
+            self.plot.disconnect()
+
+        if plot_type == "lod":
+            if replace:
+                self.plot.set_points(plot_data, point_budget)
+            else:
+                self.plot = CloudPlots.LodCloudPlot(self, plot_data, point_budget, fig=self.fig)
             CustomToolTip(self.lb_info, text="'Strg+Maustaste': Wahl einer Klemme im Plot\n\n"
-                                             "'RechteMaustaste': Zoom\n\n"
+                                             "'RechteMaustaste': Zoom (zeigt mehr Punkte)\n\n"
                                              "'LinkeMaustaste': Drehen der Punktwolke\n\n"
                                              "'Mausrad': Verschieben der Punktwolke")
-        elif self.voxel_var.get():
-            voxel_size = int(self.voxel_size.get())
-            data = self.cloud.get_voxels(voxel_size)
-            self.plot = CloudPlots.VoxelPlot(self, data, voxel_size)
+        elif plot_type == "voxel":
+            if replace:
+                self.plot.set_voxels(plot_data, voxel_size)
+            else:
+                self.plot = CloudPlots.VoxelPlot(self, plot_data, voxel_size, fig=self.fig)
             CustomToolTip(self.lb_info, text="'Strg+Maustaste': Wahl einer Klemme im Plot\n\n"
                                              "'RechteMaustaste': Zoom\n\n"
                                              "'LinkeMaustaste': Drehen der Punktwolke\n\n"
                                              "'Mausrad': Verschieben der Punktwolke")
+        elif plot_type == "raster":
+            if replace:
+                self.plot.set_raster(plot_data)
+            else:
+                self.plot = CloudPlots.RasterPlot(self, plot_data, fig=self.fig)
+            CustomToolTip(self.lb_info, text="'Strg+Maustaste': Wahl einer Klemme im Plot\n\n"
+                                             "Zoom und Verschieben über die Toolbar")
         else:
-            voxel_size = int(self.voxel_size.get())
-            data = self.cloud.get_heatmap(voxel_size)
-            self.plot = CloudPlots.VoxelHeatmapPlot(self, data)
+            if replace:
+                self.plot.set_heatmap(plot_data)
+            else:
+                self.plot = CloudPlots.VoxelHeatmapPlot(self, plot_data, fig=self.fig)
             if not self.cutout.get():
                 kernel_size = self.root.selection_options.kernel_cbb.get()
                 if self.pick_x and self.pick_y:
@@ -597,85 +755,272 @@ class PointCloud(tk.LabelFrame):
                                              "3. Auswahl der Greifrichtung im Bereich 'Labeling'.\n\n"
                                              "4. Speichern der Punktwolke.")
 
-    def show_plot(self):
+    def load(self, path, on_loaded=None):
+        """
+        Loads a point cloud in the loading thread and displays it with the default plot settings. A job that is still
+        running (e.g. the load of the previously dropped cloud) is cancelled, as well as the prefetch. Prefetched point
+        clouds are taken from the cache. Files that are no point clouds (unsupported extension) are ignored.
+
+        Parameter
+        ---------
+        path : str
+            Memory path of the point cloud
+        on_loaded : Any
+            A function that is called when the point cloud is loaded (before it is displayed)
+
+        """
+        archive_path, _ = split_archive_path(path)
+        if not archive_path and not path.endswith(FORMATS):
+            return
+        self.prefetcher.cancel()
+        self.reset_variables()
+        settings = self.get_plot_settings()
+        self.run_job("Lade Punktwolke ...", load_cloud, (path, *settings, self.cache),
+                     lambda result, exception, a=settings, b=on_loaded: self.show_loaded(a, b, result, exception))
+
+    def show_loaded(self, settings, on_loaded, result, exception):
+        """
+        Replaces the point cloud by the loaded one and displays it (callback of the load job)
+
+        """
+        if exception is not None:
+            self.show_error(exception)
+            return
+        self.cloud, plot_data = result
+        if on_loaded is not None:
+            on_loaded()
+        self.display_plot(settings, plot_data)
+        self.prefetch()
+
+    def prefetch(self):
         """
-        Places the selected plot in the frame (displays it).
+        Loads the files following the opened point cloud in the file structure into the cache (with the data of the
+        default plot and of the heatmap at the current voxel size), so that the next file is opened without reading it
 
         """
         try:
-            plt.close()
-        except Exception:
-            pass
+            paths = self.root.master.file_structure.get_next_paths(PREFETCH_COUNT)
+            plot_settings = [self.get_plot_settings(), ("heatmap", None, int(self.voxel_size.get()))]
+        except (AttributeError, ValueError):
+            return
+        if paths:
+            self.prefetcher.submit(prefetch_clouds, (paths, plot_settings, self.cache), None)
+
+    def show_plot(self):
+        """
+        Computes the selected plot in the loading thread and displays it. While another job is running, the plot is
+        updated when it has finished.
 
-        if self.canvas is not None:
-            self.canvas.get_tk_widget().destroy()
-        if self.toolbar is not None:
-            self.toolbar.grid_forget()
+        """
+        if self.loader.is_busy():
+            return
+        settings = self.get_plot_settings()
+        self.run_job("Berechne Plot ...", get_plot_data, (self.cloud, *settings),
+                     lambda result, exception, a=settings: self.show_plot_data(a, result, exception))
+
+    def show_plot_data(self, settings, result, exception):
+        """
+        Displays the computed plot (callback of the plot job)
 
-        self.get_plot()
-        fig, ax = self.plot.get_plot()
+        """
+        if exception is not None:
+            self.show_error(exception)
+            return
+        self.display_plot(settings, result)
 
-        self.canvas = FigureCanvasTkAgg(fig, master=self)
-        self.canvas.get_tk_widget().grid(column=0, columnspan=9, row=1, padx=5, pady=5, sticky="NSWE")
+    def display_plot(self, settings, plot_data):
+        """
+        Places the plot in the frame (displays it). The figure, canvas and toolbar are created for the first plot and
+        reused for all following plots.
+
+        Parameter
+        ---------
+        settings : tuple
+            The plot type, point budget and voxel size of the plot
+        plot_data : Any
+            The data of the plot computed in the loading thread
+
+        """
+        if self.canvas is None:
+            self.fig = Figure()
+            self.canvas = FigureCanvasTkAgg(self.fig, master=self)
+            self.canvas.get_tk_widget().grid(column=0, columnspan=10, row=1, padx=5, pady=5, sticky="NSWE")
+            self.toolbar = NavigationToolbar2Tk(self.canvas, self, pack_toolbar=False)
+            self.toolbar.grid(column=0, columnspan=10, row=2)
+            self.rowconfigure(1, weight=1)
+
+        self.get_plot(settings, plot_data)
+        self.plot_settings = settings
         self.canvas.draw()
-        self.toolbar = NavigationToolbar2Tk(self.canvas, self, pack_toolbar=False)
-        self.toolbar.grid(column=0, columnspan=9, row=2)
+        # the zoom and pan history belongs to the previous plot
         self.toolbar.update()
 
-        self.rowconfigure(1, weight=1)
-
     def update_plot(self, event=None):
         """
-        Updates the plot to a new voxel size or sample rate if one of them was written in the associated entry and
+        Updates the plot to a new voxel size or point budget if one of them was written in the associated entry and
         logged by pressing return.
 
         Parameter
         --------
         event : Any
-            Return event after writing something in the sample rate or voxel size entrys
+            Return event after writing something in the point budget or voxel size entrys
         """
         try:
             self.show_plot()
         except ValueError:
             pass
 
+    def run_job(self, text, function, args, callback):
+        """
+        Runs a job in the loading thread (the jobs submitted before are cancelled) and shows the busy state until it
+        has finished. The results are polled with after(), so that the GUI is only updated from its own thread.
+
+        Parameter
+        ---------
+        text : str
+            The text shown while the job is running
+        function : Any
+            The function of the job
+        args : tuple
+            The arguments of the function
+        callback : Any
+            The function that is called on the GUI thread with the result and the exception of the job
+
+        """
+        self.loader.submit(function, args, callback)
+        self.set_busy(text)
+        if not self.polling:
+            self.polling = True
+            self.after(POLL_INTERVAL, self.poll_jobs)
+
+    def poll_jobs(self):
+        """
+        Passes the results of the loading thread to their callbacks and ends the busy state when no job is running.
+        Changes of the plot settings made while a job was running are displayed afterwards. If a callback raises, the
+        polling is still rescheduled or ended (the error is reported by tkinter).
+
+        """
+        try:
+            self.loader.process_results()
+        finally:
+            busy = self.loader.is_busy()
+            if busy:
+                self.after(POLL_INTERVAL, self.poll_jobs)
+            else:
+                self.polling = False
+                self.set_busy(None)
+        if busy:
+            return
+        try:
+            if OPEN_CLOUD and self.plot_settings is not None and self.get_plot_settings() != self.plot_settings:
+                self.show_plot()
+        except ValueError:
+            pass
+
+    def set_busy(self, text):
+        """
+        Shows the busy state (text and wait cursor) or hides it if the text is None
+
+        Parameter
+        ---------
+        text : str
+            The text of the running job
+
+        """
+        self.busy.set(text or "")
+        self.root.master.config(cursor="watch" if text else "")
+
+    def show_error(self, exception):
+        """
+        Shows the error of a failed job
+
+        Parameter
+        ---------
+        exception : Exception
+            The exception raised by the job
+
+        """
+        messagebox.showerror("Fehler beim Laden", f"Die Punktwolke konnte nicht geladen werden: {exception}")
+
     def event_handler(self, event_type, event_data):
         """
         Manages the following processes after a plot event was triggered.
         Pick event:
-            Determines the x- and y-coordinates of the picked point in point cloud or voxel plot
+            Determines the x- and y-coordinates of the picked point in point cloud, voxel or raster plot
+            Moves the picked point to the highest point of the cloud near it if SNAP_PICK is set (spatial index)
             Displays the heatmap plot with the cutout rectangle placed at the x- and y-coordinates
         Cut event:
             Determines the zero offset variable
-            Crops the point cloud to the size of the given bbox coordinates
+            Crops the point cloud to the size of the given bbox coordinates (loading thread)
             Displays the cropped cloud
             Releases the labeling button
+        Zoom event:
+            Samples the points of the zoomed region within the point budget (loading thread)
+            Displays them in the point cloud plot
+        The events are ignored while a job is running in the loading thread.
 
         Parameters
         ----------
         event_type : str
             The event type triggered through the plot objects
         event_data : Any
-            The passed event data (X-, Y-coordinates - pick event, bbox-coordinates and zero_offsets - cut event)
+            The passed event data (X-, Y-coordinates - pick event, bbox-coordinates and zero_offsets - cut event,
+            bounds of the view - zoom event)
         """
+        # the point cloud is not changed while it is loaded or cropped
+        if self.loader.is_busy():
+            return
         if event_type == "pick_event":
             self.pick_x, self.pick_y = event_data
+            if SNAP_PICK:
+                # the plots only show sampled points, voxels or pixels, the pick is moved to the highest point of the
+                # cloud near it (the index was built in the loading thread)
+                index = self.cloud.get_index()
+                ind = index.highest_near(self.pick_x, self.pick_y, PICK_RADIUS)
+                if ind is not None:
+                    self.pick_x, self.pick_y = int(index.points[ind, 0]), int(index.points[ind, 1])
             self.cb_heatmap.select()
             self.set_cb("heatmap")
         elif event_type == "cut_event":
             if not self.cutout.get():
                 x1, y1, x2, y2, zero_offsets = event_data
                 self.zero_offsets = zero_offsets
-                self.cloud.remove_points_from_threshold(axis="X", threshold=x1, direction=">=")
-                self.cloud.remove_points_from_threshold(axis="X", threshold=x2, direction="<=")
-                self.cloud.remove_points_from_threshold(axis="Y", threshold=y1, direction=">=")
-                self.cloud.remove_points_from_threshold(axis="Y", threshold=y2, direction="<=")
-                self.cutout.set(True)
-                self.show_plot()
-                self.root.labeling_options.release()
-                self.root.selection_options.save_result_bt.configure(state="normal")
+                settings = self.get_plot_settings()
+                self.run_job("Schneide Punktwolke aus ...", crop_cloud, (self.cloud, (x1, y1, x2, y2), *settings),
+                             lambda result, exception, a=settings: self.show_cutout(a, result, exception))
             else:
                 messagebox.showinfo("Existierender Cutout", "Die angezeigte Punktwolke ist bereits ein Ausschnitt.")
+        elif event_type == "zoom_event":
+            # clouds within the point budget are displayed completely
+            if len(self.cloud.get_points()) <= self.plot.point_budget:
+                return
+            self.run_job("Lade Details ...", refine_cloud, (self.cloud, event_data, self.plot.point_budget),
+                         lambda result, exception, a=event_data: self.show_detail(a, result, exception))
+
+    def show_cutout(self, settings, result, exception):
+        """
+        Displays the cropped point cloud and releases the labeling button (callback of the crop job)
+
+        """
+        if exception is not None:
+            self.show_error(exception)
+            return
+        self.cutout.set(True)
+        self.display_plot(settings, result)
+        self.root.labeling_options.release()
+        self.root.selection_options.save_result_bt.configure(state="normal")
+
+    def show_detail(self, bounds, result, exception):
+        """
+        Displays the points sampled from a zoomed region (callback of the zoom job)
+
+        """
+        if exception is not None:
+            self.show_error(exception)
+            return
+        if isinstance(self.plot, CloudPlots.LodCloudPlot):
+            self.plot.set_detail(result, bounds)
+            self.canvas.draw_idle()
 
     def get_zero_offsets(self):
         """
@@ -698,5 +1043,6 @@ class PointCloud(tk.LabelFrame):
         self.cb_pcd.select()
         self.cb_voxel.deselect()
         self.cb_heatmap.deselect()
+        self.cb_raster.deselect()
         self.voxel_size.set("10")
-        self.sample_rate.set("60")
+        self.point_budget.set(str(CloudProcessing.POINT_BUDGET))
@@ -10,12 +10,15 @@ import matplotlib
 matplotlib.use('TkAgg')
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from P020_Backend.P023_Model import Model
+from P020_Backend.P023_Model.Callbacks import Callback, QueueCallback
+from P020_Backend.P021_Code.CloudArchive import is_archive, open_archive
 from P020_Backend.P021_Code.ResultPlots import TrainingResPlot
 
 
 BACKEND_FOLDER = "F02_Backend"
 DATASET_FOLDER = "F021_Dataset"
 NETWORK_FOLDER = "F022_Network"
+POLL_INTERVAL = 100
 
 
 class TrainingFrame(tk.Frame):
@@ -104,6 +107,8 @@ class Options(tk.LabelFrame):
         A variable to display the stop event of the training loop
     bt_stop_training : tk.Button
         A button to stop the training loop
+    callback : QueueCallback
+        The callback of the running training loop
 
     Methods
     -------
@@ -115,8 +120,10 @@ class Options(tk.LabelFrame):
         Checks whether something has been entered in both entry fields
     train()
         Starts the thread for the training loop
-    train_model(memory_path, kernel_size)
+    train_model(memory_path, kernel_size, callback)
         Starts the training loop
+    poll_training(callback, handler)
+        Processes the events of the training loop on the GUI thread
     disable_start_training()
         Disables the start training button
     enable_start_training()
@@ -160,6 +167,8 @@ class Options(tk.LabelFrame):
         self.bt_stop_training = tk.Button(self, text="Training stoppen", command=self.stop_training)
         self.bt_stop_training.grid(column=1, row=1, padx=(25, 50), pady=5, sticky="NSWE")
 
+        self.callback = None
+
         self.columnconfigure("all", weight=1, uniform="cols")
         self.rowconfigure(0, weight=1, uniform="opt")
         self.rowconfigure(1, weight=1, uniform="opt")
@@ -171,6 +180,11 @@ class Options(tk.LabelFrame):
 
         """
         try:
+            if is_archive(self.en_features.path):
+                # the results are packed into the archive
+                self.labels.set(open_archive(self.en_features.path).results_file)
+                self.en_labels.path = self.en_features.path
+                return
             for filename in os.listdir(self.en_features.path):
                 if filename.endswith(".csv") and "Results_Labeled" in filename:
                     self.labels.set(filename)
@@ -185,6 +199,8 @@ class Options(tk.LabelFrame):
 
         """
         self.stop.set(True)
+        if self.callback:
+            self.callback.stop()
 
     def check_entries(self):
         """
@@ -213,11 +229,14 @@ class Options(tk.LabelFrame):
 
             memory_path = filedialog.askdirectory(title="Modelle Speicherpfad")
 
-            kernel_size = basename.split("_")[-1]
+            kernel_size = os.path.splitext(basename)[0].split("_")[-1]
 
+            self.root.master.config(cursor="watch")
+            self.callback = QueueCallback()
             thread = Thread(daemon=True,
-                            target=lambda a=memory_path, b=kernel_size: self.train_model(a, b))
+                            target=lambda a=memory_path, b=kernel_size, c=self.callback: self.train_model(a, b, c))
             thread.start()
+            self.poll_training(self.callback, TrainingFrameCallback(self.root))
 
         except Exception as train_exception:
             print(train_exception.with_traceback())
@@ -226,9 +245,9 @@ class Options(tk.LabelFrame):
                                                                          ""
                                                                          f"{train_exception}")
 
-    def train_model(self, memory_path, kernel_size):
+    def train_model(self, memory_path, kernel_size, callback):
         """
-        Starts the training loop.
+        Starts the training loop. Runs in the training thread, the GUI is updated through the callback.
 
         Parameter
         ---------
@@ -236,23 +255,33 @@ class Options(tk.LabelFrame):
             Memory path for the model
         kernel_size : str
             Kernel size used to cut out the point clouds to be used for training
+        callback : QueueCallback
+            The callback collecting the training events
 
         """
-        self.root.results.tb_console.insert(tk.END, "Vorbereiten der Feature Dateien \n")
-        self.root.master.config(cursor="watch")
-
-        training_set = Model.PointCloudSet(self.en_labels.path, self.en_features.path)
-
-        training_set, valid_set = Model.random_split(training_set, [0.8, 0.2])
-
-        train_loader = Model.DataLoader(training_set, batch_size=10, shuffle=True)
-        valid_loader = Model.DataLoader(valid_set, batch_size=len(valid_set))
+        try:
+            Model.train_network(self.en_labels.path, self.en_features.path, kernel_size, memory_path,
+                                callback=callback, workers=os.cpu_count())
+        except Exception as train_exception:
+            callback.on_message(f"Fehler beim Training: {train_exception}")
+            callback.on_end()
 
-        self.root.master.config(cursor="")
+    def poll_training(self, callback, handler):
+        """
+        Processes the events of the training loop on the GUI thread and schedules the next poll until the training
+        has ended.
 
-        nn = Model.Network(kernel_size)
+        Parameter
+        ---------
+        callback : QueueCallback
+            The callback collecting the training events
+        handler : TrainingFrameCallback
+            The callback updating the training frame
 
-        nn.perform_training(train_loader, valid_loader, frame=self.root, memory_path=memory_path)
+        """
+        callback.process_events(handler)
+        if not callback.ended:
+            self.after(POLL_INTERVAL, lambda: self.poll_training(callback, handler))
 
     def disable_start_training(self):
         """
@@ -269,6 +298,44 @@ class Options(tk.LabelFrame):
         self.bt_start_training.configure(state="normal")
 
 
+class TrainingFrameCallback(Callback):
+    """
+    A callback that displays the training events on the training frame. It must be called from the GUI thread.
+
+    ...
+
+    Attributes
+    ----------
+    frame : TrainingFrame
+        The training frame on which the events are displayed
+
+    """
+
+    def __init__(self, frame):
+        super().__init__()
+        self.frame = frame
+
+    def on_start(self):
+        self.frame.master.config(cursor="")
+        self.frame.results.clear_all()
+        self.frame.options.disable_start_training()
+        self.frame.results.set_status("Training gestartet")
+
+    def on_message(self, message: str):
+        self.frame.results.update_console(message)
+
+    def on_progress(self, progress: float):
+        self.frame.results.update_progress(progress)
+
+    def on_epoch_end(self, epoch: int, loss_history: list, train_accuracy: float, valid_accuracy: float):
+        self.frame.results.update_training_history(loss_history, train_accuracy, valid_accuracy)
+
+    def on_end(self):
+        self.frame.master.config(cursor="")
+        self.frame.options.enable_start_training()
+        self.frame.results.set_status("Training beendet")
+
+
 class Results(tk.LabelFrame):
     """
     A class that manages the results frame on the GUI.
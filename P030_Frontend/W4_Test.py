@@ -5,11 +5,12 @@ from tkinter import messagebox
 from tkinter import ttk
 from threading import Thread
 import matplotlib
-import torch
 from ToolTip import CustomToolTip
 matplotlib.use('TkAgg')
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from P020_Backend.P023_Model import Model
+from P020_Backend.P023_Model.Callbacks import Callback, QueueCallback
+from P020_Backend.P021_Code.CloudArchive import is_archive, open_archive
 from P020_Backend.P021_Code.ResultPlots import TestResPlot
 
 
@@ -17,6 +18,9 @@ BACKEND_FOLDER = "F02_Backend"
 DATASET_FOLDER = "F021_Dataset"
 NETWORK_FOLDER = "F022_Network"
 
+TEST_BATCH_SIZE = 64
+POLL_INTERVAL = 100
+
 
 class TestFrame(tk.Frame):
     """
@@ -103,6 +107,8 @@ class Options(tk.LabelFrame):
         A variable to display the stop event of the test loop
     bt_stop_test : tk.Button
         A button to stop the test loop
+    callback : QueueCallback
+        The callback collecting the events of the running test loop
 
     Methods
     -------
@@ -114,8 +120,10 @@ class Options(tk.LabelFrame):
         Checks whether something has been entered in both entry fields
     test()
         Starts the thread for the test loop
-    test_model(memory_path, kernel_size)
+    test_model(model, kernel_size, callback, batch_size)
         Starts the test loop
+    poll_test(callback, handler)
+        Processes the events of the test loop on the GUI thread
     disable_start_test()
         Disables the start test button
     enable_start_test()
@@ -159,6 +167,8 @@ class Options(tk.LabelFrame):
         self.bt_stop_test = tk.Button(self, text="Test stoppen", command=self.stop_test)
         self.bt_stop_test.grid(column=1, row=1, padx=(25, 50), pady=5, sticky="NSWE")
 
+        self.callback = None
+
         self.columnconfigure("all", weight=1, uniform="cols")
         self.rowconfigure(0, weight=1, uniform="opt")
         self.rowconfigure(1, weight=1, uniform="opt")
@@ -170,6 +180,11 @@ class Options(tk.LabelFrame):
 
         """
         try:
+            if is_archive(self.en_features.path):
+                # the results are packed into the archive
+                self.labels.set(open_archive(self.en_features.path).results_file)
+                self.en_labels.path = self.en_features.path
+                return
             for filename in os.listdir(self.en_features.path):
                 if filename.endswith(".csv") and "Results_Labeled" in filename:
                     self.labels.set(filename)
@@ -184,6 +199,8 @@ class Options(tk.LabelFrame):
 
         """
         self.stop.set(True)
+        if self.callback:
+            self.callback.stop()
 
     def check_entries(self):
         """
@@ -211,13 +228,16 @@ class Options(tk.LabelFrame):
 
             model = filedialog.askopenfilename(title="Modell auswählen")
 
-            kernel_size = basename.split("_")[-1]
+            kernel_size = os.path.splitext(basename)[0].split("_")[-1]
 
-            # create training thread
+            self.root.master.config(cursor="watch")
+            self.callback = QueueCallback()
+            # create test thread
             test_thread = Thread(daemon=True,
-                                 target=lambda a=model, b=kernel_size: self.test_model(a, b))
-            # start training thread
+                                 target=lambda a=model, b=kernel_size, c=self.callback: self.test_model(a, b, c))
+            # start test thread
             test_thread.start()
+            self.poll_test(self.callback, TestFrameCallback(self.root))
 
         except Exception as test_exception:
             tk.messagebox.showerror("Fehler beim starten des Tests", "Beim starten des Tests ist ein "
@@ -225,9 +245,9 @@ class Options(tk.LabelFrame):
                                                                      ""
                                                                      f"{test_exception}")
 
-    def test_model(self, model, kernel_size):
+    def test_model(self, model, kernel_size, callback, batch_size=TEST_BATCH_SIZE):
         """
-        Starts the test loop
+        Starts the test loop. Runs in the test thread, the GUI is updated through the callback.
 
         Parameter
         ---------
@@ -235,18 +255,39 @@ class Options(tk.LabelFrame):
             Memory path of the model
         kernel_size : str
             Kernel size used to cut out the point clouds to be used for testing
+        callback : QueueCallback
+            The callback collecting the test events
+        batch_size : int
+            The number of samples evaluated at once
 
         """
-        self.root.master.config(cursor="watch")
+        try:
+            test_set = Model.PointCloudSet(self.en_labels.path, self.en_features.path, train=False,
+                                           workers=os.cpu_count())
+            test_loader = Model.DataLoader(test_set, batch_size=batch_size)
 
-        test_set = Model.PointCloudSet(self.en_labels.path, self.en_features.path, train=False)
-        test_loader = Model.DataLoader(test_set, batch_size=1)
+            nn = Model.Network(kernel_size, model=model)
 
-        self.root.master.config(cursor="")
+            nn.perform_test(test_loader, callback=callback, failed_files=test_set.failed_files)
+        except Exception as test_exception:
+            callback.on_message(f"Fehler beim Test: {test_exception}")
+            callback.on_end()
 
-        nn = Model.Network(kernel_size, model=model)
+    def poll_test(self, callback, handler):
+        """
+        Processes the events of the test loop on the GUI thread and schedules the next poll until the test has ended.
 
-        nn.perform_test(test_loader, frame=self.root)
+        Parameter
+        ---------
+        callback : QueueCallback
+            The callback collecting the test events
+        handler : TestFrameCallback
+            The callback updating the test frame
+
+        """
+        callback.process_events(handler)
+        if not callback.ended:
+            self.after(POLL_INTERVAL, lambda: self.poll_test(callback, handler))
 
     def disable_start_test(self):
         """
@@ -263,6 +304,46 @@ class Options(tk.LabelFrame):
         self.bt_start_test.configure(state="normal")
 
 
+class TestFrameCallback(Callback):
+    """
+    A callback that displays the test events on the test frame. It must be called from the GUI thread.
+
+    ...
+
+    Attributes
+    ----------
+    frame : TestFrame
+        The test frame on which the events are displayed
+
+    """
+
+    def __init__(self, frame):
+        super().__init__()
+        self.frame = frame
+
+    def on_start(self):
+        self.frame.master.config(cursor="")
+        self.frame.results.clear_all()
+        self.frame.options.disable_start_test()
+        self.frame.results.set_status("Test gestartet")
+
+    def on_message(self, message: str):
+        self.frame.results.set_status(message)
+
+    def on_progress(self, progress: float):
+        self.frame.results.update_progress(progress)
+
+    def on_test_update(self, step: int, f1: float, accuracy: float, conf_matrix):
+        self.frame.results.update_test_history(step, f1, accuracy, conf_matrix)
+
+    def on_end(self):
+        self.frame.master.config(cursor="")
+        self.frame.options.enable_start_test()
+        self.frame.results.reset_progress()
+        if self.frame.results.status.get() == "Test gestartet":
+            self.frame.results.set_status("Test beendet")
+
+
 class Results(tk.LabelFrame):
     """
     A class that manages the results frame on the GUI.